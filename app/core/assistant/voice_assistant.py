@@ -1,5 +1,6 @@
 import os
-import sys
+import asyncio
+import logging
 import concurrent.futures
 import threading
 from queue import Queue
@@ -9,12 +10,13 @@ from app.core.modules.adapters.stt import EnhancedRealTimeTranscriber
 from app.core.modules.adapters.tts import RealTimeTTS
 from app.core.modules.llm.language_processor import LanguageProcessor
 from app.core.modules.adapters.audio_interface import TTSAdapter, VoiceAssistant
+from app.core.modules.health.readiness import get_readiness_tracker
 
 from app.helper.get_config import load_yaml
 
 
 load_dotenv()
-print('Starting up Voice assistant!..')
+logger = logging.getLogger(__name__)
 class IntegratedVoiceAssistant:
     _instance = None
     _lock = threading.Lock()
@@ -46,53 +48,82 @@ class IntegratedVoiceAssistant:
         
 
     def _initialize_components(self) -> None:
-        """Initialize all voice assistant components with parallel execution"""
+        """
+        Build the components, running independent ones in parallel. The language
+        processor and the TTS engine do not depend on each other, so the slower of
+        the two sets the startup time; the VoiceAssistant is then assembled from both.
+        Failures raise instead of exiting the process, and every step is reported to
+        the readiness tracker.
+        """
         if self.is_initialized:
-            print("Components already initialized, skipping...")
+            logger.debug("Components already initialized, skipping...")
             return
-            
-        try:
-            print("Initializing Voice Assistant Components...")
-            
-            # Setup Language Processing - Simplified instantiation
-            def init_language_processor():
-                print("Setting up Language Processing (Groq + Web Scraper)...")
+        
+        readiness = get_readiness_tracker()
+        logger.info("Initializing Voice Assistant Components...")
+        
+        def init_language_processor():
+            with readiness.track("language_processor"):
                 return LanguageProcessor(
                     api_key=self.groq_api_key,
                     model_name=load_yaml('MODEL_ID')
                 )
-            
-            self.language_processor = init_language_processor()
-
-            # Setup Voice Assistant
-            def init_voice_assistant():
-                print("Assembling Voice Assistant...")
-                return VoiceAssistant(self.language_processor)
-            
-            self.voice_assistant = self.thread_pool.submit(init_voice_assistant).result()
-
-            # Start processing thread
-            self.processing_thread = threading.Thread(target=self._process_queue, daemon=True)
-            self.processing_thread.start()
-            
-            self.is_initialized = True
-            print("✓ All components initialized successfully!")
-            
-        except Exception as e:
-            print(f"✗ Error initializing components: {e}")            
-            sys.exit(1)
-
+        
+        def init_tts():
+            with readiness.track("tts_engine"):
+                # Default to English speaker, will be changed dynamically
+                return RealTimeTTS(language="English", speaker="Jenny")
+        
+        language_future = self.thread_pool.submit(init_language_processor)
+        tts_future = self.thread_pool.submit(init_tts)
+        self.language_processor = language_future.result()
+        tts_instance = tts_future.result()
+        
+        with readiness.track("voice_assistant"):
+            self.voice_assistant = VoiceAssistant(self.language_processor, tts_instance=tts_instance)
+        
+        # Start processing thread
+        self.processing_thread = threading.Thread(target=self._process_queue, daemon=True)
+        self.processing_thread.start()
+        
+        self.is_initialized = True
+        logger.info("All components initialized successfully")
+    
+    async def awarm_up(self) -> None:
+        """
+        Warm up the expensive pieces concurrently, so the first request does not pay for
+        them: the TTS worker pool, the LLM client connection and the SERP client
+        connection. A failed warm-up is logged and reported but is not fatal.
+        """
+        readiness = get_readiness_tracker()
+        for name in ("tts_executor", "llm_client", "serp_client"):
+            readiness.register(name, required=False)
+        
+        async def warm(name, coroutine_factory):
+            try:
+                with readiness.track(name, required=False):
+                    await coroutine_factory()
+            except Exception as e:
+                logger.warning("Warm-up of %s failed: %s", name, e)
+        
+        await asyncio.gather(
+            warm("tts_executor", lambda: asyncio.to_thread(self.voice_assistant.warm_up)),
+            warm("llm_client", self.language_processor.awarm_up_llm),
+            warm("serp_client", self.language_processor.awarm_up_web)
+        )
+    
     def _process_queue(self):
-        """Process items from the queue using thread pool"""
+        """Hand each queued task to the thread pool as soon as it arrives"""
         while not self.shutdown_event.is_set():
+            item = self.processing_queue.get()
+            if item is None:
+                # Wake-up from stop()
+                continue
             try:
-                if not self.processing_queue.empty():
-                    task, args, kwargs = self.processing_queue.get(timeout=0.5)
-                    self.thread_pool.submit(task, *args, **kwargs)
-                else:
-                    self.shutdown_event.wait(0.1)
+                task, args, kwargs = item
+                self.thread_pool.submit(task, *args, **kwargs)
             except Exception as e:
-                print(f"Error in processing queue: {e}")
+                logger.error("Error in processing queue: %s", e)
 
     def get_voice_assistant(self) -> VoiceAssistant:
         if not self.is_initialized:
@@ -103,10 +134,10 @@ class IntegratedVoiceAssistant:
         try:
             self.voice_assistant.start_conversation()
         except KeyboardInterrupt:
-            print("\nKeyboard interrupt received")
+            logger.info("Keyboard interrupt received")
             self.stop()
         except Exception as e:
-            print(f"Error running voice assistant: {e}")
+            logger.error("Error running voice assistant: %s", e)
             self.stop()
     
     def run_with_context(self, context: dict) -> None:
@@ -115,11 +146,12 @@ class IntegratedVoiceAssistant:
             context_future.result()
             self.run()
         except Exception as e:
-            print(f"Error running voice assistant with context: {e}")
+            logger.error("Error running voice assistant with context: %s", e)
             self.stop()
 
     def stop(self) -> None:
         self.shutdown_event.set()
+        self.processing_queue.put(None)
         if self.voice_assistant:
             self.voice_assistant.stop_conversation()
         
@@ -1,16 +1,27 @@
+import os
 import threading
 import time
 import queue
+import asyncio
 import concurrent.futures
-from typing import Optional, Callable, Dict, Any
+from functools import partial
+from typing import Optional, Callable, Dict, Any, AsyncIterator
 from abc import ABC, abstractmethod
 import logging
+from contextlib import ExitStack
 from dataclasses import dataclass
 from enum import Enum
 from html.parser import HTMLParser
+from app.core.modules.metrics.metrics import MeteredThreadPoolExecutor, observe_stage, time_stage
+from app.core.modules.admission.admission_controller import AdmissionRejected, get_admission_controller
+from app.core.modules.coalescing.request_coalescer import RequestCoalescer, normalize_transcript
+from app.core.modules.adapters.tts_scheduler import TTSScheduler
+from app.core.modules.adapters.completion_store import CompletionStore
+from app.core.modules.adapters.speech_segmenter import IncompleteSpeech, SegmentedSynthesizer, SpeechSegment
+from app.core.modules.cancellation.cancellation import CancellationToken, OperationCancelled, cancel_on_exit
+from app.core.modules.session.conversation_store import get_conversation_store
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Handlers and levels are configured by the application (see structured_logging)
 logger = logging.getLogger(__name__)
 
 class TaskStatus(Enum):
@@ -29,10 +40,28 @@ class AudioTask:
     status: TaskStatus = TaskStatus.PENDING
     result: Any = None
     error: str = None
+    session_id: Optional[str] = None  # Fair-share key for the scheduler
+    deadline: float = None  # Wall-clock time after which the audio is no longer useful
     
     def __post_init__(self):
         if self.timestamp is None:
             self.timestamp = time.time()
+        if self.deadline is None:
+            self.deadline = self.timestamp + 30.0
+
+def shutdown_executor(executor: concurrent.futures.Executor, timeout: float,
+                      cancel_futures: bool = False) -> bool:
+    """
+    Shut down an executor, waiting at most timeout seconds for work already running
+    (Executor.shutdown has no timeout). Returns False if work was still running.
+    """
+    closer = threading.Thread(
+        target=executor.shutdown, kwargs={"wait": True, "cancel_futures": cancel_futures},
+        daemon=True, name="ExecutorShutdown")
+    closer.start()
+    closer.join(timeout)
+    return not closer.is_alive()
+
 
 class ThreadSafeCounter:
     """Thread-safe counter for generating unique task IDs"""
@@ -59,24 +88,29 @@ class AudioProcessor(ABC):
         pass
 
 class TTSAdapter(AudioProcessor):
-    def __init__(self, tts_instance, max_workers: int = 3, max_queue_size: int = 50):
+    def __init__(self, tts_instance, max_workers: int = 3, max_queue_size: int = 50,
+                 default_budget: float = 30.0):
         self.tts_instance = tts_instance
         self.is_initialized = False
         self.is_speaking = False
         
-        # Thread pool for handling TTS tasks
+        # Thread pool for handling TTS tasks; up to max_workers syntheses run at once
         self.max_workers = max_workers
         self.executor = None
+        self._slots = None
         
-        # Task management
+        # Task management: deadline-ordered, fair across sessions, drops expired tasks
+        self.default_budget = default_budget
         self.task_counter = ThreadSafeCounter()
-        self.task_queue = queue.PriorityQueue(maxsize=max_queue_size)
+        self.task_queue = TTSScheduler(maxsize=max_queue_size, on_expired=self._expire_task)
         self.active_tasks = {}
-        self.completed_tasks = {}
+        # Futures of syntheses in progress, so a cancelled caller can abort them
+        self._futures: Dict[str, concurrent.futures.Future] = {}
+        # Bounded by count, memory and age; waiters are woken when a task finishes
+        self.completed_tasks = CompletionStore.from_env()
         
         # Thread synchronization
         self.lock = threading.RLock()
-        self.condition = threading.Condition(self.lock)
         self.stop_event = threading.Event()
         
         # Worker threads
@@ -93,12 +127,14 @@ class TTSAdapter(AudioProcessor):
 
         logger.info("Starting TTSAdapter...")
         self.stop_event.clear()
+        self.task_queue.reopen()
         
-        # Initialize the thread pool executor
+        # Initialize the thread pool executor and one dispatch slot per worker
         self.executor = concurrent.futures.ThreadPoolExecutor(
             max_workers=self.max_workers,
             thread_name_prefix="TTSAdapterWorker"
         )
+        self._slots = threading.BoundedSemaphore(self.max_workers)
         
         # Start the queue processor thread
         self.queue_processor_thread = threading.Thread(target=self._queue_processor, daemon=True)
@@ -117,15 +153,16 @@ class TTSAdapter(AudioProcessor):
         self.stop_event.set()
         
         # Signal the queue processor to stop
-        self.task_queue.put((0, None))
+        self.task_queue.close()
         
         # Wait for the queue processor thread to finish
         if self.queue_processor_thread and self.queue_processor_thread.is_alive():
             self.queue_processor_thread.join(timeout=5.0)
 
-        # Shutdown the thread pool
+        # Shutdown the thread pool, letting in-flight syntheses finish
         if self.executor:
-            self.executor.shutdown(wait=True, timeout=10.0)
+            if not shutdown_executor(self.executor, timeout=10.0):
+                logger.warning("TTS syntheses still running after 10s; not waiting for them")
             self.executor = None
 
         self.is_initialized = False
@@ -137,97 +174,169 @@ class TTSAdapter(AudioProcessor):
             self.completion_callbacks.append(callback)    
 
     def _queue_processor(self):
-        """Process tasks from the queue in a separate thread"""
+        """
+        Dispatch queued tasks to the worker pool. A task is taken from the scheduler
+        only once a worker slot is free, so the scheduler (not the pool's FIFO queue)
+        decides the order; completion is handled by a callback on the worker's future.
+        """
         logger.info("TTS Queue processor started")
         
         while not self.stop_event.is_set():
             try:
+                if not self._slots.acquire(timeout=1.0):
+                    continue
                 try:
-                    priority, task = self.task_queue.get(timeout=1.0)
+                    task = self.task_queue.get(timeout=1.0)
                 except queue.Empty:
+                    self._slots.release()
                     continue
                 
                 if task is None:  # Shutdown signal
+                    self._slots.release()
                     break
                 
+                observe_stage("tts_queue_wait", time.time() - task.timestamp)
                 with self.lock:
                     task.status = TaskStatus.PROCESSING
                     self.active_tasks[task.task_id] = task
                 
-                logger.info(f"Processing TTS task {task.task_id} for language '{task.language}': {task.text[:30]}...")
-                
+                logger.debug("Processing TTS task %s for language '%s': %.30s", task.task_id, task.language, task.text)
                 try:
-                    # Dynamically set speaker based on language
-                    speaker_name = "Jenny" if task.language.lower() == "english" else "Aria" # Assuming 'Aria' for Hindi
-                    # self.tts_instance.set_speaker(speaker_name) # This line might need adjustment based on your RealTimeTTS implementation
-                    logger.info(f"TTS speaker set to '{speaker_name}' for task {task.task_id}")
-
-                    # Submit the actual TTS processing to the thread pool
-                    future = self.executor.submit(self._process_tts_task, task)
-                    audio_path = future.result(timeout=30.0) # Wait for the result
-                    
-                    with self.lock:
-                        task.status = TaskStatus.COMPLETED
-                        task.result = audio_path
-                        self.completed_tasks[task.task_id] = task
-                        if task.task_id in self.active_tasks:
-                            del self.active_tasks[task.task_id]
-                    
-                    for callback in self.completion_callbacks:
-                        try:
-                            callback(task.task_id, audio_path)
-                        except Exception as e:
-                            logger.error(f"Error in completion callback: {e}")
-                    
-                    logger.info(f"TTS task {task.task_id} completed successfully")
-                    
+                    future = self._dispatch(task)
                 except Exception as e:
-                    with self.lock:
-                        task.status = TaskStatus.FAILED
-                        task.error = str(e)
-                        self.completed_tasks[task.task_id] = task
-                        if task.task_id in self.active_tasks:
-                            del self.active_tasks[task.task_id]
-                    
-                    logger.error(f"TTS task {task.task_id} failed: {e}")
-                
-                finally:
-                    self.task_queue.task_done()
-                    with self.condition:
-                        self.condition.notify_all()
+                    self._finish_dispatch(task, error=e)
+                    continue
+                with self.lock:
+                    self._futures[task.task_id] = future
+                future.add_done_callback(partial(self._on_task_done, task))
             except Exception as e:
-                logger.error(f"Error in queue processor: {e}")
+                logger.error("Error in queue processor: %s", e)
         
         logger.info("TTS Queue processor stopped")
 
+    def _dispatch(self, task: AudioTask) -> concurrent.futures.Future:
+        """
+        Start a task's synthesis. Engines with a persistent event loop take it directly,
+        so no worker thread sits blocked on it; other engines run on the thread pool.
+        """
+        if hasattr(self.tts_instance, 'submit_synthesis'):
+            # Never hold a slot past the point where the audio is useless
+            return self.tts_instance.submit_synthesis(
+                task.text, timeout=max(1.0, task.deadline - time.time()))
+        return self.executor.submit(self._process_tts_task, task)
+
+    def _on_task_done(self, task: AudioTask, future: concurrent.futures.Future) -> None:
+        """Worker future callback: record the outcome and free the worker slot."""
+        try:
+            audio_path = future.result()
+        except BaseException as e:
+            self._finish_dispatch(task, error=e)
+        else:
+            self._finish_dispatch(task, audio_path=audio_path)
+
+    def _finish_dispatch(self, task: AudioTask, audio_path: Optional[str] = None,
+                         error: Optional[BaseException] = None) -> None:
+        try:
+            with self.lock:
+                self._futures.pop(task.task_id, None)
+            if error is not None:
+                self._fail_task(task, error)
+            else:
+                self._complete_task(task, audio_path)
+        finally:
+            self._slots.release()
+
+    def _complete_task(self, task: AudioTask, audio_path: Optional[str]) -> None:
+        """Record a finished task and notify completion callbacks."""
+        with self.lock:
+            task.status = TaskStatus.COMPLETED
+            task.result = audio_path
+            if task.task_id in self.active_tasks:
+                del self.active_tasks[task.task_id]
+        self.completed_tasks.complete(task.task_id, audio_path)
+        
+        for callback in self.completion_callbacks:
+            try:
+                callback(task.task_id, audio_path)
+            except Exception as e:
+                logger.error("Error in completion callback: %s", e)
+        
+        logger.debug("TTS task %s completed successfully", task.task_id)
+
+    def _fail_task(self, task: AudioTask, error: Exception) -> None:
+        """Record a failed task."""
+        with self.lock:
+            task.status = TaskStatus.FAILED
+            task.error = str(error)
+            if task.task_id in self.active_tasks:
+                del self.active_tasks[task.task_id]
+        self.completed_tasks.fail(task.task_id, task.error)
+        
+        if isinstance(error, (OperationCancelled, concurrent.futures.CancelledError)):
+            logger.info("TTS task %s cancelled", task.task_id)
+        else:
+            logger.error("TTS task %s failed: %s", task.task_id, error)
+
+    def _expire_task(self, task: AudioTask) -> None:
+        """Drop a task whose deadline passed while it was queued, without synthesizing it."""
+        observe_stage("tts_queue_wait", time.time() - task.timestamp)
+        self._fail_task(task, TimeoutError(
+            f"Deadline passed {time.time() - task.deadline:.2f}s before synthesis started"))
+
     def _process_tts_task(self, task: AudioTask) -> Optional[str]:
         """Process individual TTS task."""
         try:
-            logger.info(f"Submitting to TTS instance task {task.task_id}: {task.text[:50]}...")
+            logger.debug("Submitting to TTS instance task %s: %.50s", task.task_id, task.text)
             
-            # This assumes your RealTimeTTS has a method to convert text and get the result.
-            # You might need to adjust this based on your actual TTS class implementation.
-            if hasattr(self.tts_instance, 'convert_text_and_get_path'):
-                audio_path = self.tts_instance.convert_text_and_get_path(task.text, timeout=20.0)
+            # Synthesize on this worker thread; handing off to the engine's own pool
+            # would cap concurrency at that pool's size
+            if hasattr(self.tts_instance, 'synthesize_to_file'):
+                # Never occupy a worker past the point where the audio is useless
+                audio_path = self.tts_instance.synthesize_to_file(
+                    task.text, timeout=max(1.0, task.deadline - time.time()))
                 if audio_path:
-                    logger.info(f"TTS task {task.task_id} completed successfully: {audio_path}")
+                    logger.debug("TTS task %s completed successfully: %s", task.task_id, audio_path)
                     return audio_path
                 else:
-                    logger.warning(f"TTS task {task.task_id} timed out or failed to generate audio.")
+                    logger.warning("TTS task %s timed out or failed to generate audio.", task.task_id)
                     return None
             else:
-                # Fallback if the direct conversion method doesn't exist
+                # Fallback if the direct conversion method doesn't exist: the engine's own
+                # task tracking, whose waiter is woken by the completion itself
                 logger.warning("Using fallback TTS method.")
-                self.tts_instance.add_text(task.text)
-                time.sleep(5) # This is a naive wait, a more robust mechanism is preferred
-                return self.tts_instance.get_last_audio_file_path()
+                tts_task_id = self.tts_instance.convert_text_synchronized(task.text)
+                return self.tts_instance.get_audio_file_for_task(
+                    tts_task_id, timeout=max(1.0, task.deadline - time.time()))
 
         except Exception as e:
-            logger.error(f"Error processing TTS task {task.task_id}: {e}")
+            logger.error("Error processing TTS task %s: %s", task.task_id, e)
             raise
     
-    def speak_text_async(self, text: str, language: str = "English", priority: int = 0) -> str:
-        """Add text to TTS queue asynchronously and return task ID"""
+    def speak_text_async(self, text: str, language: str = "English", priority: int = 0,
+                         session_id: Optional[str] = None, deadline: Optional[float] = None,
+                         cancel_token: Optional[CancellationToken] = None) -> str:
+        """
+        Add text to TTS queue asynchronously and return task ID. The deadline defaults
+        to now plus default_budget; session_id groups tasks for fair sharing. Cancelling
+        cancel_token removes the task from the queue, or aborts it if it has started.
+        """
+        task_id = self.try_enqueue(text, language, priority, session_id, deadline, cancel_token)
+        if task_id is None:
+            logger.warning("TTS queue is full, rejecting task for session %s", session_id)
+            get_admission_controller().reject("tts", "queue_full")
+        return task_id
+
+    def try_enqueue(self, text: str, language: str = "English", priority: int = 0,
+                    session_id: Optional[str] = None, deadline: Optional[float] = None,
+                    cancel_token: Optional[CancellationToken] = None) -> Optional[str]:
+        """
+        speak_text_async for callers that apply their own backpressure: returns None
+        instead of rejecting when the queue is full, so their retries (see
+        wait_for_queue_space) are not counted as admission rejections.
+        """
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+
         if not self.is_initialized:
             # You might want to automatically start it or raise an error
             logger.warning("TTSAdapter is not started. Starting automatically.")
@@ -238,41 +347,102 @@ class TTSAdapter(AudioProcessor):
             task_id=task_id,
             text=text,
             language=language,
-            priority=priority
+            priority=priority,
+            session_id=session_id,
+            deadline=deadline if deadline is not None else time.time() + self.default_budget
         )
         
         try:
-            self.task_queue.put((-priority, task), timeout=1.0)
-            logger.info(f"TTS task {task_id} queued with priority {priority} for language {language}")
-            return task_id
+            # Never wait for room: a full queue means the caller should back off and retry
+            self.task_queue.put_nowait(task)
+            logger.debug("TTS task %s queued with priority %s for language %s", task_id, priority, language)
         except queue.Full:
-            logger.error("TTS queue is full, cannot add new task")
-            raise Exception("TTS queue is full")
+            return None
+        
+        if cancel_token is not None:
+            cancel_token.add_callback(partial(self.cancel_task, task_id))
+        return task_id
+
+    async def wait_for_queue_space(self, timeout: float) -> bool:
+        """Await until a task leaves the full queue; False if none did within timeout."""
+        return await self.task_queue.wait_for_space(timeout)
+
+    def cancel_task(self, task_id: str) -> bool:
+        """
+        Drop a queued task, or abort its synthesis if it has already started, freeing the
+        worker for live callers. Its waiters fail at once. Returns False if it was done.
+        """
+        task = self.task_queue.remove(task_id)
+        if task is not None:
+            self._fail_task(task, OperationCancelled(f"TTS task {task_id} cancelled"))
+            return True
+        
+        with self.lock:
+            future = self._futures.get(task_id)
+        # Engine-loop syntheses stop at once; the completion callback frees the slot
+        return future.cancel() if future is not None else False
 
     def wait_for_task(self, task_id: str, timeout: float) -> Optional[str]:
         """Waits for a task to complete and returns the result."""
-        end_time = time.time() + timeout
-        
-        with self.condition:
-            while time.time() < end_time:
-                if task_id in self.completed_tasks:
-                    task = self.completed_tasks[task_id]
-                    if task.status == TaskStatus.COMPLETED:
-                        return task.result
-                    elif task.status == TaskStatus.FAILED:
-                        raise Exception(f"TTS task {task_id} failed: {task.error}")
-                
-                remaining_time = end_time - time.time()
-                if remaining_time <= 0:
-                    break
-                self.condition.wait(timeout=remaining_time)
+        completion = self.completed_tasks.wait(task_id, timeout)
+        return self._task_result(task_id, completion)
 
-        raise TimeoutError(f"Task {task_id} did not complete within the timeout period.")
+    async def await_task(self, task_id: str, timeout: float) -> Optional[str]:
+        """Awaitable wait_for_task: suspends the caller's event loop task instead of a thread."""
+        completion = await self.completed_tasks.wait_async(task_id, timeout)
+        return self._task_result(task_id, completion)
 
-    def speak_text(self, text: str, language: str = "English", priority: int = 0, timeout: float = 30.0) -> Optional[str]:
-        """Speak text synchronously - blocks until audio is generated"""
-        task_id = self.speak_text_async(text, language, priority)
-        return self.wait_for_task(task_id, timeout)
+    def get_completion(self, task_id: str):
+        """Return a finished task's completion record without waiting, or None if it is still running."""
+        return self.completed_tasks.get(task_id)
+
+    @staticmethod
+    def _task_result(task_id: str, completion) -> Optional[str]:
+        if completion is None:
+            raise TimeoutError(f"Task {task_id} did not complete within the timeout period.")
+        if completion.failed:
+            raise Exception(f"TTS task {task_id} failed: {completion.error}")
+        return completion.value
+
+    def speak_text(self, text: str, language: str = "English", priority: int = 0, timeout: float = 30.0,
+                   session_id: Optional[str] = None, deadline: Optional[float] = None,
+                   cancel_token: Optional[CancellationToken] = None) -> Optional[str]:
+        """Speak text synchronously - blocks until audio is generated or the deadline passes"""
+        if deadline is None:
+            deadline = time.time() + timeout
+        task_id = self.speak_text_async(text, language, priority, session_id=session_id, deadline=deadline,
+                                        cancel_token=cancel_token)
+        return self.wait_for_task(task_id, max(0.0, deadline - time.time()))
+    
+    async def aspeak_text(self, text: str, language: str = "English", priority: int = 0, timeout: float = 30.0) -> Optional[str]:
+        """Speak text without blocking the event loop - edge-tts is awaited directly instead of going through the worker queue"""
+        task_id = f"tts_{self.task_counter.increment()}"
+        task = AudioTask(
+            task_id=task_id,
+            text=text,
+            language=language,
+            priority=priority,
+            status=TaskStatus.PROCESSING
+        )
+        with self.lock:
+            self.active_tasks[task_id] = task
+        
+        logger.debug("Processing TTS task %s for language '%s' on the event loop: %.30s", task_id, language, text)
+        try:
+            audio_path = await asyncio.wait_for(
+                self.tts_instance.aconvert_text_and_get_path(text),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            error = TimeoutError(f"Task {task_id} did not complete within the timeout period.")
+            self._fail_task(task, error)
+            raise error
+        except Exception as e:
+            self._fail_task(task, e)
+            raise
+        
+        self._complete_task(task, audio_path)
+        return audio_path
     
     def process(self, data: Dict[str, Any]) -> Optional[str]:
         """Process text using TTS (synchronous), expecting a dict with 'text' and 'language'"""
@@ -296,13 +466,19 @@ class TTSAdapter(AudioProcessor):
         with self.lock:
             return len(self.active_tasks)
 class VoiceAssistant:
-    def __init__(self, language_processor, max_concurrent_requests: int = 5):
+    def __init__(self, language_processor, max_concurrent_requests: int = 5, tts_instance=None,
+                 request_budget: float = 30.0):
         self.language_processor = language_processor
-        self.conversation_context = {}
+        # Assistant-wide context (set_language_context); replaced, never mutated, so reads need no lock
+        self.language_context = {}
+        # Turns and context of each session, kept apart and locked per session
+        self.conversations = get_conversation_store()
         self.max_concurrent_requests = max_concurrent_requests
+        # End-to-end time budget of a request; its TTS tasks are dropped once it is spent
+        self.request_budget = request_budget
         
         # Thread pool for handling requests
-        self.executor = concurrent.futures.ThreadPoolExecutor(
+        self.executor = MeteredThreadPoolExecutor(
             max_workers=max_concurrent_requests,
             thread_name_prefix="VoiceAssistant"
         )
@@ -315,47 +491,63 @@ class VoiceAssistant:
         # Shutdown event
         self.shutdown_event = threading.Event()
         
-        # Initialize TTS adapter
-        from app.core.modules.adapters.tts import RealTimeTTS
-        # Default to English speaker, will be changed dynamically
-        self.tts_instance = RealTimeTTS(language="English", speaker="Jenny")
-        self.tts_adapter = TTSAdapter(self.tts_instance, max_workers=3)
+        # Initialize TTS adapter; the caller may have built the TTS engine in parallel already
+        if tts_instance is None:
+            from app.core.modules.adapters.tts import RealTimeTTS
+            # Default to English speaker, will be changed dynamically
+            tts_instance = RealTimeTTS(language="English", speaker="Jenny")
+        self.tts_instance = tts_instance
+        self.tts_adapter = TTSAdapter(
+            self.tts_instance, max_workers=int(os.getenv("TTS_MAX_CONCURRENCY", "3")))
         
         # Add completion callback for TTS
         self.tts_adapter.add_completion_callback(self._on_tts_completion)
         
-        logger.info(f"VoiceAssistant initialized with {max_concurrent_requests} concurrent request limit")
+        # Responses are synthesized sentence by sentence on the worker pool, in order
+        self.segmenter = SegmentedSynthesizer(self.tts_adapter)
+        
+        # Shared admission control: per-stage concurrency limits and TTS backlog
+        self.admission = get_admission_controller()
+        self.admission.set_queue_depth_provider(self.tts_adapter.get_queue_size)
+        
+        # Identical questions asked at the same moment share one LLM/SERP/TTS pass
+        self.coalescer = RequestCoalescer(
+            "transcription", enabled=os.getenv("REQUEST_COALESCING", "1") != "0")
+        
+        logger.info("VoiceAssistant initialized with %d concurrent request limit", max_concurrent_requests)
+    
+    def warm_up(self) -> None:
+        """Start the TTS worker pool and queue processor now rather than on the first request"""
+        self.tts_adapter.start()
+        self.tts_instance.ensure_tts_ready()
     
     def _on_tts_completion(self, task_id: str, audio_path: str):
         """Callback when TTS task completes"""
-        logger.info(f"TTS task {task_id} completed with audio: {audio_path}")
+        logger.debug("TTS task %s completed with audio: %s", task_id, audio_path)
         # Additional processing can be added here        
-    def _process_transcription_task(self, request_id: str, transcription: str, include_audio: bool) -> dict:
+    def _process_transcription_task(self, request_id: str, transcription: str, include_audio: bool,
+                                    cancel_token: Optional[CancellationToken] = None,
+                                    session_id: Optional[str] = None) -> dict:
         """Process transcription in a separate thread"""
         try:
-            logger.info(f"Request {request_id}: Processing transcription: {transcription[:50]}...")
+            logger.debug("Request %s: Processing transcription: %.50s", request_id, transcription)
             
             start_time = time.time()
             
             # Process query with language processor
             # It now returns a dict with 'text' and 'language'
-            response_data = self.language_processor.process_query(
-                user_input=transcription,
-                context=self.conversation_context.copy()
-            )
+            with self.admission.stage("llm"):
+                response_data = self.language_processor.process_query(
+                    user_input=transcription,
+                    context=self._conversation_context(session_id),
+                    cancel_token=cancel_token,
+                    session_id=session_id
+                )
             response_text = response_data.get("text", "I'm sorry, I didn't get that.")
             response_lang = response_data.get("language", "English")
             
             processing_time = time.time() - start_time
-            logger.info(f"Request {request_id}: Language processing completed in {processing_time:.2f}s")
-            
-            # Update conversation context
-            with self.request_lock:
-                self.conversation_context.update({
-                    'last_query': transcription,
-                    'last_response': response_text,
-                    'last_processed_time': time.time()
-                })
+            logger.debug("Request %s: Language processing completed in %.2fs", request_id, processing_time)
             
             result = {"text": response_text}
             
@@ -365,29 +557,43 @@ class VoiceAssistant:
                     audio_start_time = time.time()
                     # Pass the detected language to the TTS adapter
                     response_text = self.get_text_from_html(response_text)
-                    audio_file_path = self.tts_adapter.speak_text(
+                    audio_file_path = self.segmenter.synthesize(
                         response_text, 
                         language=response_lang, 
                         priority=1, 
-                        timeout=20.0
+                        session_id=session_id,
+                        deadline=start_time + self.request_budget,
+                        cancel_token=cancel_token
                     )
                     audio_time = time.time() - audio_start_time
                     
                     result["audio_file"] = audio_file_path or ""
-                    logger.info(f"Request {request_id}: Audio generation for '{response_lang}' completed in {audio_time:.2f}s")
+                    logger.debug("Request %s: Audio generation for '%s' completed in %.2fs", request_id, response_lang, audio_time)
                     
+                except OperationCancelled:
+                    raise
+                except IncompleteSpeech as e:
+                    # Play what was synthesized, but say that sentences are missing
+                    result["audio_file"] = e.audio_file or ""
+                    result["audio_incomplete"] = True
+                    result["tts_error"] = str(e)
                 except Exception as tts_error:
-                    logger.error(f"Request {request_id}: TTS Error: {tts_error}")
+                    logger.error("Request %s: TTS Error: %s", request_id, tts_error)
                     result["audio_file"] = ""
                     result["tts_error"] = str(tts_error)
             
             total_time = time.time() - start_time
-            logger.info(f"Request {request_id}: Total processing time: {total_time:.2f}s")
+            logger.info("Request %s: Total processing time: %.2fs", request_id, total_time)
             
             return result
             
+        except OperationCancelled:
+            logger.info("Request %s cancelled after %.2fs", request_id, time.time() - start_time)
+            raise
+        except AdmissionRejected:
+            raise
         except Exception as e:
-            logger.error(f"Request {request_id}: Error in transcription processing: {str(e)}")
+            logger.error("Request %s: Error in transcription processing: %s", request_id, e)
             error_response = "I apologize, but I encountered an error processing your request."
             
             result = {"text": error_response, "error": str(e)}
@@ -398,7 +604,7 @@ class VoiceAssistant:
                     audio_file_path = self.tts_adapter.speak_text(error_response, language="English", priority=2)
                     result["audio_file"] = audio_file_path or ""
                 except Exception as tts_error:
-                    logger.error(f"Request {request_id}: TTS Error in error handling: {tts_error}")
+                    logger.error("Request %s: TTS Error in error handling: %s", request_id, tts_error)
                     result["audio_file"] = ""
             
             return result
@@ -409,7 +615,272 @@ class VoiceAssistant:
                 if request_id in self.active_requests:
                     del self.active_requests[request_id]
         
+    async def _aprocess_transcription_task(self, request_id: str, transcription: str, include_audio: bool,
+                                           session_id: Optional[str] = None) -> dict:
+        """
+        Process transcription on the event loop - LLM, web lookup and TTS are all awaited,
+        and speech synthesis starts with the first generated sentence
+        """
+        try:
+            logger.debug("Request %s: Processing transcription: %.50s", request_id, transcription)
+            
+            start_time = time.time()
+            
+            final_event: Dict[str, Any] = {}
+            async for event in self._astream_transcription(transcription, include_audio, request_id, session_id):
+                if event["type"] == "final":
+                    final_event = event
+            
+            result = {"text": final_event.get("text", "I'm sorry, I didn't get that.")}
+            if "error" in final_event:
+                result["error"] = final_event["error"]
+            
+            if include_audio:
+                # Over the TTS limit the text answer is still returned, without audio
+                result["audio_file"] = final_event.get("audio_file", "")
+                if "tts_error" in final_event:
+                    result["tts_error"] = final_event["tts_error"]
+                if final_event.get("audio_incomplete"):
+                    result["audio_incomplete"] = True
+            
+            total_time = time.time() - start_time
+            logger.info("Request %s: Total processing time: %.2fs", request_id, total_time)
+            
+            return result
+            
+        except (AdmissionRejected, OperationCancelled):
+            raise
+        except Exception as e:
+            logger.error("Request %s: Error in transcription processing: %s", request_id, e)
+            error_response = "I apologize, but I encountered an error processing your request."
+            
+            result = {"text": error_response, "error": str(e)}
+            
+            if include_audio:
+                try:
+                    audio_file_path = await self.tts_adapter.aspeak_text(error_response, language="English", priority=2)
+                    result["audio_file"] = audio_file_path or ""
+                except Exception as tts_error:
+                    logger.error("Request %s: TTS Error in error handling: %s", request_id, tts_error)
+                    result["audio_file"] = ""
+            
+            return result
+        
+        finally:
+            with self.request_lock:
+                if request_id in self.active_requests:
+                    del self.active_requests[request_id]
+    
+    def _coalescing_key(self, transcription: str, session_id: Optional[str], *variant: Any) -> tuple:
+        """
+        Requests with the same key get the same answer: the same question from sessions
+        whose conversations so far are identical (in particular, new sessions)
+        """
+        normalized = normalize_transcript(transcription)
+        language = self.language_processor.detect_language(transcription)
+        return (normalized, language, self.language_processor.response_language,
+                self.conversations.fingerprint(session_id)) + variant
+    
+    def _conversation_context(self, session_id: Optional[str]) -> Dict[str, Any]:
+        """Context handed to the LLM: assistant-wide settings overlaid with the session's own"""
+        return {**self.language_context, **self.conversations.context(session_id)}
+    
+    def _record_shared_turn(self, session_id: Optional[str], transcription: str, final: Dict[str, Any]) -> None:
+        """
+        A coalesced computation records its turn only in the session that started it;
+        a caller that joined it instead adds the turn to its own session here
+        """
+        if "error" not in final and final.get("text"):
+            self.conversations.append_turn(session_id, transcription, final["text"])
+    
+    async def astream_transcription_with_audio(self, transcription: str, synthesize: bool = True,
+                                               cancel_token: Optional[CancellationToken] = None,
+                                               session_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a response for a transcription. Yields the LLM's text deltas as they arrive,
+        then one final event with the full text, TTS language and generated audio file.
+        With synthesize=True each sentence is sent to TTS as soon as the LLM has written
+        it, a `segment` event (index, text, audio_file) is yielded for every synthesized
+        segment in order, and a `text` event marks the end of generation before the
+        remaining audio is awaited. With synthesize=False the final event carries no
+        audio so the caller can stream it separately through astream_speech. Concurrent
+        identical transcriptions are coalesced: every caller replays the events of a
+        single computation. The answer sees, and is recorded in, session_id's conversation.
+        Cancelling cancel_token detaches this caller with OperationCancelled; the
+        computation itself stops once no caller is left.
+        """
+        if self.shutdown_event.is_set():
+            raise Exception("VoiceAssistant is shutting down")
+        
+        key = self._coalescing_key(transcription, session_id, "stream", synthesize)
+        led = False
+        
+        def start():
+            # Only called for the caller whose request starts the computation
+            nonlocal led
+            led = True
+            return self._astream_transcription(transcription, synthesize, session_id=session_id)
+        
+        events = self.coalescer.stream(key, start)
+        if cancel_token is not None:
+            events = cancel_token.iterate(events)
+        async for event in events:
+            if event["type"] == "final" and not led:
+                self._record_shared_turn(session_id, transcription, event)
+            yield event
+    
+    async def _astream_transcription(self, transcription: str, synthesize: bool,
+                                     request_id: Optional[str] = None,
+                                     session_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        request_id = request_id or f"req_{self.request_counter.increment()}"
+        logger.debug("Request %s: Streaming transcription: %.50s", request_id, transcription)
+        start_time = time.time()
+        
+        context = self._conversation_context(session_id)
+        
+        speech = None
+        speech_error = None
+        final_event: Dict[str, Any] = {}
+        # Cancelled when every caller has gone away, which also drops this answer's queued TTS
+        cancel_token = CancellationToken()
+        # The TTS stage is held from the first delta until the last segment is ready
+        with cancel_on_exit(cancel_token, f"request {request_id} abandoned"), ExitStack() as tts_stage:
+            with self.admission.stage("llm"):
+                async for event in self.language_processor.process_query_stream(
+                    user_input=transcription,
+                    context=context,
+                    cancel_token=cancel_token,
+                    session_id=session_id
+                ):
+                    if event["type"] != "delta":
+                        final_event = event
+                        continue
+                    yield event
+                    
+                    if not synthesize or speech_error is not None:
+                        continue
+                    try:
+                        if speech is None:
+                            tts_stage.enter_context(self.admission.stage("tts"))
+                            speech = self.segmenter.open_stream(
+                                session_id=session_id, deadline=start_time + self.request_budget,
+                                cancel_token=cancel_token)
+                        # Sentences go to TTS while the LLM is still generating
+                        speech.feed(event["text"])
+                    except Exception as e:
+                        # Over the TTS limit the text answer is still returned, without audio
+                        logger.error("Request %s: TTS Error: %s", request_id, e)
+                        speech_error = str(e)
+                        speech = None
+                        continue
+                    for segment in speech.ready():
+                        yield self._segment_event(segment)
+            
+            response_text = final_event.get("text", "I'm sorry, I didn't get that.")
+            response_lang = final_event.get("language", "English")
+            logger.debug("Request %s: Language streaming completed in %.2fs", request_id, time.time() - start_time)
+            
+            result = {"type": "final", "text": response_text, "language": response_lang}
+            if "error" in final_event:
+                result["error"] = final_event["error"]
+            
+            if not synthesize:
+                yield result
+                return
+            
+            # Generation is over; the rest of the audio follows as segment events
+            yield dict(result, type="text")
+            
+            try:
+                if speech_error is not None:
+                    raise RuntimeError(speech_error)
+                if speech is None or "error" in final_event:
+                    # Nothing was streamed (or only the start of a failed answer): speak the final text
+                    tts_stage.close()
+                    audio_file_path = await self.asynthesize_response(
+                        response_text, response_lang, session_id=session_id,
+                        deadline=start_time + self.request_budget, cancel_token=cancel_token)
+                else:
+                    speech.finish()
+                    async for segment in speech.remaining():
+                        yield self._segment_event(segment)
+                    audio_file_path = await asyncio.to_thread(speech.concatenate)
+                result["audio_file"] = audio_file_path or ""
+            except OperationCancelled:
+                raise
+            except IncompleteSpeech as e:
+                # Play what was synthesized, but say that sentences are missing
+                result["audio_file"] = e.audio_file or ""
+                result["audio_incomplete"] = True
+                result["tts_error"] = str(e)
+            except Exception as tts_error:
+                if speech_error is None:
+                    logger.error("Request %s: TTS Error: %s", request_id, tts_error)
+                result["audio_file"] = ""
+                result["tts_error"] = str(tts_error)
+        
+        logger.info("Request %s: Total streaming time: %.2fs", request_id, time.time() - start_time)
+        yield result
+    
+    @staticmethod
+    def _segment_event(segment: SpeechSegment) -> Dict[str, Any]:
+        event = {"type": "segment", "index": segment.index, "text": segment.text,
+                 "audio_file": segment.audio_file or ""}
+        if segment.error:
+            event["error"] = segment.error
+        return event
+    
+    async def asynthesize_response(self, response_text: str, language: str = "English",
+                                   session_id: Optional[str] = None,
+                                   on_segment: Optional[Callable[[SpeechSegment], None]] = None,
+                                   cancel_token: Optional[CancellationToken] = None,
+                                   deadline: Optional[float] = None) -> Optional[str]:
+        """
+        Synthesize a (possibly HTML) response to one audio file while holding a TTS stage
+        slot. Its sentences are synthesized concurrently; on_segment is called with each
+        segment in order as soon as it is ready, so the first one can be played early.
+        The deadline is the caller's request deadline, by default request_budget from now.
+        """
+        if deadline is None:
+            deadline = time.time() + self.request_budget
+        with self.admission.stage("tts"):
+            return await self.segmenter.asynthesize(
+                self.get_text_from_html(response_text),
+                language=language,
+                priority=1,
+                session_id=session_id,
+                deadline=deadline,
+                on_segment=on_segment,
+                cancel_token=cancel_token
+            )
+    
+    async def astream_speech(self, response_text: str, audio_file_path: str,
+                             cancel_token: Optional[CancellationToken] = None) -> AsyncIterator[bytes]:
+        """
+        Stream synthesized audio for a (possibly HTML) response, teeing it to audio_file_path.
+        Cancelling cancel_token stops the synthesis and raises OperationCancelled.
+        """
+        speech_text = self.get_text_from_html(response_text)
+        start_time = time.time()
+        first_chunk = True
+        
+        with self.admission.stage("tts"):
+            chunks = self.tts_instance.astream_speech(speech_text, audio_file_path)
+            if cancel_token is not None:
+                chunks = cancel_token.iterate(chunks)
+            async for chunk in chunks:
+                if first_chunk:
+                    logger.debug("First audio chunk for %s after %.2fs", audio_file_path, time.time() - start_time)
+                    first_chunk = False
+                yield chunk
+        
+        logger.info("Streamed audio %s completed in %.2fs", audio_file_path, time.time() - start_time)
+    
     def get_text_from_html(self, html):
+        with time_stage("html_strip"):
+            return self._strip_html(html)
+    
+    def _strip_html(self, html):
         texts = []
 
         def handle_data(data):
@@ -424,69 +895,138 @@ class VoiceAssistant:
 
 # ... (the rest of the VoiceAssistant class remains the same)
     
-    def handle_transcription_with_audio_async(self, transcription: str) -> str:
+    def handle_transcription_with_audio_async(self, transcription: str, session_id: Optional[str] = None) -> str:
         """Handle transcription with audio generation asynchronously"""
-        return self._handle_transcription_async(transcription, include_audio=True)
+        return self._handle_transcription_async(transcription, include_audio=True, session_id=session_id)
     
-    def handle_transcription_only_async(self, transcription: str) -> str:
+    def handle_transcription_only_async(self, transcription: str, session_id: Optional[str] = None) -> str:
         """Handle transcription without audio generation asynchronously"""
-        return self._handle_transcription_async(transcription, include_audio=False)
+        return self._handle_transcription_async(transcription, include_audio=False, session_id=session_id)
     
-    def _handle_transcription_async(self, transcription: str, include_audio: bool) -> str:
+    def _handle_transcription_async(self, transcription: str, include_audio: bool,
+                                    session_id: Optional[str] = None) -> str:
         """Handle transcription asynchronously and return request ID"""
         if self.shutdown_event.is_set():
             raise Exception("VoiceAssistant is shutting down")
         
+        # Reject up front instead of letting the pool's backlog grow without bound
+        ticket = self.admission.admit()
         request_id = f"req_{self.request_counter.increment()}"
+        cancel_token = CancellationToken()
         
         # Submit task to thread pool
         future = self.executor.submit(
             self._process_transcription_task,
             request_id,
             transcription,
-            include_audio
+            include_audio,
+            cancel_token,
+            session_id
         )
+        future.add_done_callback(lambda _: ticket.release())
         
         # Track active request
         with self.request_lock:
             self.active_requests[request_id] = {
                 'future': future,
+                'cancel_token': cancel_token,
                 'transcription': transcription,
                 'include_audio': include_audio,
                 'start_time': time.time()
             }
         
-        logger.info(f"Request {request_id} submitted for processing")
+        logger.debug("Request %s submitted for processing", request_id)
         return request_id
     
     def get_request_result(self, request_id: str, timeout: float = 30.0) -> Optional[dict]:
         """Get the result of an async request"""
         with self.request_lock:
             if request_id not in self.active_requests:
-                logger.warning(f"Request {request_id} not found")
+                logger.warning("Request %s not found", request_id)
                 return None
             
-            future = self.active_requests[request_id]['future']
+            future = self.active_requests[request_id].get('future')
+            if future is None:
+                logger.warning("Request %s runs on the event loop and must be awaited", request_id)
+                return None
         
         try:
             result = future.result(timeout=timeout)
-            logger.info(f"Request {request_id} completed successfully")
+            logger.debug("Request %s completed successfully", request_id)
             return result
         except concurrent.futures.TimeoutError:
-            logger.error(f"Request {request_id} timed out after {timeout}s")
+            logger.error("Request %s timed out after %ss", request_id, timeout)
             return {"text": "Request timed out", "error": "timeout"}
         except Exception as e:
-            logger.error(f"Request {request_id} failed: {str(e)}")
+            logger.error("Request %s failed: %s", request_id, e)
             return {"text": "Request failed", "error": str(e)}
     
-    def handle_transcription_with_audio(self, transcription: str) -> dict:
+    async def ahandle_transcription_with_audio(self, transcription: str,
+                                               cancel_token: Optional[CancellationToken] = None,
+                                               session_id: Optional[str] = None) -> dict:
+        """Handle transcription with audio generation (awaitable, runs on the caller's event loop)"""
+        return await self._ahandle_transcription(
+            transcription, include_audio=True, cancel_token=cancel_token, session_id=session_id)
+    
+    async def ahandle_transcription_only(self, transcription: str,
+                                         cancel_token: Optional[CancellationToken] = None,
+                                         session_id: Optional[str] = None) -> dict:
+        """Handle transcription without audio generation (awaitable, runs on the caller's event loop)"""
+        return await self._ahandle_transcription(
+            transcription, include_audio=False, cancel_token=cancel_token, session_id=session_id)
+    
+    async def _ahandle_transcription(self, transcription: str, include_audio: bool,
+                                     cancel_token: Optional[CancellationToken] = None,
+                                     session_id: Optional[str] = None) -> dict:
+        """
+        Run a request as a task on the current event loop and track it like pooled requests.
+        Cancelling cancel_token (or cancel_request) abandons it with OperationCancelled.
+        """
+        if self.shutdown_event.is_set():
+            raise Exception("VoiceAssistant is shutting down")
+        
+        request_id = f"req_{self.request_counter.increment()}"
+        cancel_token = cancel_token or CancellationToken()
+        # Concurrent duplicates await the first caller's computation and share its audio
+        key = self._coalescing_key(transcription, session_id, "handle", include_audio)
+        led = False
+        
+        def start():
+            # Only called for the caller whose request starts the computation
+            nonlocal led
+            led = True
+            return self._aprocess_transcription_task(request_id, transcription, include_audio, session_id)
+        
+        task = asyncio.ensure_future(self.coalescer.run(key, start))
+        
+        with self.request_lock:
+            self.active_requests[request_id] = {
+                'task': task,
+                'cancel_token': cancel_token,
+                'transcription': transcription,
+                'include_audio': include_audio,
+                'start_time': time.time()
+            }
+        
+        logger.debug("Request %s submitted for processing on the event loop", request_id)
+        try:
+            # Coalesced callers share one result dict; hand each its own copy
+            result = dict(await cancel_token.run(task))
+            if not led:
+                self._record_shared_turn(session_id, transcription, result)
+            return result
+        finally:
+            with self.request_lock:
+                self.active_requests.pop(request_id, None)
+    
+    def handle_transcription_with_audio(self, transcription: str, session_id: Optional[str] = None) -> dict:
         """Handle transcription with audio generation (synchronous)"""
-        request_id = self.handle_transcription_with_audio_async(transcription)
+        request_id = self.handle_transcription_with_audio_async(transcription, session_id)
         return self.get_request_result(request_id) or {"text": "Processing failed", "audio_file": ""}
     
-    def handle_transcription_only(self, transcription: str) -> dict:
+    def handle_transcription_only(self, transcription: str, session_id: Optional[str] = None) -> dict:
         """Handle transcription without audio generation (synchronous)"""
-        request_id = self.handle_transcription_only_async(transcription)
+        request_id = self.handle_transcription_only_async(transcription, session_id)
         return self.get_request_result(request_id) or {"text": "Processing failed"}
     
     def get_active_request_count(self) -> int:
@@ -500,7 +1040,7 @@ class VoiceAssistant:
             if request_id not in self.active_requests:
                 return None
             
-            future = self.active_requests[request_id]['future']
+            future = self._request_handle(request_id)
             
             if future.done():
                 if future.exception():
@@ -510,20 +1050,36 @@ class VoiceAssistant:
             else:
                 return "processing"
     
+    def _request_handle(self, request_id: str):
+        """Return the thread-pool future or asyncio task backing a tracked request"""
+        return self._request_handle_of(self.active_requests[request_id])
+    
+    @staticmethod
+    def _request_handle_of(request: Dict[str, Any]):
+        return request.get('future') or request.get('task')
+    
     def cancel_request(self, request_id: str) -> bool:
-        """Cancel a specific request"""
+        """
+        Cancel a specific request, also while it is running: its token stops the LLM and
+        web lookups at their next step and drops its queued TTS tasks
+        """
         with self.request_lock:
             if request_id not in self.active_requests:
                 return False
             
-            future = self.active_requests[request_id]['future']
-            success = future.cancel()
-            
-            if success:
-                del self.active_requests[request_id]
-                logger.info(f"Request {request_id} cancelled successfully")
+            request = self.active_requests.pop(request_id)
+            future = self._request_handle_of(request)
+            if future.done():
+                return False
             
-            return success            
+            # Event-loop requests are interrupted by the token from any thread
+            request['cancel_token'].cancel(f"request {request_id} cancelled")
+            if request.get('future') is not None:
+                # Not started yet: never runs at all
+                future.cancel()
+        
+        logger.info("Request %s cancelled successfully", request_id)
+        return True
         
     def start_conversation(self) -> None:
         """Start the voice assistant"""
@@ -531,7 +1087,6 @@ class VoiceAssistant:
             self.shutdown_event.clear()
         
         logger.info("Starting Voice Assistant with multi-threading support...")
-        print("痔 Voice Assistant Active (Multi-threaded)")
         
         self.tts_adapter.start()
         
@@ -539,7 +1094,7 @@ class VoiceAssistant:
     
     def stop_conversation(self) -> None:
         """Stop the voice assistant and clean up resources"""
-        logger.info("尅 Stopping Voice Assistant...")
+        logger.info("Stopping Voice Assistant...")
         
         # Signal shutdown
         self.shutdown_event.set()
@@ -553,16 +1108,19 @@ class VoiceAssistant:
         # Stop TTS adapter
         self.tts_adapter.stop()
         
-        # Shutdown executor
-        self.executor.shutdown(wait=True, timeout=10.0)
+        # Shutdown executor; queued requests were cancelled above
+        if not shutdown_executor(self.executor, timeout=10.0, cancel_futures=True):
+            logger.warning("Requests still running after 10s; not waiting for them")
         
         logger.info("Voice Assistant stopped successfully. Goodbye!")
-        print("Voice Assistant stopped. Goodbye!")
     
-    def set_language_context(self, context: Dict[str, Any]) -> None:
-        """Set language context in a thread-safe manner"""
-        with self.request_lock:
-            self.conversation_context.update(context)
+    def set_language_context(self, context: Dict[str, Any], session_id: Optional[str] = None) -> None:
+        """Set language context for one session, or for every session if none is given"""
+        if session_id is not None:
+            self.conversations.update_context(session_id, context)
+        else:
+            with self.request_lock:
+                self.language_context = {**self.language_context, **context}
         logger.info("Language context updated")
     
     def get_statistics(self) -> Dict[str, Any]:
@@ -614,7 +1172,7 @@ class VoiceAssistant:
         }
         
         try:
-            logger.info(f"識 Creating tracked request {request_id} for: '{transcription[:50]}...'")
+            logger.info("Creating tracked request %s for: '%.50s...'", request_id, transcription)
             
             # Process the transcription
             start_time = time.time()
@@ -635,7 +1193,7 @@ class VoiceAssistant:
                 tracking_info["status"] = "completed" if audio_path else "tts_failed"
             else:
                 # Fallback to old method
-                logger.warning(f"Using fallback TTS for request {request_id}")
+                logger.warning("Using fallback TTS for request %s", request_id)
                 audio_path = self.tts_adapter.speak_text(response_text, timeout=20.0)
                 tracking_info["audio_path"] = audio_path
                 tracking_info["status"] = "completed" if audio_path else "tts_failed"
@@ -643,9 +1201,9 @@ class VoiceAssistant:
             end_time = time.time()
             tracking_info["processing_time"] = end_time - start_time
             
-            logger.info(f"識 Request {request_id} completed in {tracking_info['processing_time']:.3f}s")
-            logger.info(f"   TTS Task ID: {tracking_info['tts_task_id']}")
-            logger.info(f"   Audio Path: {tracking_info['audio_path']}")
+            logger.info("Request %s completed in %.3fs", request_id, tracking_info['processing_time'])
+            logger.info("   TTS Task ID: %s", tracking_info['tts_task_id'])
+            logger.info("   Audio Path: %s", tracking_info['audio_path'])
             
             return {
                 "text": response_text,
@@ -657,7 +1215,7 @@ class VoiceAssistant:
         except Exception as e:
             tracking_info["status"] = "error"
             tracking_info["error"] = str(e)
-            logger.error(f"笶Request {request_id} failed: {e}")
+            logger.error("Request %s failed: %s", request_id, e)
             
             return {
                 "text": "Sorry, I encountered an error processing your request.",
@@ -0,0 +1,197 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+COMPLETED = "completed"
+FAILED = "failed"
+
+# Rough per-entry bookkeeping cost (record, dict slot, key) on top of the payload
+_ENTRY_OVERHEAD = 256
+
+
+@dataclass
+class Completion:
+    key: str
+    status: str
+    value: Any = None
+    error: Optional[str] = None
+    completed_at: float = 0.0
+    size: int = 0
+
+    @property
+    def failed(self) -> bool:
+        return self.status == FAILED
+
+
+def _approximate_size(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            _approximate_size(k) + _approximate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_approximate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class CompletionStore:
+    """
+    Bounded store of finished task results with completion notification.
+
+    Results are kept in completion order and evicted oldest-first once there are more
+    than `capacity` entries or more than `max_bytes` of estimated memory, and expire
+    `ttl_seconds` after completion. Threads block in wait() and coroutines in
+    wait_async() until a key completes; both are woken by complete() and fail().
+    """
+
+    def __init__(self, capacity: int = 1000, ttl_seconds: float = 300.0,
+                 max_bytes: int = 8 * 1024 * 1024):
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[str, Completion]" = OrderedDict()
+        self._bytes = 0
+        self._evicted = 0
+        self._expired = 0
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._async_waiters: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+
+    @classmethod
+    def from_env(cls, prefix: str = "TTS_RESULT") -> "CompletionStore":
+        """Build a store sized by <prefix>_CAPACITY, <prefix>_TTL and <prefix>_MAX_BYTES."""
+        return cls(
+            capacity=int(os.getenv(f"{prefix}_CAPACITY", "1000")),
+            ttl_seconds=float(os.getenv(f"{prefix}_TTL", "300")),
+            max_bytes=int(os.getenv(f"{prefix}_MAX_BYTES", str(8 * 1024 * 1024)))
+        )
+
+    def complete(self, key: str, value: Any) -> None:
+        self._store(Completion(key, COMPLETED, value=value))
+
+    def fail(self, key: str, error: str) -> None:
+        self._store(Completion(key, FAILED, error=error))
+
+    def get(self, key: str) -> Optional[Completion]:
+        with self._lock:
+            return self._lookup(key)
+
+    def wait(self, key: str, timeout: Optional[float] = None) -> Optional[Completion]:
+        """Block until key completes; returns None on timeout."""
+        end_time = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while True:
+                completion = self._lookup(key)
+                if completion is not None:
+                    return completion
+                remaining = end_time - time.monotonic() if end_time is not None else None
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+    async def wait_async(self, key: str, timeout: Optional[float] = None) -> Optional[Completion]:
+        """Await until key completes without blocking the event loop; returns None on timeout."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            completion = self._lookup(key)
+            if completion is not None:
+                return completion
+            self._async_waiters.setdefault(key, []).append((loop, future))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            with self._lock:
+                waiters = self._async_waiters.get(key)
+                if waiters:
+                    waiters[:] = [(l, f) for l, f in waiters if f is not future]
+                    if not waiters:
+                        del self._async_waiters[key]
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            completion = self._entries.pop(key, None)
+            if completion is not None:
+                self._bytes -= completion.size
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._purge_expired(time.time())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "capacity": self.capacity,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evicted": self._evicted,
+                "expired": self._expired,
+                "waiting": sum(len(waiters) for waiters in self._async_waiters.values())
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _store(self, completion: Completion) -> None:
+        now = time.time()
+        completion.completed_at = now
+        completion.size = _ENTRY_OVERHEAD + _approximate_size(completion.key) + \
+            _approximate_size(completion.value) + _approximate_size(completion.error)
+
+        with self._condition:
+            previous = self._entries.pop(completion.key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[completion.key] = completion
+            self._bytes += completion.size
+
+            self._purge_expired(now)
+            while self._entries and (len(self._entries) > self.capacity or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._evicted += 1
+
+            waiters = self._async_waiters.pop(completion.key, [])
+            self._condition.notify_all()
+
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(self._resolve, future, completion)
+
+    def _lookup(self, key: str) -> Optional[Completion]:
+        completion = self._entries.get(key)
+        if completion is not None and completion.completed_at + self.ttl_seconds <= time.time():
+            self._entries.pop(key)
+            self._bytes -= completion.size
+            self._expired += 1
+            return None
+        return completion
+
+    def _purge_expired(self, now: float) -> int:
+        # Entries are in completion order, so expired ones are at the front
+        removed = 0
+        while self._entries:
+            key, completion = next(iter(self._entries.items()))
+            if completion.completed_at + self.ttl_seconds > now:
+                break
+            self._entries.pop(key)
+            self._bytes -= completion.size
+            removed += 1
+        self._expired += removed
+        return removed
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, completion: Completion) -> None:
+        if not future.done():
+            future.set_result(completion)
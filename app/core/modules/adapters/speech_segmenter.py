@@ -0,0 +1,484 @@
+import re
+import time
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+from app.core.modules.audio.artifact_manager import get_artifact_manager
+from app.core.modules.metrics.metrics import observe_stage
+from app.core.modules.cancellation.cancellation import CancellationToken, OperationCancelled
+
+logger = logging.getLogger(__name__)
+
+# Sentence terminators, including the Devanagari danda used in Hindi answers
+_TERMINATORS = ".!?।॥"
+# A sentence ends at a terminator (plus closing quotes/brackets) followed by whitespace;
+# "3.5" or "example.com" never split because no whitespace follows the dot
+_SENTENCE_END = re.compile(r'[%s]+["\'”’)\]]*\s+' % re.escape(_TERMINATORS))
+# Line breaks also end a sentence when the text comes from markup (list items, <br>)
+_SENTENCE_OR_LINE_END = re.compile(_SENTENCE_END.pattern + r'|\n\s*')
+# Where an over-long sentence may be broken, in order of preference
+_CLAUSE_BREAK = re.compile(r'[,;:–—]\s+')
+# Words whose trailing dot is not the end of a sentence (compared lowercased, dot removed)
+_ABBREVIATIONS = frozenset({
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "etc", "e.g", "i.e", "approx"
+})
+
+
+class SentenceSplitter:
+    """
+    Incremental sentence splitter. feed() takes text as it arrives and returns the
+    sentences completed so far; flush() returns whatever is left at the end. The dot
+    of an abbreviation such as "Dr." or "e.g." does not end a sentence. Fragments
+    shorter than min_chars are joined to the next sentence so TTS never gets a lone
+    "Sure.", and sentences longer than max_chars are broken at clause boundaries
+    (or spaces) so no single segment dominates synthesis time.
+    """
+
+    def __init__(self, min_chars: int = 12, max_chars: int = 300, break_on_newline: bool = False):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._pattern = _SENTENCE_OR_LINE_END if break_on_newline else _SENTENCE_END
+        self._buffer = ""
+        self._pending = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        sentences = []
+        position = 0
+        while True:
+            match = self._pattern.search(self._buffer, position)
+            if match is None:
+                break
+            if self._is_abbreviation(match):
+                position = match.end()
+                continue
+            sentences.extend(self._emit(self._buffer[:match.end()]))
+            self._buffer = self._buffer[match.end():]
+            position = 0
+
+        # Without a terminator yet, a long run of text is still broken up
+        while len(self._buffer) > self.max_chars:
+            head, self._buffer = self._break(self._buffer)
+            sentences.extend(self._emit(head))
+        return sentences
+
+    def flush(self) -> List[str]:
+        rest = " ".join((self._pending + " " + self._buffer).split())
+        self._buffer = self._pending = ""
+        return self._split_long(rest) if rest else []
+
+    def _is_abbreviation(self, match: re.Match) -> bool:
+        if not match.group().startswith(".") or match.group().startswith(".."):
+            return False
+        words = self._buffer[:match.start()].split()
+        return bool(words) and words[-1].lstrip("(\"'“‘").lower() in _ABBREVIATIONS
+
+    def _emit(self, sentence: str) -> List[str]:
+        text = " ".join((self._pending + " " + sentence).split())
+        if len(text) < self.min_chars:
+            self._pending = text
+            return []
+        self._pending = ""
+        return self._split_long(text)
+
+    def _split_long(self, text: str) -> List[str]:
+        parts = []
+        while len(text) > self.max_chars:
+            head, text = self._break(text)
+            parts.append(head.strip())
+        if text.strip():
+            parts.append(text.strip())
+        return parts
+
+    def _break(self, text: str) -> Tuple[str, str]:
+        window = text[:self.max_chars]
+        clause_ends = [match.end() for match in _CLAUSE_BREAK.finditer(window)]
+        if clause_ends and clause_ends[-1] >= self.min_chars:
+            cut = clause_ends[-1]
+        else:
+            cut = window.rfind(" ")
+            if cut < self.min_chars:
+                cut = self.max_chars
+        return text[:cut], text[cut:].lstrip()
+
+
+def split_sentences(text: str, min_chars: int = 12, max_chars: int = 300) -> List[str]:
+    """Split complete text into sentences (see SentenceSplitter)."""
+    splitter = SentenceSplitter(min_chars, max_chars)
+    return splitter.feed(text) + splitter.flush()
+
+
+def pack_segments(sentences: List[str], max_chars: int = 400, first_alone: bool = True) -> List[str]:
+    """
+    Group sentences into synthesis segments. The first sentence is a segment of its own
+    (unless first_alone is False) so it is ready as early as possible; the rest are
+    packed up to max_chars, which keeps the number of queued TTS tasks per answer small.
+    """
+    if not sentences:
+        return []
+    segments = [sentences[0]] if first_alone else []
+    current = ""
+    for sentence in sentences[1 if first_alone else 0:]:
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            segments.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        segments.append(current)
+    return segments
+
+
+class IncompleteSpeech(Exception):
+    """
+    Some segments of a response could not be synthesized. audio_file holds the audio of
+    the segments that were (None if none were), so callers can still play it but must
+    report that sentences are missing.
+    """
+
+    def __init__(self, failed: int, total: int, audio_file: Optional[str] = None):
+        super().__init__(f"{failed} of {total} TTS segments failed")
+        self.failed = failed
+        self.total = total
+        self.audio_file = audio_file
+
+
+@dataclass
+class SpeechSegment:
+    index: int
+    text: str
+    task_id: Optional[str] = None
+    audio_file: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.audio_file is not None
+
+
+class SpeechText(HTMLParser):
+    """
+    Incremental HTML-to-speech converter: feed() takes markup in arbitrary chunks (a
+    tag may be split across them) and returns the text completed so far. Block-level
+    tags become line breaks and inline tags a space, as in the full-text stripper.
+    """
+
+    BLOCK_TAGS = frozenset({"br", "p", "div", "li", "ul", "ol", "tr", "table",
+                            "h1", "h2", "h3", "h4", "h5", "h6"})
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts: List[str] = []
+
+    def feed(self, data: str) -> str:
+        super().feed(data)
+        return self._take()
+
+    def close(self) -> str:
+        super().close()
+        return self._take()
+
+    def handle_data(self, data: str) -> None:
+        self._parts.append(data)
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        self._parts.append("\n" if tag in self.BLOCK_TAGS else " ")
+
+    def handle_endtag(self, tag: str) -> None:
+        self._parts.append("\n" if tag in self.BLOCK_TAGS else " ")
+
+    def _take(self) -> str:
+        text = "".join(self._parts)
+        self._parts.clear()
+        return text
+
+
+class SpeechStream:
+    """
+    Speech for a response that is still being generated. feed() takes the LLM's HTML
+    deltas and strips the markup incrementally. The first complete sentence is queued
+    on the TTS adapter at once, so playback can start early; later sentences are held
+    back until they fill a segment of about max_segment_chars, which keeps an answer
+    down to a few TTS tasks. ready() returns the segments finished so far without
+    waiting; after finish(), remaining() awaits the rest. Segments are always handed
+    out in order.
+
+    While the TTS queue is full, segments wait here and are queued as it drains
+    (remaining() sleeps until the scheduler frees a slot); one that cannot be queued
+    before the deadline fails, and concatenate() then raises IncompleteSpeech instead
+    of quietly returning audio with sentences missing.
+    """
+
+    def __init__(self, synthesizer: "SegmentedSynthesizer", language: str = "English", priority: int = 1,
+                 session_id: Optional[str] = None, deadline: Optional[float] = None,
+                 cancel_token: Optional[CancellationToken] = None):
+        self.synthesizer = synthesizer
+        self.tts_adapter = synthesizer.tts_adapter
+        self.language = language
+        self.priority = priority
+        self.session_id = session_id
+        self.deadline = deadline if deadline is not None else time.time() + self.tts_adapter.default_budget
+        self.cancel_token = cancel_token
+        self.segments: List[SpeechSegment] = []
+        self._html = SpeechText()
+        self._splitter = SentenceSplitter(
+            synthesizer.min_chars, synthesizer.max_sentence_chars, break_on_newline=True)
+        # Complete sentences waiting to fill a segment
+        self._held: List[str] = []
+        # Segments from this index on are not on the TTS queue yet
+        self._queued = 0
+        self._next = 0
+        self._start_time = time.time()
+
+    def feed(self, html: str) -> None:
+        self._dispatch(self._splitter.feed(self._html.feed(html)))
+
+    def finish(self) -> None:
+        """The response is complete: queue whatever text is left."""
+        sentences = self._splitter.feed(self._html.close())
+        self._dispatch(sentences + self._splitter.flush(), final=True)
+
+    def ready(self) -> List[SpeechSegment]:
+        """Return the next segments whose synthesis has finished, in order, without blocking."""
+        self._submit_pending()
+        ready = []
+        while self._next < len(self.segments):
+            segment = self.segments[self._next]
+            if segment.task_id is None and segment.error is None:
+                break
+            if segment.task_id is not None and segment.error is None and segment.audio_file is None:
+                completion = self.tts_adapter.get_completion(segment.task_id)
+                if completion is None:
+                    break
+                if completion.failed:
+                    segment.error = completion.error
+                else:
+                    segment.audio_file = completion.value
+            self._next += 1
+            SegmentedSynthesizer._record(segment, self._start_time)
+            ready.append(segment)
+        return ready
+
+    async def remaining(self) -> AsyncIterator[SpeechSegment]:
+        """Yield every segment not handed out yet, waiting for each in turn."""
+        while self._next < len(self.segments):
+            segment = self.segments[self._next]
+            while segment.task_id is None and segment.error is None:
+                self._submit_pending()
+                if segment.task_id is not None or segment.error is not None:
+                    break
+                # Backpressure: wait for another task to leave the queue
+                remaining = self.deadline - time.time()
+                if remaining <= 0 or not await self.tts_adapter.wait_for_queue_space(remaining):
+                    segment.error = "TTS queue stayed full until the deadline"
+                    break
+            if segment.task_id is not None and segment.error is None and segment.audio_file is None:
+                try:
+                    segment.audio_file = await self.tts_adapter.await_task(
+                        segment.task_id, max(0.0, self.deadline - time.time()))
+                except Exception as e:
+                    segment.error = str(e)
+            self._next += 1
+            SegmentedSynthesizer._record(segment, self._start_time)
+            yield segment
+
+    def concatenate(self) -> Optional[str]:
+        return self.synthesizer.concatenate(self.segments)
+
+    def _dispatch(self, sentences: List[str], final: bool = False) -> None:
+        self._held.extend(sentences)
+        if self._held and not self.segments:
+            # The first sentence goes alone so its audio is ready as early as possible
+            self._add_segment(self._held.pop(0))
+        max_chars = self.synthesizer.max_segment_chars
+        while self._held and (final or len(" ".join(self._held)) >= max_chars):
+            count, length = 1, len(self._held[0])
+            while count < len(self._held) and length + 1 + len(self._held[count]) <= max_chars:
+                length += 1 + len(self._held[count])
+                count += 1
+            self._add_segment(" ".join(self._held[:count]))
+            del self._held[:count]
+        self._submit_pending()
+
+    def _add_segment(self, text: str) -> None:
+        self.segments.append(SpeechSegment(index=len(self.segments), text=text))
+
+    def _submit_pending(self) -> None:
+        """Queue the segments not on the TTS queue yet, in order, until the queue is full."""
+        while self._queued < len(self.segments):
+            segment = self.segments[self._queued]
+            try:
+                task_id = self.tts_adapter.try_enqueue(
+                    segment.text, self.language, self.priority, session_id=self.session_id,
+                    deadline=self.deadline, cancel_token=self.cancel_token)
+            except OperationCancelled:
+                raise
+            except Exception as e:
+                segment.error = str(e)
+            else:
+                if task_id is None:
+                    # The queue is full; ready()/remaining() try again once it drains
+                    return
+                segment.task_id = task_id
+            self._queued += 1
+
+
+class SegmentedSynthesizer:
+    """
+    Pipelined TTS for a complete response. The text is split into sentence segments
+    that are all queued on the TTSAdapter at once, so the worker pool synthesizes
+    them concurrently, and they are collected strictly in order: segment 0 is handed
+    to the caller as soon as it exists, while the rest are still rendering. The
+    segments can be consumed one by one (stream/astream) or joined into a single file.
+
+    edge-tts produces headerless MP3 frames, so segments are joined by appending their
+    bytes, which plays back without gaps.
+    """
+
+    def __init__(self, tts_adapter, min_chars: int = 12, max_sentence_chars: int = 300,
+                 max_segment_chars: int = 400):
+        self.tts_adapter = tts_adapter
+        self.min_chars = min_chars
+        self.max_sentence_chars = max_sentence_chars
+        self.max_segment_chars = max_segment_chars
+        self.artifacts = get_artifact_manager()
+
+    def open_stream(self, language: str = "English", priority: int = 1, session_id: Optional[str] = None,
+                    deadline: Optional[float] = None,
+                    cancel_token: Optional[CancellationToken] = None) -> SpeechStream:
+        """Start speech for a response that is still being generated (see SpeechStream)."""
+        return SpeechStream(self, language, priority, session_id, deadline, cancel_token)
+
+    def segment(self, text: str) -> List[str]:
+        return pack_segments(
+            split_sentences(text, self.min_chars, self.max_sentence_chars), self.max_segment_chars)
+
+    def submit(self, text: str, language: str = "English", priority: int = 1,
+               session_id: Optional[str] = None, deadline: Optional[float] = None,
+               cancel_token: Optional[CancellationToken] = None) -> List[SpeechSegment]:
+        """
+        Queue every segment of text for synthesis and return them in order. If one
+        cannot be queued (e.g. the TTS queue is full), the segments already queued are
+        cancelled before the error is raised, so they do not hold TTS workers.
+        """
+        segments = []
+        try:
+            for index, segment_text in enumerate(self.segment(text)):
+                task_id = self.tts_adapter.speak_text_async(
+                    segment_text, language, priority, session_id=session_id, deadline=deadline,
+                    cancel_token=cancel_token)
+                segments.append(SpeechSegment(index=index, text=segment_text, task_id=task_id))
+        except BaseException:
+            for segment in segments:
+                self.tts_adapter.cancel_task(segment.task_id)
+            raise
+        logger.debug("Queued %d TTS segments for %d characters", len(segments), len(text))
+        return segments
+
+    def stream(self, text: str, language: str = "English", priority: int = 1,
+               session_id: Optional[str] = None, deadline: Optional[float] = None,
+               cancel_token: Optional[CancellationToken] = None):
+        """Yield the segments of text in order, each as soon as its audio is ready."""
+        deadline = deadline if deadline is not None else time.time() + self.tts_adapter.default_budget
+        start_time = time.time()
+        for segment in self.submit(text, language, priority, session_id, deadline, cancel_token):
+            try:
+                segment.audio_file = self.tts_adapter.wait_for_task(
+                    segment.task_id, max(0.0, deadline - time.time()))
+            except Exception as e:
+                segment.error = str(e)
+            self._record(segment, start_time)
+            yield segment
+
+    async def astream(self, text: str, language: str = "English", priority: int = 1,
+                      session_id: Optional[str] = None, deadline: Optional[float] = None,
+                      cancel_token: Optional[CancellationToken] = None) -> AsyncIterator[SpeechSegment]:
+        """Async stream(): waits on the event loop instead of blocking a thread."""
+        deadline = deadline if deadline is not None else time.time() + self.tts_adapter.default_budget
+        start_time = time.time()
+        for segment in self.submit(text, language, priority, session_id, deadline, cancel_token):
+            try:
+                segment.audio_file = await self.tts_adapter.await_task(
+                    segment.task_id, max(0.0, deadline - time.time()))
+            except Exception as e:
+                segment.error = str(e)
+            self._record(segment, start_time)
+            yield segment
+
+    def synthesize(self, text: str, language: str = "English", priority: int = 1,
+                   session_id: Optional[str] = None, deadline: Optional[float] = None,
+                   on_segment: Optional[Callable[[SpeechSegment], None]] = None,
+                   cancel_token: Optional[CancellationToken] = None) -> Optional[str]:
+        """Synthesize text to a single audio file; on_segment sees every segment as it lands."""
+        segments = []
+        for segment in self.stream(text, language, priority, session_id, deadline, cancel_token):
+            self._notify(on_segment, segment)
+            segments.append(segment)
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        return self.concatenate(segments)
+
+    async def asynthesize(self, text: str, language: str = "English", priority: int = 1,
+                          session_id: Optional[str] = None, deadline: Optional[float] = None,
+                          on_segment: Optional[Callable[[SpeechSegment], None]] = None,
+                          cancel_token: Optional[CancellationToken] = None) -> Optional[str]:
+        segments = []
+        async for segment in self.astream(text, language, priority, session_id, deadline, cancel_token):
+            self._notify(on_segment, segment)
+            segments.append(segment)
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        return await asyncio.to_thread(self.concatenate, segments)
+
+    def concatenate(self, segments: List[SpeechSegment]) -> Optional[str]:
+        """
+        Join the synthesized segments into one registered audio file, or return the
+        segment's own file if there is only one. If any segment failed, raises
+        IncompleteSpeech carrying the audio of the others (None if none succeeded).
+        """
+        paths = [segment.audio_file for segment in segments if segment.audio_file]
+        output_path = self._join(paths)
+        if len(paths) < len(segments):
+            logger.warning("%d of %d TTS segments failed", len(segments) - len(paths), len(segments))
+            raise IncompleteSpeech(len(segments) - len(paths), len(segments), output_path)
+        return output_path
+
+    def _join(self, paths: List[str]) -> Optional[str]:
+        if len(paths) <= 1:
+            return paths[0] if paths else None
+
+        start_time = time.perf_counter()
+        output_path = self.artifacts.new_path()
+        digest = hashlib.sha256()
+        with open(output_path, "wb") as output:
+            for path in paths:
+                with open(path, "rb") as part:
+                    data = part.read()
+                output.write(data)
+                digest.update(data)
+        self.artifacts.register(output_path, content_hash=digest.hexdigest())
+        observe_stage("file_write", time.perf_counter() - start_time)
+        return output_path
+
+    @staticmethod
+    def _record(segment: SpeechSegment, start_time: float) -> None:
+        if segment.index == 0:
+            observe_stage("tts_first_segment", time.time() - start_time)
+        if segment.error:
+            logger.error("TTS segment %d failed: %s", segment.index, segment.error)
+        else:
+            logger.debug("TTS segment %d ready after %.2fs: %s",
+                         segment.index, time.time() - start_time, segment.audio_file)
+
+    @staticmethod
+    def _notify(on_segment: Optional[Callable[[SpeechSegment], None]], segment: SpeechSegment) -> None:
+        if on_segment is None:
+            return
+        try:
+            on_segment(segment)
+        except Exception as e:
+            logger.error("Error in segment callback: %s", e)
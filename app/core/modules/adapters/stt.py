@@ -5,7 +5,7 @@ import threading
 import queue
 import struct
 import math
-import tempfile
+import logging
 from typing import Callable, Optional, List
 from groq import Groq
 import pyaudio
@@ -14,19 +14,36 @@ from dotenv import load_dotenv
 from app.helper.get_config import load_yaml
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 
 class VoiceActivityDetector:
-    def __init__(self, threshold: float = 0.02, min_duration: float = 1.0, silence_duration: float = 2.0):
+    """
+    Energy-based voice activity detection over 16-bit mono PCM frames. Durations are
+    measured on the audio itself (bytes at sample_rate), not the wall clock, so audio
+    pushed faster or slower than real time is segmented the same way.
+    """
+    
+    def __init__(self, threshold: float = 0.02, min_duration: float = 1.0, silence_duration: float = 2.0,
+                 sample_rate: int = 16000):
         self.threshold = threshold
         self.min_duration = min_duration
         self.silence_duration = silence_duration
+        self.bytes_per_second = sample_rate * 2
         self.is_voice_active = False
+        self.audio_time = 0.0
         self.voice_start_time = 0
         self.last_voice_time = 0
         self.voice_buffer = []
         self.buffer_size = 10
     
     def detect_voice_activity(self, audio_data: bytes) -> tuple[bool, bool]:
+        """
+        Return (has_voice, should_process). A burst of voice shorter than min_duration
+        that is followed by silence is abandoned: is_voice_active drops back to False
+        without should_process, and callers should discard what they buffered for it.
+        """
+        # Position of the end of this frame in the stream
+        self.audio_time += len(audio_data) / self.bytes_per_second
         try:
             audio_values = struct.unpack(f'{len(audio_data)//2}h', audio_data)
             rms = math.sqrt(sum(x*x for x in audio_values) / len(audio_values))
@@ -38,7 +55,7 @@ class VoiceActivityDetector:
             
             avg_rms = sum(self.voice_buffer) / len(self.voice_buffer)
             
-            current_time = time.time()
+            current_time = self.audio_time
             has_voice = avg_rms > self.threshold
             
             if has_voice and len(self.voice_buffer) >= 3:
@@ -64,11 +81,12 @@ class VoiceActivityDetector:
                 return False, False
                     
         except Exception as e:
-            print(f"Voice activity detection error: {e}")
+            logger.warning("Voice activity detection error: %s", e)
             return True, False
     
     def reset(self) -> None:
         self.is_voice_active = False
+        self.audio_time = 0.0
         self.voice_start_time = 0
         self.last_voice_time = 0
         self.voice_buffer = []
@@ -91,10 +109,34 @@ class RealTimeTranscriber:
         self.RECORD_SECONDS = 3 
         self.audio_queue = queue.Queue()
         self.is_recording = False
+        # Set by stop_recording(); start_recording() blocks on it instead of spinning
+        self._stop_event = threading.Event()
         self.p = pyaudio.PyAudio()
+    
+    def pcm_to_wav(self, audio_data: bytes) -> bytes:
+        """Wrap raw 16-bit mono PCM in a WAV container in memory."""
+        buffer = io.BytesIO()
+        wf = wave.open(buffer, 'wb')
+        wf.setnchannels(self.CHANNELS)
+        wf.setsampwidth(pyaudio.get_sample_size(self.FORMAT))
+        wf.setframerate(self.RATE)
+        wf.writeframes(audio_data)
+        wf.close()
+        return buffer.getvalue()
+    
+    def transcribe_audio(self, audio_data: bytes) -> str:
+        """Transcribe raw PCM audio with Whisper. Returns the stripped text."""
+        transcription = self.client.audio.transcriptions.create(
+            file=("audio.wav", self.pcm_to_wav(audio_data)),
+            model="whisper-large-v3-turbo",
+            response_format="json",
+            temperature=0.7
+        )
+        return transcription.text.strip()
         
     def start_recording(self):
         self.is_recording = True
+        self._stop_event.clear()
         print("Initializing real-time transcription...")
         recording_thread = threading.Thread(target=self._record_audio)
         recording_thread.daemon = True
@@ -107,14 +149,16 @@ class RealTimeTranscriber:
         print("-" * 50)
         
         try:
-            while self.is_recording:
-                time.sleep(0.0)
+            # The timeout only keeps Ctrl+C responsive on Windows
+            while not self._stop_event.wait(1.0):
+                pass
         except KeyboardInterrupt:
             self.stop_recording()
     
     def stop_recording(self):
         print("\nStopping transcription...")
         self.is_recording = False
+        self._stop_event.set()
         self.p.terminate()
         print("Transcription stopped.")
     
@@ -145,31 +189,14 @@ class RealTimeTranscriber:
         while self.is_recording:
             try:
                 audio_data = self.audio_queue.get(timeout=1)
-                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                    wf = wave.open(temp_file.name, 'wb')
-                    wf.setnchannels(self.CHANNELS)
-                    wf.setsampwidth(self.p.get_sample_size(self.FORMAT))
-                    wf.setframerate(self.RATE)
-                    wf.writeframes(audio_data)
-                    wf.close()
-                    
-                    try:
-                        with open(temp_file.name, "rb") as file:
-                            transcription = self.client.audio.transcriptions.create(
-                                file=(temp_file.name, file.read()),
-                                model="whisper-large-v3-turbo",
-                                response_format="json",
-                                temperature=0.7
-                            )
+                try:
+                    transcription_text = self.transcribe_audio(audio_data)
+                    if transcription_text:
+                        timestamp = time.strftime("%H:%M:%S")
+                        print(f"[{timestamp}] {transcription_text}")
                         
-                        if transcription.text.strip():
-                            timestamp = time.strftime("%H:%M:%S")
-                            print(f"[{timestamp}] {transcription.text}")
-                            
-                    except Exception as e:
-                        print(f"Transcription error: {e}")
-                    finally:
-                        os.unlink(temp_file.name)
+                except Exception as e:
+                    print(f"Transcription error: {e}")
                 
                 self.audio_queue.task_done()
             except queue.Empty:
@@ -206,7 +233,7 @@ class RealTimeTranscriber:
             return voice_ratio >= 0.3
             
         except Exception as e:
-            print(f"Voice content check error: {e}")
+            logger.warning("Voice content check error: %s", e)
             return True
 
 
@@ -216,7 +243,7 @@ class EnhancedRealTimeTranscriber(RealTimeTranscriber):
         self.transcription_callbacks: List[Callable[[str], None]] = []
         self.silence_threshold = 2.0
         self.last_transcription_time = time.time()
-        self.voice_detector = VoiceActivityDetector()
+        self.voice_detector = VoiceActivityDetector(sample_rate=self.RATE)
         self.accumulated_audio = []
         self.is_accumulating = False
         self.is_paused = False  # Add pause state
@@ -275,6 +302,10 @@ class EnhancedRealTimeTranscriber(RealTimeTranscriber):
                         self.audio_queue.put(combined_audio)
                         self.accumulated_audio = []
                         self.is_accumulating = False
+                    elif not self.voice_detector.is_voice_active:
+                        # Too short to be speech; drop the burst
+                        self.accumulated_audio = []
+                        self.is_accumulating = False
             else:
                 frames = [data]
                 for _ in range(1, int(self.RATE / self.CHUNK * self.RECORD_SECONDS)):
@@ -293,62 +324,31 @@ class EnhancedRealTimeTranscriber(RealTimeTranscriber):
         print(f'\nBegin processing the audio from enhanced realtime.')
         while self.is_recording:
             try:
-                # Skip processing if paused
-                if self.is_paused:
-                    # Clear the queue during pause to prevent backlog
-                    try:
-                        self.audio_queue.get_nowait()
-                        self.audio_queue.task_done()
-                    except queue.Empty:
-                        pass
-                    time.sleep(0.1)
-                    continue
-                
                 audio_data = self.audio_queue.get(timeout=1)
                 
-                if len(audio_data) < self.RATE * 2:
-                    self.audio_queue.task_done()
-                    continue
-                
-                if not self._has_sufficient_voice_content(audio_data):
+                if self.is_paused:
+                    # Audio recorded during a pause is dropped as it arrives, so no backlog builds up
                     self.audio_queue.task_done()
                     continue
                 
-                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                    wf = wave.open(temp_file.name, 'wb')
-                    wf.setnchannels(self.CHANNELS)
-                    wf.setsampwidth(self.p.get_sample_size(self.FORMAT))
-                    wf.setframerate(self.RATE)
-                    wf.writeframes(audio_data)
-                    wf.close()
+                try:
+                    transcription_text = self.transcribe_utterance(audio_data)
                     
-                    try:
-                        with open(temp_file.name, "rb") as file:
-                            transcription = self.client.audio.transcriptions.create(
-                                file=(temp_file.name, file.read()),
-                                model="whisper-large-v3-turbo",
-                                response_format="json",
-                                temperature=0.7
-                            )
-                        
-                        if transcription.text.strip() and not self.is_paused:
-                            timestamp = time.strftime("%H:%M:%S")
-                            transcription_text = transcription.text.strip()
-                            print(f"[{timestamp}] {transcription_text}")
-                            print(f'\transcription_text : {transcription_text}')
+                    if transcription_text and not self.is_paused:
+                        timestamp = time.strftime("%H:%M:%S")
+                        print(f"[{timestamp}] {transcription_text}")
+                        print(f'\transcription_text : {transcription_text}')
 
-                            for callback in self.transcription_callbacks:
-                                try:
-                                    callback(transcription_text)
-                                except Exception as e:
-                                    print(f"Error in transcription callback: {e}")
-                            
-                            self.last_transcription_time = time.time()
-                            
-                    except Exception as e:
-                        print(f"Transcription error: {e}")
-                    finally:
-                        os.unlink(temp_file.name)
+                        for callback in self.transcription_callbacks:
+                            try:
+                                callback(transcription_text)
+                            except Exception as e:
+                                print(f"Error in transcription callback: {e}")
+                        
+                        self.last_transcription_time = time.time()
+                        
+                except Exception as e:
+                    print(f"Transcription error: {e}")
                 
                 self.audio_queue.task_done()
             except queue.Empty:
@@ -356,6 +356,32 @@ class EnhancedRealTimeTranscriber(RealTimeTranscriber):
             except Exception as e:
                 print(f"Processing error: {e}")
     
+    def transcribe_utterance(self, audio_data: bytes) -> str:
+        """
+        Transcribe a complete utterance, skipping clips that are too short or mostly
+        silence. Returns an empty string for skipped clips.
+        """
+        if len(audio_data) < self.RATE * 2:
+            return ""
+        
+        if not self._has_sufficient_voice_content(audio_data):
+            return ""
+        
+        return self.transcribe_audio(audio_data)
+    
+    def create_segmenter(self) -> "PCMUtteranceSegmenter":
+        """Create a segmenter for PCM pushed by a remote client, using this transcriber's VAD settings."""
+        detector = None
+        if self.voice_detector:
+            detector = VoiceActivityDetector(
+                self.voice_detector.threshold,
+                self.voice_detector.min_duration,
+                self.voice_detector.silence_duration,
+                sample_rate=self.RATE
+            )
+        return PCMUtteranceSegmenter(detector, frame_bytes=self.CHUNK * 2,
+                                     max_utterance_bytes=self.RATE * 2 * 30)
+    
     def start_recording_with_callback(self, callback: Callable[[str], None]) -> None:
         self.add_transcription_callback(callback)
         self.start_recording()
@@ -364,12 +390,95 @@ class EnhancedRealTimeTranscriber(RealTimeTranscriber):
         return time.time() - self.last_transcription_time
     
     def enable_voice_activity_detection(self, threshold: float = 0.0015, min_duration: float = 1.0, silence_duration: float = 1.5) -> None:
-        self.voice_detector = VoiceActivityDetector(threshold, min_duration, silence_duration)
+        self.voice_detector = VoiceActivityDetector(threshold, min_duration, silence_duration,
+                                                    sample_rate=self.RATE)
     
     def disable_voice_activity_detection(self) -> None:
         self.voice_detector = None
 
 
+class PCMUtteranceSegmenter:
+    """
+    Splits a stream of raw 16-bit mono PCM pushed by a client (e.g. over a WebSocket)
+    into utterances, using the same voice activity detection as the microphone loop.
+    Without a detector, audio is buffered until flush() is called (push-to-talk).
+    """
+    
+    def __init__(self, voice_detector: Optional[VoiceActivityDetector], frame_bytes: int = 2048,
+                 max_utterance_bytes: int = 16000 * 2 * 30):
+        self.voice_detector = voice_detector
+        self.frame_bytes = frame_bytes
+        self.max_utterance_bytes = max_utterance_bytes
+        self._pending = b''
+        self._accumulated: List[bytes] = []
+        self._accumulated_bytes = 0
+        self._is_accumulating = False
+    
+    def feed(self, data: bytes) -> List[bytes]:
+        """Add PCM bytes. Returns the utterances completed by this data, if any."""
+        self._pending += data
+        utterances = []
+        
+        while len(self._pending) >= self.frame_bytes:
+            frame = self._pending[:self.frame_bytes]
+            self._pending = self._pending[self.frame_bytes:]
+            
+            if self.voice_detector is None:
+                self._append(frame)
+                continue
+            
+            has_voice, should_process = self.voice_detector.detect_voice_activity(frame)
+            if has_voice:
+                if not self._is_accumulating:
+                    self._is_accumulating = True
+                    self._reset_buffer()
+                self._append(frame)
+            elif self._is_accumulating:
+                self._append(frame)
+                if should_process:
+                    utterances.append(self._take())
+                elif not self.voice_detector.is_voice_active:
+                    # The detector abandoned a burst too short to be speech
+                    self._reset_buffer()
+                    self._is_accumulating = False
+            
+            if self._accumulated_bytes >= self.max_utterance_bytes:
+                # Never buffer unbounded audio from a client that never pauses
+                utterances.append(self._take())
+        
+        return utterances
+    
+    def flush(self) -> Optional[bytes]:
+        """Return whatever audio is buffered as a final utterance, or None."""
+        if self._pending:
+            self._append(self._pending)
+            self._pending = b''
+        if not self._accumulated:
+            return None
+        return self._take()
+    
+    def reset(self) -> None:
+        self._pending = b''
+        self._reset_buffer()
+        self._is_accumulating = False
+        if self.voice_detector:
+            self.voice_detector.reset()
+    
+    def _append(self, frame: bytes) -> None:
+        self._accumulated.append(frame)
+        self._accumulated_bytes += len(frame)
+    
+    def _take(self) -> bytes:
+        utterance = b''.join(self._accumulated)
+        self._reset_buffer()
+        self._is_accumulating = False
+        return utterance
+    
+    def _reset_buffer(self) -> None:
+        self._accumulated = []
+        self._accumulated_bytes = 0
+
+
 if __name__ == "__main__":
     def print_callback(transcription: str):
         print(f"[Callback] Transcribed: {transcription}")
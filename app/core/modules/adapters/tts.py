@@ -3,20 +3,25 @@ import io
 import time
 import threading
 import queue
-import uuid
 import pyaudio
 import wave
 import tempfile
 import asyncio
 import edge_tts
 import re
+import hashlib
+import logging
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from groq import Groq
-from pathlib import Path
 from dotenv import load_dotenv
 from app.helper.get_config import load_yaml
+from app.core.modules.audio.artifact_manager import get_artifact_manager
+from app.core.modules.metrics.metrics import observe_stage, time_stage
+from app.core.modules.adapters.tts_engine import get_tts_event_loop
+from app.core.modules.adapters.completion_store import CompletionStore
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
@@ -48,11 +53,17 @@ class RealTimeTTS:
         self.CHUNK = 4096
         self.text_queue = queue.Queue()
         self.is_running = False
-        self.p = pyaudio.PyAudio()
+        # Set by stop_tts(); start_tts() blocks on it instead of polling is_running
+        self._stop_event = threading.Event()
+        # PyAudio is only needed for local playback; the API server never opens it
+        self._pyaudio = None
         self.playback_finished_callback = None
         self.is_playing = False
         self.last_audio_file_path = None
         self.auto_detect_language = True
+        self.artifacts = get_artifact_manager()
+        # Every synchronous synthesis runs on this one long-lived loop
+        self.engine_loop = get_tts_event_loop()
         
         self.max_workers = max_workers
         self.executor = None
@@ -61,11 +72,17 @@ class RealTimeTTS:
         
         # Enhanced tracking for proper synchronization
         self.task_counter = 0
-        self.task_results = {}  # task_id -> audio_file_path
+        self.task_results = CompletionStore.from_env()  # task_id -> audio_file_path or error
         self.task_completion_callbacks = {}  # task_id -> callback
         self.result_lock = threading.RLock()
         self.pending_tasks = {}  # task_id -> future
         
+    @property
+    def p(self):
+        if self._pyaudio is None:
+            self._pyaudio = pyaudio.PyAudio()
+        return self._pyaudio
+    
     def detect_language(self, text):
         hindi_pattern = r'[\u0900-\u097F]'
         
@@ -88,10 +105,10 @@ class RealTimeTTS:
         """Convert text to speech and return the audio file path (sync)."""
         self.ensure_tts_ready()
         try:
-            future = self.executor.submit(self._process_single_text, text)
-            return future.result(timeout=timeout)
+            # The synthesis runs on the engine loop; no worker thread is needed in between
+            return self._process_single_text(text, timeout=timeout)
         except Exception as e:
-            print(f"Error in convert_text_and_get_path: {e}")
+            logger.error("Error in convert_text_and_get_path: %s", e)
             return None
     
     def convert_text_with_language(self, text, language=None, speaker=None):
@@ -112,7 +129,7 @@ class RealTimeTTS:
                 result = future.result(timeout=30)
                 audio_file_path = result
             except Exception as e:
-                print(f"Error in convert_text_with_language: {e}")
+                logger.error("Error in convert_text_with_language: %s", e)
                 audio_file_path = None
             
             self.auto_detect_language = original_auto_detect
@@ -125,32 +142,133 @@ class RealTimeTTS:
                 future = self.executor.submit(self._process_single_text, text)
                 return future.result(timeout=30)
             except Exception as e:
-                print(f"Error in convert_text_with_language: {e}")
+                logger.error("Error in convert_text_with_language: %s", e)
                 return None
     
-    async def _text_to_speech_edge(self, text):
-        if self.auto_detect_language:
+    def synthesize_to_file(self, text, language=None, speaker=None, timeout=None):
+        """Synthesize text to a new audio file on the engine loop, blocking the caller for its path."""
+        audio_file_path = self.engine_loop.run(self._text_to_speech_edge(text, language, speaker), timeout=timeout)
+        self.last_audio_file_path = audio_file_path
+        return audio_file_path
+    
+    def submit_synthesis(self, text, language=None, speaker=None, timeout=None):
+        """
+        Schedule a synthesis on the engine loop without blocking and return a
+        concurrent.futures.Future resolving to the audio file path.
+        """
+        async def synthesize():
+            audio_file_path = await asyncio.wait_for(
+                self._text_to_speech_edge(text, language, speaker), timeout=timeout)
+            self.last_audio_file_path = audio_file_path
+            return audio_file_path
+        
+        return self.engine_loop.submit(synthesize())
+    
+    async def aconvert_text_and_get_path(self, text, language=None, speaker=None):
+        """Convert text to speech on the caller's event loop and return the audio file path."""
+        try:
+            audio_file_path = await self._text_to_speech_edge(text, language, speaker)
+            self.last_audio_file_path = audio_file_path
+            return audio_file_path
+        except Exception as e:
+            logger.error("TTS error: %s", e)
+            return None
+    
+    async def astream_speech(self, text, audio_file_path, language=None, speaker=None):
+        """
+        Yield audio chunks as edge-tts produces them while teeing them to audio_file_path.
+        Chunks go to a .part file that is renamed on completion, so a partial
+        synthesis is never picked up for replay.
+        """
+        voice = self._resolve_voice(text, language, speaker)
+        communicate = edge_tts.Communicate(text, voice)
+        
+        partial_path = f"{audio_file_path}.part"
+        digest = hashlib.sha256()
+        completed = False
+        synthesis_start = time.perf_counter()
+        write_time = 0.0
+        try:
+            with open(partial_path, "wb") as audio_file:
+                async for chunk in communicate.stream():
+                    if chunk["type"] == "audio":
+                        write_start = time.perf_counter()
+                        audio_file.write(chunk["data"])
+                        digest.update(chunk["data"])
+                        write_time += time.perf_counter() - write_start
+                        yield chunk["data"]
+            write_start = time.perf_counter()
+            os.replace(partial_path, audio_file_path)
+            completed = True
+            self.artifacts.register(audio_file_path, content_hash=digest.hexdigest())
+            observe_stage("file_write", write_time + time.perf_counter() - write_start)
+            observe_stage("tts_synthesis", time.perf_counter() - synthesis_start)
+            self.last_audio_file_path = audio_file_path
+        finally:
+            if not completed and os.path.exists(partial_path):
+                os.unlink(partial_path)
+    
+    def new_audio_file_path(self, prefix="", extension=".mp3"):
+        """Return a fresh, unique path for a generated audio file in a static/audio shard."""
+        # edge-tts produces MP3 data, so files are named accordingly
+        return self.artifacts.new_path(prefix=prefix, extension=extension)
+    
+    def _resolve_voice(self, text, language=None, speaker=None):
+        if language and speaker:
+            # Per-call override that leaves the shared voice settings untouched
+            detected_language = language
+            current_speaker = speaker
+        elif self.auto_detect_language:
             detected_language = self.detect_language(text)
             current_speaker = default_speakers[detected_language]
-            print(f"Auto-detected language: {detected_language}, using speaker: {current_speaker}")
+            logger.debug("Auto-detected language: %s, using speaker: %s", detected_language, current_speaker)
         else:
             detected_language = self.language
             current_speaker = self.speaker
-            print(f"Using configured language: {detected_language}, speaker: {current_speaker}")
+            logger.debug("Using configured language: %s, speaker: %s", detected_language, current_speaker)
         
-        voice = language_dict[detected_language][current_speaker]
+        return language_dict[detected_language][current_speaker]
+    
+    async def _text_to_speech_edge(self, text, language=None, speaker=None):
+        voice = self._resolve_voice(text, language, speaker)
         
         communicate = edge_tts.Communicate(text, voice)
+        audio_file_path = self.new_audio_file_path()
         
-        audio_dir = Path("static/audio")
-        audio_dir.mkdir(parents=True, exist_ok=True)
-        unique_filename = f"{uuid.uuid4().hex}.wav"
-        audio_file_path = audio_dir / unique_filename
-        
-        await communicate.save(str(audio_file_path))
-        return str(audio_file_path)
+        with time_stage("tts_synthesis"):
+            await self._save_speech(communicate, audio_file_path)
+        return audio_file_path
+    
+    async def _save_speech(self, communicate, audio_file_path):
+        """
+        Write synthesized audio to disk and record it, hashing the bytes as they are
+        written. As in astream_speech, the audio goes to a .part file renamed on
+        success; a failed, timed-out or cancelled synthesis leaves nothing behind.
+        """
+        partial_path = f"{audio_file_path}.part"
+        digest = hashlib.sha256()
+        completed = False
+        write_time = 0.0
+        try:
+            with open(partial_path, "wb") as audio_file:
+                async for chunk in communicate.stream():
+                    if chunk["type"] == "audio":
+                        write_start = time.perf_counter()
+                        audio_file.write(chunk["data"])
+                        digest.update(chunk["data"])
+                        write_time += time.perf_counter() - write_start
+            write_start = time.perf_counter()
+            os.replace(partial_path, audio_file_path)
+            completed = True
+            self.artifacts.register(audio_file_path, content_hash=digest.hexdigest())
+            observe_stage("file_write", write_time + time.perf_counter() - write_start)
+        finally:
+            # Also reached on CancelledError, which is not an Exception
+            if not completed and os.path.exists(partial_path):
+                os.unlink(partial_path)
     def start_tts(self):
         self.is_running = True
+        self._stop_event.clear()
         self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
         print("Initializing real-time text-to-speech...")
         tts_thread = threading.Thread(target=self._process_text)
@@ -163,14 +281,18 @@ class RealTimeTTS:
         input_thread.daemon = True
         input_thread.start()
         try:
-            while self.is_running:
-                time.sleep(0.1)
+            # The timeout only keeps Ctrl+C responsive on Windows
+            while not self._stop_event.wait(1.0):
+                pass
         except KeyboardInterrupt:
             self.stop_tts()
     
     def stop_tts(self):
         print("\nStopping TTS...")
         self.is_running = False
+        self._stop_event.set()
+        # Wake the text processor so it sees is_running at once
+        self.text_queue.put(None)
         
         with self.task_lock:
             for future in self.active_tasks:
@@ -180,7 +302,9 @@ class RealTimeTTS:
         if self.executor:
             self.executor.shutdown(wait=True)
         
-        self.p.terminate()
+        if self._pyaudio is not None:
+            self._pyaudio.terminate()
+            self._pyaudio = None
         print("TTS stopped.")
     
     def add_text(self, text):
@@ -212,7 +336,7 @@ class RealTimeTTS:
                     if result:
                         audio_files.append(result)
                 except Exception as e:
-                    print(f"Error processing text: {e}")
+                    logger.error("Error processing text: %s", e)
             return audio_files
         
         return futures
@@ -229,7 +353,7 @@ class RealTimeTTS:
                 pass
             return True
         except Exception as e:
-            print(f"Error waiting for tasks: {e}")
+            logger.error("Error waiting for tasks: %s", e)
             return False
     
     def get_active_task_count(self):
@@ -270,10 +394,13 @@ class RealTimeTTS:
     def _process_text(self):
         while self.is_running:
             try:
-                text = self.text_queue.get(timeout=1)
+                text = self.text_queue.get()
                 
-                if text:
-                    print(f"Converting to speech: {text[:50]}{'...' if len(text) > 50 else ''}")
+                if text is None:
+                    # Wake-up from stop_tts()
+                    self.text_queue.task_done()
+                elif text:
+                    logger.debug("Converting to speech: %.50s", text)
                     
                     # Ensure executor is available
                     if not self.executor:
@@ -286,10 +413,8 @@ class RealTimeTTS:
                     
                     self.text_queue.task_done()
                     
-            except queue.Empty:
-                continue
             except Exception as e:
-                print(f"Processing error: {e}")
+                logger.error("Processing error: %s", e)
                 self.is_playing = False
         
         self._cleanup_completed_tasks()
@@ -298,40 +423,36 @@ class RealTimeTTS:
         with self.task_lock:
             self.active_tasks = [task for task in self.active_tasks if not task.done()]
     
-    def _process_single_text(self, text):
+    def _process_single_text(self, text, timeout=None):
         try:
             self.is_playing = True
             
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            audio_file_path = loop.run_until_complete(self._text_to_speech_edge(text))
-            loop.close()
+            audio_file_path = self.engine_loop.run(self._text_to_speech_edge(text), timeout=timeout)
             
-            print(f'Generated audio file: {audio_file_path}')
+            logger.debug("Generated audio file: %s", audio_file_path)
             self.last_audio_file_path = audio_file_path
             
             self.is_playing = False
-            
-            if self.playback_finished_callback:
-                def delayed_callback():
-                    time.sleep(0.3)
-                    self.playback_finished_callback()
-                
-                callback_thread = threading.Thread(target=delayed_callback)
-                callback_thread.daemon = True
-                callback_thread.start()
+            self._notify_playback_finished()
             
             return audio_file_path
             
         except Exception as e:
-            print(f"TTS error: {e}")
+            logger.error("TTS error: %s", e)
             self.is_playing = False
-            if self.playback_finished_callback:
-                self.playback_finished_callback()
+            self._notify_playback_finished()
             return None
         finally:
             self._cleanup_completed_tasks()
     
+    def _notify_playback_finished(self):
+        """Run the playback-finished callback on the current thread, once the result is published."""
+        if self.playback_finished_callback:
+            try:
+                self.playback_finished_callback()
+            except Exception as e:
+                logger.warning("Playback finished callback failed: %s", e)
+    
     def _play_audio_file(self, file_path):
         try:
             wf = wave.open(file_path, 'rb')
@@ -352,7 +473,7 @@ class RealTimeTTS:
             time.sleep(0.1)
             
         except Exception as e:
-            print(f"Audio playback error: {e}")
+            logger.error("Audio playback error: %s", e)
 
     def get_last_audio_file_path(self):
         return self.last_audio_file_path
@@ -361,10 +482,11 @@ class RealTimeTTS:
         if self.last_audio_file_path and os.path.exists(self.last_audio_file_path):
             try:
                 os.unlink(self.last_audio_file_path)
+                self.artifacts.remove(self.last_audio_file_path)
                 self.last_audio_file_path = None
                 return True
             except Exception as e:
-                print(f"Error deleting audio file: {e}")
+                logger.warning("Error deleting audio file: %s", e)
                 return False
         return False
     
@@ -424,7 +546,8 @@ class RealTimeTTS:
         if not self.executor:
             self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
         self.is_running = True
-        print("TTS initialized for programmatic use.")
+        self._stop_event.clear()
+        logger.info("TTS initialized for programmatic use.")
     
     def ensure_tts_ready(self):
         """Ensure TTS is ready for use, initialize if needed"""
@@ -469,15 +592,13 @@ class RealTimeTTS:
             
             with self.result_lock:
                 self.pending_tasks[task_id] = future
-                self.task_results[task_id] = None  # Initialize as pending
             
-            print(f"TTS task {task_id} submitted for text: '{text[:50]}{'...' if len(text) > 50 else ''}'")
+            logger.debug("TTS task %s submitted for text: %.50s", task_id, text)
             return task_id
             
         except Exception as e:
-            print(f"Error submitting TTS task {task_id}: {e}")
-            with self.result_lock:
-                self.task_results[task_id] = {"error": str(e), "audio_file": None}
+            logger.error("Error submitting TTS task %s: %s", task_id, e)
+            self.task_results.fail(task_id, str(e))
             return task_id
         finally:
             # Restore original settings if they were changed
@@ -493,50 +614,35 @@ class RealTimeTTS:
         """
         if not task_id:
             return None
-            
-        start_time = time.time()
         
-        while time.time() - start_time < timeout:
-            with self.result_lock:
-                if task_id in self.task_results:
-                    result = self.task_results[task_id]
-                    
-                    # If result is None, task is still pending
-                    if result is None:
-                        time.sleep(0.1)
-                        continue
-                    
-                    # If result is a dict with error, return None
-                    if isinstance(result, dict) and "error" in result:
-                        print(f"TTS task {task_id} failed: {result['error']}")
-                        return None
-                    
-                    # If result is a string, it's the audio file path
-                    if isinstance(result, str):
-                        print(f"TTS task {task_id} completed: {result}")
-                        return result
-                        
-            time.sleep(0.1)
+        # Woken by the completion itself rather than polling
+        completion = self.task_results.wait(task_id, timeout)
+        if completion is None:
+            logger.warning("Timeout waiting for TTS task %s", task_id)
+            return None
+        if completion.failed:
+            logger.error("TTS task %s failed: %s", task_id, completion.error)
+            return None
         
-        print(f"Timeout waiting for TTS task {task_id}")
-        return None
+        logger.debug("TTS task %s completed: %s", task_id, completion.value)
+        return completion.value
     
     def _process_single_text_synchronized(self, text, task_id):
         """
         Process a single text with proper task tracking and synchronization.
         """
         try:
-            print(f"Processing TTS task {task_id}: {text[:50]}{'...' if len(text) > 50 else ''}")
+            logger.debug("Processing TTS task %s: %.50s", task_id, text)
             
             # Auto-detect or use configured language
             if self.auto_detect_language:
                 detected_language = self.detect_language(text)
                 current_speaker = default_speakers[detected_language]
-                print(f"Task {task_id}: Auto-detected language: {detected_language}, speaker: {current_speaker}")
+                logger.debug("Task %s: auto-detected language: %s, speaker: %s", task_id, detected_language, current_speaker)
             else:
                 detected_language = self.language
                 current_speaker = self.speaker
-                print(f"Task {task_id}: Using configured language: {detected_language}, speaker: {current_speaker}")
+                logger.debug("Task %s: using configured language: %s, speaker: %s", task_id, detected_language, current_speaker)
             
             voice = language_dict[detected_language][current_speaker]
               # Generate audio file using async function
@@ -544,85 +650,46 @@ class RealTimeTTS:
                 communicate = edge_tts.Communicate(text, voice)
                 
                 # Create unique filename for this specific task
-                audio_dir = Path("static/audio")
-                audio_dir.mkdir(parents=True, exist_ok=True)
-                unique_filename = f"{task_id}_{uuid.uuid4().hex}.wav"
-                audio_file_path = audio_dir / unique_filename
+                audio_file_path = self.new_audio_file_path(prefix=f"{task_id}_")
                 
-                await communicate.save(str(audio_file_path))
-                return str(audio_file_path)
+                with time_stage("tts_synthesis"):
+                    await self._save_speech(communicate, audio_file_path)
+                return audio_file_path
             
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            audio_file_path = loop.run_until_complete(generate_audio())
-            loop.close()
+            audio_file_path = self.engine_loop.run(generate_audio())
               # Store result with task ID
             with self.result_lock:
-                self.task_results[task_id] = audio_file_path
                 # Clean up pending task reference
-                if task_id in self.pending_tasks:
-                    del self.pending_tasks[task_id]
+                self.pending_tasks.pop(task_id, None)
+            self.task_results.complete(task_id, audio_file_path)
             
-            print(f'Task {task_id} completed: Generated audio file: {audio_file_path}')
+            logger.debug("Task %s completed: generated audio file: %s", task_id, audio_file_path)
             
             # Update last audio file path for backward compatibility
             self.last_audio_file_path = audio_file_path
-              # Call completion callback if set
-            if self.playback_finished_callback:
-                def delayed_callback():
-                    time.sleep(0.3)
-                    self.playback_finished_callback()
-                
-                callback_thread = threading.Thread(target=delayed_callback)
-                callback_thread.daemon = True
-                callback_thread.start()
+            # Waiters on the task were woken by the completion above; the callback follows at once
+            self._notify_playback_finished()
             
             return audio_file_path
             
         except Exception as e:
-            print(f"TTS error for task {task_id}: {e}")
+            logger.error("TTS error for task %s: %s", task_id, e)
             
             # Store error result
             with self.result_lock:
-                self.task_results[task_id] = {"error": str(e), "audio_file": None}
-                if task_id in self.pending_tasks:
-                    del self.pending_tasks[task_id]
-            
-            if self.playback_finished_callback:
-                self.playback_finished_callback()
+                self.pending_tasks.pop(task_id, None)
+            self.task_results.fail(task_id, str(e))
+            self._notify_playback_finished()
             
             return None
         finally:
             self._cleanup_completed_tasks()
     
     def cleanup_completed_tasks_synchronized(self):
-        """Clean up completed task results to prevent memory leaks"""
-        with self.result_lock:
-            # Remove completed tasks older than 5 minutes
-            current_time = time.time()
-            tasks_to_remove = []
-            
-            for task_id, result in self.task_results.items():
-                # Extract timestamp from task_id
-                try:
-                    timestamp_str = task_id.split('_')[-1]
-                    task_timestamp = int(timestamp_str) / 1000  # Convert from milliseconds
-                    
-                    # If task is older than 5 minutes and completed, remove it
-                    if current_time - task_timestamp > 300 and result is not None:
-                        tasks_to_remove.append(task_id)
-                except (ValueError, IndexError):
-                    # If we can't parse timestamp, check if it's been there a while
-                    if result is not None:  # Only remove completed tasks
-                        tasks_to_remove.append(task_id)
-            
-            for task_id in tasks_to_remove:
-                del self.task_results[task_id]
-                if task_id in self.task_completion_callbacks:
-                    del self.task_completion_callbacks[task_id]
-            
-            if tasks_to_remove:
-                print(f"Cleaned up {len(tasks_to_remove)} completed TTS tasks")
+        """Drop expired task results now; the store also evicts on its own as results arrive."""
+        removed = self.task_results.purge_expired()
+        if removed:
+            logger.debug("Cleaned up %d completed TTS tasks", removed)
     
     def get_task_status(self, task_id):
         """Get the status of a specific task"""
@@ -632,14 +699,10 @@ class RealTimeTTS:
                 if future.done():
                     return "completed" if not future.exception() else "failed"
                 return "processing"
-            elif task_id in self.task_results:
-                result = self.task_results[task_id]
-                if result is None:
-                    return "pending"
-                elif isinstance(result, dict) and "error" in result:
-                    return "failed"
-                return "completed"
-            return "unknown"
+        completion = self.task_results.get(task_id)
+        if completion is not None:
+            return "failed" if completion.failed else "completed"
+        return "unknown"
     
     def cancel_task(self, task_id):
         """Cancel a pending or processing task"""
@@ -650,7 +713,7 @@ class RealTimeTTS:
                     cancelled = future.cancel()
                     if cancelled:
                         del self.pending_tasks[task_id]
-                        self.task_results[task_id] = {"error": "Task cancelled", "audio_file": None}
+                        self.task_results.fail(task_id, "Task cancelled")
                         return True
             return False
 
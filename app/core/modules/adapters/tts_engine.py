@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from typing import Any, Awaitable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TTSEventLoop:
+    """
+    One long-lived asyncio event loop on a dedicated daemon thread.
+
+    Synchronous code hands coroutines to it with submit() (a concurrent.futures.Future)
+    or run() (blocks for the result), so edge-tts syntheses from any thread multiplex
+    on a single loop instead of each creating and closing a loop of its own. Async
+    code should simply await the coroutine on its own loop.
+    """
+
+    def __init__(self, name: str = "TTSEngineLoop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        """Start the loop thread if it is not running and return the loop."""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                started = threading.Event()
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._loop, started), name=self.name, daemon=True)
+                self._thread.start()
+                started.wait()
+                logger.info("TTS engine loop started")
+            return self._loop
+
+    def submit(self, coroutine: Awaitable[Any]) -> concurrent.futures.Future:
+        """Schedule a coroutine on the engine loop from any other thread."""
+        loop = self.start()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("submit() called from the engine loop; await the coroutine instead")
+        return asyncio.run_coroutine_threadsafe(coroutine, loop)
+
+    def run(self, coroutine: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the engine loop and block the calling thread for its result."""
+        future = self.submit(coroutine)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"TTS synthesis did not finish within {timeout}s")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=timeout)
+        logger.info("TTS engine loop stopped")
+
+    @staticmethod
+    def _run(loop: asyncio.AbstractEventLoop, started: threading.Event) -> None:
+        asyncio.set_event_loop(loop)
+        loop.call_soon(started.set)
+        try:
+            loop.run_forever()
+        finally:
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.close()
+
+
+_engine_loop = TTSEventLoop()
+
+
+def get_tts_event_loop() -> TTSEventLoop:
+    """Return the process-wide TTS engine loop."""
+    return _engine_loop
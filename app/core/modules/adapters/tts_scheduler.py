@@ -0,0 +1,190 @@
+import asyncio
+import heapq
+import itertools
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_SESSION = "default"
+
+
+class _SessionClock:
+    """Virtual clock of one session: when its next task may start under its fair share."""
+
+    __slots__ = ("virtual_finish", "last_key", "queued", "weight")
+
+    def __init__(self, weight: float):
+        self.virtual_finish = 0.0
+        self.last_key = 0.0
+        self.queued = 0
+        self.weight = weight
+
+
+class TTSScheduler:
+    """
+    Earliest-deadline-first TTS queue with per-session fair sharing.
+
+    Every task carries a deadline, taken from the time budget of the request that
+    produced it. Each session also has a virtual clock (VirtualClock fair queuing):
+    a task advances its session's clock by its estimated synthesis time divided by
+    the session's weight. A task is ordered by the later of its deadline and its
+    session's clock, so a session that queues more than its share of synthesis is
+    pushed back behind everyone else instead of starving them. Higher priority
+    classes still go first, ties are FIFO, and tasks whose deadline has passed are
+    handed to on_expired instead of being synthesized.
+
+    Exposes the subset of the queue.Queue API the adapter uses: put_nowait (raises
+    queue.Full), get (raises queue.Empty) and qsize, plus remove() for tasks whose
+    caller has gone away and wait_for_space(), which lets a coroutine sleep until a
+    task leaves a full queue instead of polling it.
+    """
+
+    def __init__(self, maxsize: int = 50, chars_per_second: float = 300.0,
+                 on_expired: Optional[Callable[[Any], None]] = None):
+        self.maxsize = maxsize
+        self.chars_per_second = chars_per_second
+        self.on_expired = on_expired
+        self._heap: List[Tuple[int, float, int, Any]] = []
+        self._sessions: Dict[str, _SessionClock] = {}
+        self._weights: Dict[str, float] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._space_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._closed = False
+
+    def set_weight(self, session_id: str, weight: float) -> None:
+        """Give a session a larger (or smaller) share of synthesis time; the default is 1."""
+        with self._lock:
+            self._weights[session_id] = weight
+            if session_id in self._sessions:
+                self._sessions[session_id].weight = weight
+
+    def put_nowait(self, task: Any) -> None:
+        """Queue a task with task.priority, task.deadline, task.session_id and task.text."""
+        now = time.time()
+        with self._lock:
+            if len(self._heap) >= self.maxsize:
+                raise queue.Full
+            session_id = task.session_id or DEFAULT_SESSION
+            clock = self._sessions.get(session_id)
+            if clock is None:
+                clock = self._sessions[session_id] = _SessionClock(self._weights.get(session_id, 1.0))
+
+            cost = self.estimate_seconds(task.text) / clock.weight
+            clock.virtual_finish = max(now, clock.virtual_finish) + cost
+            # Monotonic per session, so a session's own tasks stay in submission order
+            key = max(task.deadline, clock.virtual_finish, clock.last_key)
+            clock.last_key = key
+            clock.queued += 1
+
+            heapq.heappush(self._heap, (-task.priority, key, next(self._sequence), task))
+            self._not_empty.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """Return the next live task, blocking up to timeout. Returns None once closed."""
+        expired = []
+        try:
+            with self._not_empty:
+                end_time = time.time() + timeout if timeout is not None else None
+                while True:
+                    if self._closed:
+                        return None
+                    task = self._pop_live(expired)
+                    if task is not None:
+                        return task
+                    remaining = end_time - time.time() if end_time is not None else None
+                    if remaining is not None and remaining <= 0:
+                        raise queue.Empty
+                    self._not_empty.wait(remaining)
+        finally:
+            # Callbacks run outside the lock
+            if self.on_expired is not None:
+                for task in expired:
+                    self.on_expired(task)
+
+    def remove(self, task_id: str) -> Optional[Any]:
+        """Take a queued task out of the schedule by task.task_id; None if it is not queued."""
+        with self._lock:
+            for index, entry in enumerate(self._heap):
+                if entry[3].task_id == task_id:
+                    break
+            else:
+                return None
+            self._heap[index] = self._heap[-1]
+            self._heap.pop()
+            heapq.heapify(self._heap)
+            task = entry[3]
+            self._release_session(task)
+            self._notify_space()
+            return task
+
+    async def wait_for_space(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait without blocking the event loop until the queue has room (or is closed).
+        Returns False on timeout. Room is not reserved: put_nowait may still lose the race.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self._closed or len(self._heap) < self.maxsize:
+                return True
+            self._space_waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._space_waiters = [(l, f) for l, f in self._space_waiters if f is not future]
+
+    def qsize(self) -> int:
+        with self._lock:
+            return len(self._heap)
+
+    def close(self) -> None:
+        """Wake every consumer; get() returns None from now on."""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._notify_space()
+
+    def reopen(self) -> None:
+        with self._lock:
+            self._closed = False
+
+    def estimate_seconds(self, text: str) -> float:
+        return len(text) / self.chars_per_second
+
+    def _pop_live(self, expired: List[Any]) -> Optional[Any]:
+        now = time.time()
+        while self._heap:
+            _, _, _, task = heapq.heappop(self._heap)
+            self._release_session(task)
+            self._notify_space()
+            if task.deadline <= now:
+                expired.append(task)
+                continue
+            return task
+        return None
+
+    def _release_session(self, task: Any) -> None:
+        session_id = task.session_id or DEFAULT_SESSION
+        clock = self._sessions[session_id]
+        clock.queued -= 1
+        if clock.queued == 0:
+            # Sessions with nothing queued hold no state
+            del self._sessions[session_id]
+
+    def _notify_space(self) -> None:
+        # Called with the lock held; every waiter retries, losers wait again
+        waiters, self._space_waiters = self._space_waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(self._resolve, future)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future) -> None:
+        if not future.done():
+            future.set_result(None)
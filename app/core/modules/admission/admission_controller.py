@@ -0,0 +1,180 @@
+import os
+import math
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from app.core.modules.metrics.metrics import get_metrics_registry
+
+_rejections = get_metrics_registry().counter(
+    "voce_admission_rejections_total", "Work rejected by admission control, by stage and reason.",
+    ["stage", "reason"])
+
+
+class AdmissionRejected(Exception):
+    """Raised when work is shed instead of queued. The API turns it into 429 + Retry-After."""
+
+    def __init__(self, stage: str, reason: str, retry_after: int):
+        super().__init__(f"Server busy ({stage}: {reason}), retry after {retry_after}s")
+        self.stage = stage
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """An admitted request. Releasing it frees the slot and feeds the latency estimate."""
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._start = time.perf_counter()
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release_request(time.perf_counter() - self._start)
+
+    def __enter__(self) -> "AdmissionTicket":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+class AdmissionController:
+    """
+    Non-blocking admission control for the voice pipeline.
+
+    A request is admitted only while in-flight requests are under max_in_flight,
+    the TTS queue is shallower than max_tts_queue_depth and, once the server is
+    half busy, the recent latency (EWMA) is under latency_target. Each pipeline stage
+    (llm, tts, stt) also has its own concurrency limit. Nothing ever waits for a
+    slot: over-limit work raises AdmissionRejected straight away with a Retry-After
+    derived from the recent latency.
+    """
+
+    def __init__(self, max_in_flight: int = 20,
+                 stage_limits: Optional[Dict[str, int]] = None,
+                 max_tts_queue_depth: int = 40,
+                 latency_target: float = 10.0,
+                 latency_smoothing: float = 0.2,
+                 max_retry_after: int = 30):
+        self.max_in_flight = max_in_flight
+        self.stage_limits = dict(stage_limits or {"llm": 10, "tts": 6, "stt": 4})
+        self.max_tts_queue_depth = max_tts_queue_depth
+        self.latency_target = latency_target
+        self.latency_smoothing = latency_smoothing
+        self.max_retry_after = max_retry_after
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stage_in_flight: Dict[str, int] = {stage: 0 for stage in self.stage_limits}
+        self._latency_ewma: Optional[float] = None
+        self._queue_depth_provider: Optional[Callable[[], int]] = None
+
+    def set_queue_depth_provider(self, provider: Callable[[], int]) -> None:
+        """Set a callable returning the current TTS queue depth."""
+        self._queue_depth_provider = provider
+
+    def admit(self) -> AdmissionTicket:
+        """Admit a new request or raise AdmissionRejected."""
+        queue_depth = self._queue_depth()
+        with self._lock:
+            reason = None
+            if self._in_flight >= self.max_in_flight:
+                reason = "in_flight"
+            elif queue_depth >= self.max_tts_queue_depth:
+                reason = "tts_queue"
+            elif (self._latency_ewma is not None and self._latency_ewma > self.latency_target
+                  and self._in_flight >= self.max_in_flight // 2):
+                # Latency is degrading under load: shed before queues build up
+                reason = "latency"
+
+            if reason is None:
+                self._in_flight += 1
+                return AdmissionTicket(self)
+
+        self.reject("request", reason)
+
+    @contextmanager
+    def stage(self, stage: str):
+        """Hold one concurrency slot of a pipeline stage for the enclosed block."""
+        limit = self.stage_limits.get(stage)
+        if limit is None:
+            yield
+            return
+
+        with self._lock:
+            admitted = self._stage_in_flight[stage] < limit
+            if admitted:
+                self._stage_in_flight[stage] += 1
+        if not admitted:
+            self.reject(stage, "concurrency")
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._stage_in_flight[stage] -= 1
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "max_in_flight": self.max_in_flight,
+                "stage_in_flight": dict(self._stage_in_flight),
+                "stage_limits": dict(self.stage_limits),
+                "latency_ewma": self._latency_ewma,
+                "tts_queue_depth": self._queue_depth()
+            }
+
+    def reject(self, stage: str, reason: str) -> None:
+        """Count a rejection and raise AdmissionRejected with the current Retry-After."""
+        with self._lock:
+            retry_after = self._retry_after()
+        _rejections.inc(stage=stage, reason=reason)
+        raise AdmissionRejected(stage, reason, retry_after)
+
+    def _release_request(self, latency: float) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if self._latency_ewma is None:
+                self._latency_ewma = latency
+            else:
+                self._latency_ewma += self.latency_smoothing * (latency - self._latency_ewma)
+
+    def _retry_after(self) -> int:
+        # Roughly one request's worth of time, so a retry lands after a slot frees up
+        estimate = self._latency_ewma if self._latency_ewma is not None else 1.0
+        return max(1, min(self.max_retry_after, math.ceil(estimate)))
+
+    def _queue_depth(self) -> int:
+        if self._queue_depth_provider is None:
+            return 0
+        try:
+            return self._queue_depth_provider()
+        except Exception:
+            return 0
+
+
+_admission_controller = None
+_admission_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """Return the process-wide admission controller, configured from the environment."""
+    global _admission_controller
+    with _admission_controller_lock:
+        if _admission_controller is None:
+            _admission_controller = AdmissionController(
+                max_in_flight=int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "20")),
+                stage_limits={
+                    "llm": int(os.getenv("ADMISSION_LLM_CONCURRENCY", "10")),
+                    "tts": int(os.getenv("ADMISSION_TTS_CONCURRENCY", "6")),
+                    "stt": int(os.getenv("ADMISSION_STT_CONCURRENCY", "4"))
+                },
+                max_tts_queue_depth=int(os.getenv("ADMISSION_MAX_TTS_QUEUE", "40")),
+                latency_target=float(os.getenv("ADMISSION_LATENCY_TARGET", "10"))
+            )
+        return _admission_controller
@@ -0,0 +1,306 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.modules.audio.artifact_registry import AudioArtifact, AudioArtifactRegistry
+from app.core.modules.state.state_backend import StateBackend, get_state_backend
+
+logger = logging.getLogger(__name__)
+
+
+class AudioArtifactManager:
+    """
+    Owns the generated audio files under static/audio.
+
+    New files are placed in sharded subdirectories (static/audio/ab/<uuid>.mp3) so
+    no single directory grows huge, and are tracked in an AudioArtifactRegistry
+    ordered by creation time. A background collector evicts files older than max_age and,
+    when the disk quota is exceeded, the oldest files first, in small batches.
+    Files still referenced by a live session are never evicted.
+
+    With a shared StateBackend, artifact metadata and session bindings are also
+    published there so any worker can serve audio generated by another, and only
+    the worker holding the "audio_gc" lease runs the collector.
+    """
+
+    ARTIFACTS_NAMESPACE = "audio_artifacts"  # path -> artifact record
+    SESSIONS_NAMESPACE = "audio_sessions"  # session_id -> path
+    HASHES_NAMESPACE = "audio_hashes"  # content_hash -> path
+
+    def __init__(self, root_dir: str = os.path.join("static", "audio"),
+                 max_bytes: int = 1024 * 1024 * 1024,
+                 max_age_seconds: float = 24 * 3600,
+                 gc_interval: float = 300.0,
+                 batch_size: int = 500,
+                 shard_chars: int = 2,
+                 state: Optional[StateBackend] = None):
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.gc_interval = gc_interval
+        self.batch_size = batch_size
+        self.shard_chars = shard_chars
+        # Only a shared backend is worth the extra writes; a local one would duplicate the registry
+        self.state = state if state is not None and state.shared else None
+        self._owner_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        self.registry = AudioArtifactRegistry()
+        self._lock = threading.Lock()
+        self._evicted_files = 0
+        self._evicted_bytes = 0
+        self._last_gc_time = None
+
+        self._protected_paths_provider: Optional[Callable[[], Set[str]]] = None
+        self._stop_event = threading.Event()
+        self._gc_thread = None
+
+    def new_path(self, prefix: str = "", extension: str = ".mp3") -> str:
+        """Return a fresh, unique path for a generated audio file in its shard directory."""
+        name = uuid.uuid4().hex
+        shard_dir = os.path.join(self.root_dir, name[:self.shard_chars])
+        os.makedirs(shard_dir, exist_ok=True)
+        return os.path.join(shard_dir, f"{prefix}{name}{extension}")
+
+    def register(self, path: str, content_hash: Optional[str] = None) -> Optional[AudioArtifact]:
+        """Record a file that has just been written. This is the only stat an artifact needs."""
+        abs_path = os.path.abspath(path)
+        try:
+            stat = os.stat(abs_path)
+        except OSError:
+            return None
+
+        artifact = self.registry.add(AudioArtifact(
+            path=abs_path,
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+            content_hash=content_hash
+        ))
+        self._publish(artifact)
+        return artifact
+
+    def remove(self, path: str) -> None:
+        """Forget a file that was deleted outside the collector."""
+        artifact = self.registry.discard(os.path.abspath(path))
+        if artifact is not None:
+            self._unpublish(artifact)
+
+    def bind_session(self, session_id: str, path: str) -> Optional[AudioArtifact]:
+        """Bind a generated file to the session it answers, registering it if TTS did not."""
+        abs_path = os.path.abspath(path)
+        artifact = self.registry.bind_session(session_id, abs_path)
+        if artifact is None and self.register(abs_path) is not None:
+            artifact = self.registry.bind_session(session_id, abs_path)
+        if artifact is not None and self.state is not None:
+            self._publish(artifact)
+            self.state.set(self.SESSIONS_NAMESPACE, session_id, abs_path, ttl=self.max_age_seconds)
+        return artifact
+
+    def resolve(self, session_id: str) -> Optional[AudioArtifact]:
+        """Return the current audio artifact for a session with a single lookup."""
+        if self.state is None:
+            return self.registry.resolve(session_id)
+
+        # The binding may have been made by another worker, so the backend is authoritative
+        path = self.state.get(self.SESSIONS_NAMESPACE, session_id)
+        if path is None:
+            return None
+        artifact = self._adopt(path)
+        if artifact is not None:
+            self.registry.bind_session(session_id, path)
+        return artifact
+
+    def find_by_hash(self, content_hash: str) -> Optional[AudioArtifact]:
+        """Return an artifact by content hash, including ones written by other workers."""
+        artifact = self.registry.find_by_hash(content_hash)
+        if artifact is None and self.state is not None:
+            path = self.state.get(self.HASHES_NAMESPACE, content_hash)
+            artifact = self._adopt(path) if path else None
+        return artifact
+
+    def set_protected_paths_provider(self, provider: Callable[[], Set[str]]) -> None:
+        """Set a callable returning the paths still referenced by live sessions."""
+        self._protected_paths_provider = provider
+
+    def url_path(self, path: str) -> str:
+        """Return the path of an artifact relative to the static mount, with forward slashes."""
+        static_root = os.path.dirname(os.path.abspath(self.root_dir))
+        return os.path.relpath(os.path.abspath(path), static_root).replace(os.sep, "/")
+
+    def collect(self) -> int:
+        """Run one eviction pass. Returns the number of files removed."""
+        protected = self._protected_paths()
+        removed = 0
+
+        while not self._stop_event.is_set():
+            batch = self._next_batch(protected)
+            if not batch:
+                break
+
+            for artifact in batch:
+                try:
+                    os.unlink(artifact.path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning("Could not evict audio file %s: %s", artifact.path, e)
+                    protected.add(artifact.path)
+                    continue
+                if self.registry.discard(artifact.path) is not None:
+                    self._unpublish(artifact)
+                    with self._lock:
+                        self._evicted_files += 1
+                        self._evicted_bytes += artifact.size
+                removed += 1
+
+            # Yield between batches so eviction never hogs the disk
+            self._stop_event.wait(0.01)
+
+        self._last_gc_time = time.time()
+        if removed:
+            logger.info("Audio artifacts: evicted %d files.", removed)
+        return removed
+
+    def scan(self) -> int:
+        """Index files already on disk, including legacy unsharded ones. Returns the file count."""
+        found: List[Tuple[float, str, int]] = []
+        for dirpath, _, filenames in os.walk(self.root_dir):
+            for filename in filenames:
+                if filename.endswith(".part"):
+                    continue
+                path = os.path.abspath(os.path.join(dirpath, filename))
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, path, stat.st_size))
+
+        found.sort()
+        for mtime, path, size in found:
+            if path not in self.registry:
+                # Hashes of pre-existing files are computed lazily when first served
+                self.registry.add(AudioArtifact(path=path, size=size, mtime=mtime))
+        # Keep the registry ordered oldest first after merging
+        self.registry.reorder_by_mtime()
+        return len(found)
+
+    def start(self) -> None:
+        """Index existing files and start the background collector."""
+        if self._gc_thread and self._gc_thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        os.makedirs(self.root_dir, exist_ok=True)
+
+        def gc_loop():
+            try:
+                self.scan()
+            except Exception as e:
+                logger.warning("Audio artifact scan failed: %s", e)
+            while not self._stop_event.is_set():
+                try:
+                    if self._holds_gc_lease():
+                        if self.state is not None:
+                            # Pick up files written by the other workers since the last pass
+                            self.scan()
+                        self.collect()
+                except Exception as e:
+                    logger.warning("Audio artifact collection failed: %s", e)
+                self._stop_event.wait(self.gc_interval)
+
+        self._gc_thread = threading.Thread(target=gc_loop, daemon=True, name="AudioArtifactGCThread")
+        self._gc_thread.start()
+
+    def stop(self) -> None:
+        """Stop the background collector."""
+        self._stop_event.set()
+        if self._gc_thread and self._gc_thread.is_alive():
+            self._gc_thread.join(timeout=5.0)
+        self._gc_thread = None
+
+    def recent_files(self, limit: int = 5) -> List[str]:
+        """Return the most recently written artifacts, newest first."""
+        return [self.url_path(artifact.path) for artifact in self.registry.newest(limit)]
+
+    def stats(self) -> Dict[str, object]:
+        """Return disk usage and eviction counters."""
+        registry_stats = self.registry.stats()
+        with self._lock:
+            return {
+                "root_dir": self.root_dir,
+                **registry_stats,
+                "max_bytes": self.max_bytes,
+                "max_age_seconds": self.max_age_seconds,
+                "evicted_files": self._evicted_files,
+                "evicted_bytes": self._evicted_bytes,
+                "last_gc_time": self._last_gc_time,
+                "gc_running": bool(self._gc_thread and self._gc_thread.is_alive())
+            }
+
+    def _holds_gc_lease(self) -> bool:
+        if self.state is None:
+            return True
+        return self.state.acquire_lease("audio_gc", self._owner_id, ttl=self.gc_interval * 3)
+
+    def _publish(self, artifact: AudioArtifact) -> None:
+        if self.state is None:
+            return
+        self.state.set(self.ARTIFACTS_NAMESPACE, artifact.path, asdict(artifact))
+        if artifact.content_hash:
+            self.state.set(self.HASHES_NAMESPACE, artifact.content_hash, artifact.path)
+
+    def _unpublish(self, artifact: AudioArtifact) -> None:
+        if self.state is None:
+            return
+        record = self.state.get(self.ARTIFACTS_NAMESPACE, artifact.path) or {}
+        self.state.delete(self.ARTIFACTS_NAMESPACE, artifact.path)
+        content_hash = artifact.content_hash or record.get("content_hash")
+        if content_hash and self.state.get(self.HASHES_NAMESPACE, content_hash) == artifact.path:
+            self.state.delete(self.HASHES_NAMESPACE, content_hash)
+
+    def _adopt(self, path: str) -> Optional[AudioArtifact]:
+        """Return the local artifact for path, loading another worker's record if needed."""
+        artifact = self.registry.get(path)
+        if artifact is not None:
+            return artifact
+        record = self.state.get(self.ARTIFACTS_NAMESPACE, path) if self.state is not None else None
+        if record is None:
+            return None
+        return self.registry.add(AudioArtifact(**record))
+
+    def _protected_paths(self) -> Set[str]:
+        if not self._protected_paths_provider:
+            return set()
+        try:
+            return {os.path.abspath(path) for path in self._protected_paths_provider() if path}
+        except Exception as e:
+            logger.warning("Could not load protected audio paths: %s", e)
+            return set()
+
+    def _next_batch(self, protected: Set[str]) -> List[AudioArtifact]:
+        """Pick up to batch_size eviction candidates: expired files first, then oldest over quota."""
+        cutoff = time.time() - self.max_age_seconds
+        return self.registry.eviction_candidates(cutoff, self.max_bytes, protected, self.batch_size)
+
+
+_artifact_manager = None
+_artifact_manager_lock = threading.Lock()
+
+
+def get_artifact_manager() -> AudioArtifactManager:
+    """Return the process-wide artifact manager, configured from the environment."""
+    global _artifact_manager
+    with _artifact_manager_lock:
+        if _artifact_manager is None:
+            _artifact_manager = AudioArtifactManager(
+                root_dir=os.getenv("AUDIO_DIR", os.path.join("static", "audio")),
+                max_bytes=int(float(os.getenv("AUDIO_DISK_QUOTA_MB", "1024")) * 1024 * 1024),
+                max_age_seconds=float(os.getenv("AUDIO_MAX_AGE_SECONDS", str(24 * 3600))),
+                gc_interval=float(os.getenv("AUDIO_GC_INTERVAL", "300")),
+                batch_size=int(os.getenv("AUDIO_GC_BATCH_SIZE", "500")),
+                state=get_state_backend()
+            )
+        return _artifact_manager
@@ -0,0 +1,154 @@
+import hashlib
+import heapq
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+
+@dataclass
+class AudioArtifact:
+    path: str  # absolute path on disk
+    size: int
+    mtime: float
+    content_hash: Optional[str] = None
+    session_id: Optional[str] = None
+
+
+def hash_file(path: str, chunk_size: int = 64 * 1024) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as audio_file:
+        for chunk in iter(lambda: audio_file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AudioArtifactRegistry:
+    """
+    In-memory index of generated audio files.
+
+    TTS records every file it produces together with its size, mtime and content
+    hash, and the API binds the file to the session it was generated for. Lookups
+    by path or by session are plain dictionary reads, so serving audio never needs
+    to probe the filesystem. Artifacts are kept oldest first for eviction, and can
+    also be looked up by content hash for immutable, content-addressed URLs.
+    """
+
+    def __init__(self):
+        self._artifacts: "OrderedDict[str, AudioArtifact]" = OrderedDict()
+        self._sessions: Dict[str, str] = {}  # session_id -> path
+        self._hashes: Dict[str, str] = {}  # content_hash -> path
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, artifact: AudioArtifact) -> AudioArtifact:
+        """Record an artifact, replacing any previous entry for the same path."""
+        with self._lock:
+            previous = self._artifacts.pop(artifact.path, None)
+            if previous is not None:
+                self._total_bytes -= previous.size
+                artifact.session_id = artifact.session_id or previous.session_id
+            self._artifacts[artifact.path] = artifact
+            self._total_bytes += artifact.size
+            if artifact.content_hash:
+                self._hashes[artifact.content_hash] = artifact.path
+            return artifact
+
+    def get(self, path: str) -> Optional[AudioArtifact]:
+        with self._lock:
+            return self._artifacts.get(path)
+
+    def discard(self, path: str) -> Optional[AudioArtifact]:
+        """Forget an artifact and any session binding to it."""
+        with self._lock:
+            artifact = self._artifacts.pop(path, None)
+            if artifact is None:
+                return None
+            self._total_bytes -= artifact.size
+            if artifact.session_id and self._sessions.get(artifact.session_id) == path:
+                del self._sessions[artifact.session_id]
+            if artifact.content_hash and self._hashes.get(artifact.content_hash) == path:
+                del self._hashes[artifact.content_hash]
+            return artifact
+
+    def bind_session(self, session_id: str, path: str) -> Optional[AudioArtifact]:
+        """Make path the current audio for session_id. Returns None if the path is unknown."""
+        with self._lock:
+            artifact = self._artifacts.get(path)
+            if artifact is None:
+                return None
+            artifact.session_id = session_id
+            self._sessions[session_id] = path
+            return artifact
+
+    def resolve(self, session_id: str) -> Optional[AudioArtifact]:
+        """Return the current audio artifact for a session."""
+        with self._lock:
+            path = self._sessions.get(session_id)
+            return self._artifacts.get(path) if path else None
+
+    def find_by_hash(self, content_hash: str) -> Optional[AudioArtifact]:
+        """Return an artifact whose contents hash to content_hash."""
+        with self._lock:
+            path = self._hashes.get(content_hash)
+            return self._artifacts.get(path) if path else None
+
+    def ensure_hash(self, artifact: AudioArtifact) -> str:
+        """Return the artifact's content hash, computing it once for files indexed without one."""
+        if artifact.content_hash is None:
+            content_hash = hash_file(artifact.path)
+            with self._lock:
+                artifact.content_hash = content_hash
+                if artifact.path in self._artifacts:
+                    self._hashes.setdefault(content_hash, artifact.path)
+        return artifact.content_hash
+
+    def eviction_candidates(self, cutoff: float, max_bytes: int, protected: Set[str],
+                            limit: int) -> List[AudioArtifact]:
+        """Oldest-first artifacts that are older than cutoff or must go to get under max_bytes."""
+        candidates = []
+        with self._lock:
+            remaining_bytes = self._total_bytes
+            for path, artifact in self._artifacts.items():
+                if len(candidates) >= limit:
+                    break
+                if artifact.mtime >= cutoff and remaining_bytes <= max_bytes:
+                    # Oldest first, so nothing further is eligible
+                    break
+                if path in protected:
+                    continue
+                candidates.append(artifact)
+                remaining_bytes -= artifact.size
+        return candidates
+
+    def newest(self, limit: int) -> List[AudioArtifact]:
+        with self._lock:
+            return heapq.nlargest(limit, self._artifacts.values(), key=lambda artifact: artifact.mtime)
+
+    def reorder_by_mtime(self) -> None:
+        """Restore oldest-first ordering after bulk-loading files found on disk."""
+        with self._lock:
+            ordered = sorted(self._artifacts.items(), key=lambda item: item[1].mtime)
+            self._artifacts = OrderedDict(ordered)
+
+    def __contains__(self, path: str) -> bool:
+        with self._lock:
+            return path in self._artifacts
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._artifacts)
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total_bytes
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "file_count": len(self._artifacts),
+                "total_bytes": self._total_bytes,
+                "bound_sessions": len(self._sessions)
+            }
@@ -0,0 +1,143 @@
+import os
+import stat
+import asyncio
+from email.utils import formatdate
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from app.core.modules.audio.artifact_registry import AudioArtifact, AudioArtifactRegistry
+
+# Content-addressed URLs never change meaning, so clients may cache them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Session URLs point at the latest answer, so clients revalidate with the ETag
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+def audio_media_type(audio_file_path: str) -> str:
+    """Return the media type for a generated audio file based on its extension."""
+    return "audio/wav" if audio_file_path.lower().endswith(".wav") else "audio/mpeg"
+
+
+def artifact_stat_result(artifact: AudioArtifact) -> os.stat_result:
+    """Build a stat result from registry metadata so FileResponse does not stat the file again."""
+    return os.stat_result((
+        stat.S_IFREG | 0o644, 0, 0, 1, 0, 0,
+        artifact.size, artifact.mtime, artifact.mtime, artifact.mtime
+    ))
+
+
+def content_addressed_name(artifact: AudioArtifact) -> str:
+    """Immutable file name for an artifact: its content hash plus the original extension."""
+    return f"{artifact.content_hash}{os.path.splitext(artifact.path)[1]}"
+
+
+def parse_range_header(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range `Range: bytes=...` header into an inclusive (start, end) pair.
+    Returns None when the header should be ignored (other units, multiple ranges) and
+    raises ValueError when the range cannot be satisfied.
+    """
+    units, _, ranges = range_header.partition("=")
+    if units.strip().lower() != "bytes" or "," in ranges:
+        return None
+
+    start_str, _, end_str = ranges.strip().partition("-")
+    try:
+        if not start_str:
+            # Suffix range: the last N bytes
+            length = int(end_str)
+            if length <= 0:
+                raise ValueError("Empty suffix range")
+            return max(size - length, 0), size - 1
+
+        start = int(start_str)
+        end = int(end_str) if end_str else size - 1
+    except ValueError:
+        raise ValueError(f"Malformed range: {range_header}")
+
+    if start >= size or start > end:
+        raise ValueError(f"Unsatisfiable range: {range_header}")
+    return start, min(end, size - 1)
+
+
+def _etag_matches(header_value: str, etag: str) -> bool:
+    candidates = [value.strip() for value in header_value.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _iter_file_range(path: str, start: int, end: int):
+    # A plain iterator: StreamingResponse runs each blocking read in its threadpool
+    with open(path, "rb") as audio_file:
+        audio_file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = audio_file.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def build_audio_response(request: Request, artifact: AudioArtifact,
+                               registry: AudioArtifactRegistry,
+                               cache_control: str = REVALIDATE_CACHE_CONTROL) -> Response:
+    """
+    Serve an audio artifact with a strong content-hash ETag, `If-None-Match`
+    revalidation (304) and single-range `Range` requests (206).
+    """
+    if artifact.content_hash is None:
+        # Files indexed from disk at startup are hashed once, off the event loop
+        await asyncio.to_thread(registry.ensure_hash, artifact)
+
+    etag = f'"{artifact.content_hash}"'
+    filename = os.path.basename(artifact.path)
+    headers: Dict[str, str] = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Last-Modified": formatdate(artifact.mtime, usegmt=True),
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"inline; filename={filename}",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET",
+        "Access-Control-Allow-Headers": "*",
+        "Access-Control-Expose-Headers": "ETag, Last-Modified, Content-Range, Accept-Ranges"
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = parse_range_header(range_header, artifact.size)
+        except ValueError:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{artifact.size}"}
+            )
+
+        if byte_range is not None:
+            start, end = byte_range
+            return StreamingResponse(
+                _iter_file_range(artifact.path, start, end),
+                status_code=206,
+                media_type=audio_media_type(artifact.path),
+                headers={
+                    **headers,
+                    "Content-Range": f"bytes {start}-{end}/{artifact.size}",
+                    "Content-Length": str(end - start + 1)
+                }
+            )
+
+    return FileResponse(
+        path=artifact.path,
+        media_type=audio_media_type(artifact.path),
+        stat_result=artifact_stat_result(artifact),
+        headers=headers
+    )
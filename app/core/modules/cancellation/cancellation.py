@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class OperationCancelled(Exception):
+    """Raised when work is abandoned because its caller cancelled it or went away."""
+
+    def __init__(self, reason: str = "cancelled"):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation signal shared by every stage working for one caller.
+
+    The HTTP/WebSocket layer creates a token per request (or per voice turn) and
+    cancels it when the client disconnects or barges in. Work holding the token stops
+    at its next check (raise_if_cancelled), awaits wrapped in run()/iterate() are
+    interrupted at once, and resources registered with add_callback (queued TTS tasks,
+    pending pool futures) are released. Thread-safe; cancel() is idempotent.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], Any]] = []
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """Cancel the token and run its callbacks. Returns False if it was already cancelled."""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        logger.debug("Cancellation requested: %s", reason)
+        for callback in callbacks:
+            self._invoke(callback)
+        return True
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise OperationCancelled(self.reason or "cancelled")
+
+    def add_callback(self, callback: Callable[[], Any]) -> Callable[[], None]:
+        """
+        Call callback on cancellation (at once if already cancelled). Returns a function
+        that unregisters it, for work that finishes before the token is cancelled.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove_callback(callback)
+        self._invoke(callback)
+        return lambda: None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until cancelled or timeout; returns whether the token is cancelled."""
+        return self._event.wait(timeout)
+
+    async def run(self, awaitable: Awaitable[Any]) -> Any:
+        """Await awaitable, cancelling it and raising OperationCancelled if the token fires first."""
+        self.raise_if_cancelled()
+        task = asyncio.ensure_future(awaitable)
+        loop = asyncio.get_running_loop()
+        remove = self.add_callback(lambda: loop.call_soon_threadsafe(task.cancel))
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if self.cancelled:
+                raise OperationCancelled(self.reason or "cancelled") from None
+            raise
+        finally:
+            remove()
+
+    async def iterate(self, iterable: AsyncIterable[Any]) -> AsyncIterator[Any]:
+        """Iterate an async iterable, interrupting the pending step once the token fires."""
+        iterator = iterable.__aiter__()
+        try:
+            while True:
+                try:
+                    item = await self.run(iterator.__anext__())
+                except StopAsyncIteration:
+                    return
+                yield item
+        finally:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    def _remove_callback(self, callback: Callable[[], Any]) -> None:
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
+    @staticmethod
+    def _invoke(callback: Callable[[], Any]) -> None:
+        try:
+            callback()
+        except Exception as e:
+            logger.warning("Cancellation callback failed: %s", e)
+
+
+@contextmanager
+def cancel_on_exit(token: CancellationToken, reason: str = "caller went away"):
+    """
+    Cancel token if the enclosed block of a coroutine or async generator is torn down
+    by task cancellation or generator close, so work it handed to other threads stops too.
+    """
+    try:
+        yield token
+    except (asyncio.CancelledError, GeneratorExit, OperationCancelled):
+        token.cancel(reason)
+        raise
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import unicodedata
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from app.core.modules.metrics.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_transcript(text: str) -> str:
+    """
+    Canonical form of a transcript for coalescing: case-folded, punctuation removed
+    and whitespace collapsed. Combining marks are kept, so Devanagari words stay distinct.
+    """
+    text = unicodedata.normalize("NFC", text).casefold()
+    text = "".join(" " if unicodedata.category(char).startswith("P") else char for char in text)
+    return " ".join(text.split())
+
+
+class _Flight:
+    """One shared computation: the events produced so far and the callers following it."""
+
+    def __init__(self):
+        self.events: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._signal = asyncio.Event()
+
+    def publish(self, event: Any) -> None:
+        self.events.append(event)
+        self._notify()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.done = True
+        self.error = error
+        self._notify()
+
+    async def wait(self) -> None:
+        await self._signal.wait()
+
+    def _notify(self) -> None:
+        signal, self._signal = self._signal, asyncio.Event()
+        signal.set()
+
+
+class RequestCoalescer:
+    """
+    Collapses identical concurrent requests into one in-flight computation per key.
+
+    The first caller for a key starts the work as a separate task; callers arriving
+    while it runs attach to it and receive the same result, or replay the same
+    stream of events from the beginning. The work is cancelled only when every
+    caller has gone away, so one client disconnecting does not fail the others.
+    Nothing is cached: once the computation finishes, the next caller starts afresh.
+    Lives on a single event loop (one per uvicorn worker).
+    """
+
+    def __init__(self, name: str, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Await factory() once for all concurrent callers with the same key."""
+        if not self.enabled:
+            return await factory()
+
+        async def single():
+            yield await factory()
+
+        result = None
+        async for result in self.stream(key, single):
+            pass
+        return result
+
+    async def stream(self, key: Hashable, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Iterate factory() once for all concurrent callers; each caller sees every event."""
+        if not self.enabled:
+            async for event in factory():
+                yield event
+            return
+
+        flight = self._flights.get(key)
+        record_cache_lookup("coalescing", hit=flight is not None)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            flight.task = asyncio.ensure_future(self._drive(key, flight, factory))
+        else:
+            logger.debug("Coalescing request into in-flight %s computation", self.name)
+
+        flight.followers += 1
+        try:
+            index = 0
+            while True:
+                while index < len(flight.events):
+                    yield flight.events[index]
+                    index += 1
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await flight.wait()
+        finally:
+            flight.followers -= 1
+            if flight.followers == 0 and not flight.done:
+                # Nobody is listening any more; later callers must not attach to a dying flight
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def _drive(self, key: Hashable, flight: _Flight, factory: Callable[[], AsyncIterator[Any]]) -> None:
+        try:
+            async for event in factory():
+                flight.publish(event)
+        except (asyncio.CancelledError, Exception) as e:
+            flight.finish(e)
+        else:
+            flight.finish()
+        finally:
+            # Callers arriving from now on start a new computation
+            if self._flights.get(key) is flight:
+                del self._flights[key]
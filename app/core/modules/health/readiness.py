@@ -0,0 +1,97 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+
+
+class ReadinessTracker:
+    """
+    Records the startup state and init time of each component. The service is ready
+    once every required component is ready and every optional one (warm-ups) has
+    finished; a failed warm-up only means the first request will be slower.
+    """
+
+    def __init__(self):
+        self._components: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._created_at = time.time()
+
+    def register(self, name: str, required: bool = True) -> None:
+        """Declare a component up front so /ready reports it before it starts."""
+        with self._lock:
+            self._components.setdefault(name, {
+                "state": PENDING, "required": required,
+                "duration_ms": None, "error": None, "_started": None
+            })
+
+    def start(self, name: str, required: bool = True) -> None:
+        self.register(name, required)
+        with self._lock:
+            self._components[name].update(state=STARTING, error=None, _started=time.perf_counter())
+
+    def ready(self, name: str) -> None:
+        self._finish(name, READY, None)
+
+    def fail(self, name: str, error: BaseException) -> None:
+        self._finish(name, FAILED, str(error) or type(error).__name__)
+
+    @contextmanager
+    def track(self, name: str, required: bool = True):
+        """Mark name as starting for the enclosed block, then ready or failed."""
+        self.start(name, required)
+        try:
+            yield
+        except BaseException as e:
+            self.fail(name, e)
+            raise
+        self.ready(name)
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            return bool(self._components) and all(
+                component["state"] == READY if component["required"]
+                else component["state"] in (READY, FAILED)
+                for component in self._components.values()
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            components = {
+                name: {key: value for key, value in component.items() if not key.startswith("_")}
+                for name, component in self._components.items()
+            }
+        return {
+            "ready": self.is_ready(),
+            "uptime_seconds": round(time.time() - self._created_at, 3),
+            "components": components
+        }
+
+    def _finish(self, name: str, state: str, error: Optional[str]) -> None:
+        with self._lock:
+            component = self._components.get(name)
+            if component is None:
+                return
+            started = component["_started"]
+            duration = (time.perf_counter() - started) * 1000 if started is not None else None
+            component.update(state=state, error=error,
+                             duration_ms=round(duration, 1) if duration is not None else None)
+        if state == FAILED:
+            logger.error("Component %s failed to start: %s", name, error)
+        else:
+            logger.info("Component %s ready in %.1f ms", name, duration or 0.0)
+
+
+_tracker = ReadinessTracker()
+
+
+def get_readiness_tracker() -> ReadinessTracker:
+    """Return the process-wide readiness tracker."""
+    return _tracker
@@ -0,0 +1,168 @@
+import time
+import uuid
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from app.core.modules.state.state_backend import StateBackend, get_state_backend
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+PROCESSING = "processing"
+TEXT_READY = "text_ready"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobManager:
+    """
+    Tracks assistant jobs submitted through the 202 Accepted API.
+
+    A job is a JSON record in the state backend, so any worker can report it, with a
+    version that increases on every change. The worker running a job wakes its local
+    waiters directly; waiters on other workers (shared backend) re-read the record
+    every poll_interval seconds.
+
+    Once a job's task ends, however it ends (including a cancel before it ever ran),
+    its on_done callback runs and a job left unfinished is marked cancelled, so neither
+    an admission slot nor a waiter is left behind.
+    """
+
+    NAMESPACE = "jobs"
+
+    def __init__(self, state: Optional[StateBackend] = None, ttl_seconds: float = 900.0,
+                 poll_interval: float = 0.25):
+        self.state = state or get_state_backend()
+        self.ttl_seconds = ttl_seconds
+        self.poll_interval = poll_interval
+        self._signals: Dict[str, asyncio.Event] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def create(self, session_id: str, transcript: str, include_audio: bool) -> Dict[str, Any]:
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "session_id": session_id,
+            "transcript": transcript,
+            "include_audio": include_audio,
+            "status": QUEUED,
+            "version": 1,
+            "created_at": time.time(),
+            "updated_at": time.time(),
+            "text": None,
+            "language": None,
+            "audio_url": None,
+            "immutable_audio_url": None,
+            "audio_segments": [],
+            "audio_incomplete": False,
+            "error": None
+        }
+        self.state.set(self.NAMESPACE, job["job_id"], job, ttl=self.ttl_seconds)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.state.get(self.NAMESPACE, job_id)
+
+    def update(self, job_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        """Apply fields to a job, bump its version and wake local waiters."""
+        # Only the worker running a job writes it, so read-modify-write is safe here
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.update(fields)
+        job["version"] += 1
+        job["updated_at"] = time.time()
+        self.state.set(self.NAMESPACE, job_id, job, ttl=self.ttl_seconds)
+
+        signal = self._signals.pop(job_id, None)
+        if signal is not None:
+            signal.set()
+        return job
+
+    def start(self, job_id: str, work: Awaitable[None],
+              on_done: Optional[Callable[[], None]] = None) -> None:
+        """
+        Run a job's coroutine in the background, keeping a reference until it finishes.
+        on_done runs when the task ends, whether it returned, raised or was cancelled.
+        """
+        task = asyncio.ensure_future(work)
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda t: self._finished(job_id, t, on_done))
+        logger.debug("Job %s started", job_id)
+
+    def _finished(self, job_id: str, task: asyncio.Task, on_done: Optional[Callable[[], None]]) -> None:
+        if self._tasks.get(job_id) is task:
+            del self._tasks[job_id]
+        try:
+            if on_done is not None:
+                on_done()
+        finally:
+            job = self.get(job_id)
+            if job is not None and job["status"] not in TERMINAL_STATES:
+                if task.cancelled():
+                    self.update(job_id, status=CANCELLED, error="Job was cancelled")
+                else:
+                    error = task.exception()
+                    self.update(job_id, status=FAILED, error=str(error) if error else "Job ended unfinished")
+            # A job that finished without a final update still has waiters to wake
+            signal = self._signals.pop(job_id, None)
+            if signal is not None:
+                signal.set()
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a running job on this worker. False if it is not running here."""
+        task = self._tasks.get(job_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        # Settle the record now rather than when the task gets to run its cancellation
+        self.update(job_id, status=CANCELLED, error="Job was cancelled")
+        logger.info("Job %s cancelled", job_id)
+        return True
+
+    async def wait(self, job_id: str, since_version: int = 0, timeout: float = 30.0) -> Optional[Dict[str, Any]]:
+        """
+        Long-poll: return the job as soon as its version exceeds since_version or it is
+        finished, or its current state once timeout expires. None if it does not exist.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in TERMINAL_STATES:
+                self._signals.pop(job_id, None)
+                return job
+            if job["version"] > since_version:
+                return job
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return job
+
+            signal = self._signals.setdefault(job_id, asyncio.Event())
+            # A job running on another worker never signals locally, so re-read periodically
+            step = min(remaining, self.poll_interval) if self.state.shared else remaining
+            try:
+                await asyncio.wait_for(signal.wait(), timeout=step)
+            except asyncio.TimeoutError:
+                pass
+
+    async def follow(self, job_id: str, timeout: float = 120.0) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the job each time it changes, ending once it is finished or timeout expires."""
+        deadline = time.monotonic() + timeout
+        version = 0
+        while True:
+            job = await self.wait(job_id, version, max(0.0, deadline - time.monotonic()))
+            if job is None:
+                return
+            if job["version"] > version:
+                version = job["version"]
+                yield job
+            if job["status"] in TERMINAL_STATES or time.monotonic() >= deadline:
+                return
+
+    def cancel_all(self) -> None:
+        """Cancel every job running on this worker (shutdown), marking each cancelled."""
+        for job_id in list(self._tasks):
+            self.cancel(job_id)
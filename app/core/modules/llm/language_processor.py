@@ -2,22 +2,29 @@ import os
 import uuid
 import time
 import hashlib
-from typing import Optional, Dict, Any, List
-from concurrent.futures import ThreadPoolExecutor
-from threading import Lock, RLock
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
 import threading
+import logging
+import httpx
 from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
 from dotenv import load_dotenv
 from app.helper.get_config import load_yaml
+from app.core.modules.state.state_backend import get_state_backend
+from app.core.modules.session.conversation_store import get_conversation_store
+from app.core.modules.metrics.metrics import (
+    MeteredThreadPoolExecutor, observe_stage, record_cache_lookup, time_stage)
+from app.core.modules.cancellation.cancellation import CancellationToken, OperationCancelled
 
 # Import web scraper for enhanced context retrieval
 from app.core.modules.web_scraper.web_scraper import (
-    get_travel_data_for_voce
+    get_travel_data_for_voce,
+    aget_travel_data_for_voce
 )
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 
 class LanguageProcessor:
     def __init__(self, api_key: Optional[str] = None, model_name: str = load_yaml('MODEL_ID'),
@@ -28,11 +35,12 @@ class LanguageProcessor:
 
         # Concurrency and Caching Setup
         self.max_workers = max_workers
-        self.thread_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="LangProc-Worker")
-        self.processing_lock = RLock()
-        self.web_cache = {}
+        self.thread_pool = MeteredThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="LangProc-Worker")
+        # Web cache and conversation history live in the state backend so all workers share them
+        self.state = get_state_backend()
+        # History is kept per session, so callers never see each other's turns
+        self.conversations = get_conversation_store()
         self.web_cache_ttl = web_cache_ttl
-        self.web_cache_lock = Lock()
         self._start_cache_cleanup_thread()
 
         # API and Model Setup
@@ -50,13 +58,14 @@ class LanguageProcessor:
 
         # Language and Conversation Setup
         self.conversation_id = str(uuid.uuid4())
-        self.conversation_history: List[Dict[str, str]] = []
         self.response_language = response_language
         self.allow_mixed_language = allow_mixed_language
         self.system_prompt = self._get_language_aware_system_prompt()
 
         # Web Scraper Configuration
         self.use_web_scraper = use_web_scraper
+        # Shared SERP client so lookups reuse connections; created on the serving event loop
+        self._http_client: Optional[httpx.AsyncClient] = None
 
 
     def _get_language_aware_system_prompt(self, language: Optional[str] = None) -> str:
@@ -88,124 +97,267 @@ class LanguageProcessor:
 
     def process_query(self, user_input: str, context: Optional[Dict[str, Any]] = None,
                       force_language: Optional[str] = None,
-                      use_web_context: bool = True, max_web_results: int = 10) -> Dict[str, Any]:
+                      use_web_context: bool = True, max_web_results: int = 10,
+                      cancel_token: Optional[CancellationToken] = None,
+                      session_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Processes a user query by fetching context from a web scraper, then generating a response with an LLM.
+        The prompt includes, and the turn is recorded in, session_id's conversation history.
+        A cancelled cancel_token stops the query between stages with OperationCancelled:
+        the web searches stop being waited for at once, but a chain.invoke already under
+        way cannot be aborted and runs to completion first (its answer is discarded).
+        Callers that need to cut the LLM call short should use aprocess_query.
+        Queries from many threads run concurrently: only the shared web cache and
+        history are locked, by the state backend and the conversation store.
         """
-        with self.processing_lock:
-            try:
-                detected_language = self._detect_input_language(user_input)
-                current_language = force_language or detected_language
-
-                # === Web Context and Intent Retrieval ===
-                web_context_str = ""
-                intent_context_str = ""
-                if self.use_web_scraper and use_web_context:
-                    web_data = self._get_web_context(user_input, max_web_results)
-                    web_context_str = web_data.get("context_str", "")
-                    query_analysis = web_data.get("analysis")
-                    
-                    if query_analysis:
-                        intent = query_analysis.get('intent', 'general')
-                        location = query_analysis.get('location', 'not specified')
-                        intent_context_str = (
-                            f"\n\n=== USER INTENT ANALYSIS ===\n"
-                            f"Detected Intent: {intent}\n"
-                            f"Detected Location: {location}"
-                        )
-
-                # === Prepare Final Input and Generate Response ===
-                conversation_context = self._get_formatted_conversation_history()
-                formatted_input = f"User Query: {user_input}"
-                if context:
-                    context_str = "\n".join([f"{k}: {v}" for k, v in context.items()])
-                    formatted_input = f"Provided Context:\n{context_str}\n\n{formatted_input}"
-
-                full_context = f"{conversation_context}{intent_context_str}{web_context_str}".strip()
-                if full_context:
-                    formatted_input += f"\n\n=== CONTEXT FOR YOUR ANSWER ===\n{full_context}"
-
-                system_prompt = self._get_language_aware_system_prompt(current_language)
-                chain = ChatPromptTemplate.from_messages([("system", system_prompt), ("human", "{input}")]) | self.llm
+        cancel_token = cancel_token or CancellationToken()
+        try:
+            web_data = None
+            if self.use_web_scraper and use_web_context:
+                web_data = self._get_web_context(user_input, max_web_results, cancel_token)
+
+            system_prompt, formatted_input = self._prepare_prompt(
+                user_input, context, force_language, web_data, session_id)
+            chain = self._build_chain(system_prompt)
 
+            cancel_token.raise_if_cancelled()
+            with time_stage("llm_total"):
                 response = chain.invoke({"input": formatted_input})
-                response_content = response.content
+            # Nobody is waiting for the answer, so it does not enter the history
+            cancel_token.raise_if_cancelled()
+            return self._finalize_response(user_input, response.content, session_id)
 
-                # Store interaction in memory
-                self.conversation_history.append({"role": "user", "content": user_input})
-                self.conversation_history.append({"role": "assistant", "content": response_content})
+        except OperationCancelled:
+            logger.info("Query cancelled: %s", cancel_token.reason)
+            raise
+        except Exception as e:
+            logger.error("Error processing query: %s", e)
+            error_message = "I apologize, but I encountered an error. Please try again."
+            return {"text": error_message, "language": "english"}
+
+    async def aprocess_query(self, user_input: str, context: Optional[Dict[str, Any]] = None,
+                             force_language: Optional[str] = None,
+                             use_web_context: bool = True, max_web_results: int = 10,
+                             cancel_token: Optional[CancellationToken] = None,
+                             session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Async variant of process_query. The web lookup and the Groq call are awaited on the
+        caller's event loop, so concurrent queries overlap their network waits. Cancelling
+        cancel_token aborts whichever of them is in flight.
+        """
+        cancel_token = cancel_token or CancellationToken()
+        try:
+            web_data = None
+            if self.use_web_scraper and use_web_context:
+                web_data = await self._aget_web_context(user_input, max_web_results, cancel_token)
 
-                # Return a dictionary with the text and detected language for TTS
-                return {
-                    "text": response_content,
-                    "language": self._get_tts_language(response_content)
-                }
+            system_prompt, formatted_input = self._prepare_prompt(
+                user_input, context, force_language, web_data, session_id)
+            chain = self._build_chain(system_prompt)
 
-            except Exception as e:
-                print(f"Error processing query: {str(e)}")
-                error_message = "I apologize, but I encountered an error. Please try again."
-                return {"text": error_message, "language": "english"}
+            with time_stage("llm_total"):
+                response = await cancel_token.run(chain.ainvoke({"input": formatted_input}))
+            return self._finalize_response(user_input, response.content, session_id)
 
-    def _get_web_context(self, user_input: str, max_results: int) -> Dict[str, Any]:
+        except OperationCancelled:
+            logger.info("Query cancelled: %s", cancel_token.reason)
+            raise
+        except Exception as e:
+            logger.error("Error processing query: %s", e)
+            error_message = "I apologize, but I encountered an error. Please try again."
+            return {"text": error_message, "language": "english"}
+
+    async def process_query_stream(self, user_input: str, context: Optional[Dict[str, Any]] = None,
+                                   force_language: Optional[str] = None,
+                                   use_web_context: bool = True,
+                                   max_web_results: int = 10,
+                                   cancel_token: Optional[CancellationToken] = None,
+                                   session_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams the response for a user query as the LLM generates it.
+        Yields {"type": "delta", "text": ...} events, then a single
+        {"type": "final", "text": ..., "language": ...} event with the full response.
+        Cancelling cancel_token closes the LLM stream and raises OperationCancelled.
+        """
+        cancel_token = cancel_token or CancellationToken()
+        chunks: List[str] = []
+        try:
+            web_data = None
+            if self.use_web_scraper and use_web_context:
+                web_data = await self._aget_web_context(user_input, max_web_results, cancel_token)
+
+            system_prompt, formatted_input = self._prepare_prompt(
+                user_input, context, force_language, web_data, session_id)
+            chain = self._build_chain(system_prompt)
+
+            llm_start = time.perf_counter()
+            async for chunk in cancel_token.iterate(chain.astream({"input": formatted_input})):
+                if chunk.content:
+                    if not chunks:
+                        observe_stage("llm_first_token", time.perf_counter() - llm_start)
+                    chunks.append(chunk.content)
+                    yield {"type": "delta", "text": chunk.content}
+            observe_stage("llm_total", time.perf_counter() - llm_start)
+
+            yield {"type": "final", **self._finalize_response(user_input, "".join(chunks), session_id)}
+
+        except OperationCancelled:
+            logger.info("Query stream cancelled after %d chunks: %s", len(chunks), cancel_token.reason)
+            raise
+        except Exception as e:
+            logger.error("Error streaming query: %s", e)
+            error_message = "I apologize, but I encountered an error. Please try again."
+            yield {"type": "final", "text": error_message, "language": "english", "error": str(e)}
+
+    def _prepare_prompt(self, user_input: str, context: Optional[Dict[str, Any]],
+                        force_language: Optional[str],
+                        web_data: Optional[Dict[str, Any]],
+                        session_id: Optional[str] = None) -> Tuple[str, str]:
+        """Builds the system prompt and the formatted human input for a query."""
+        detected_language = self.detect_language(user_input)
+        current_language = force_language or detected_language
+
+        # === Web Context and Intent Retrieval ===
+        web_context_str = ""
+        intent_context_str = ""
+        if web_data:
+            web_context_str = web_data.get("context_str", "")
+            query_analysis = web_data.get("analysis")
+
+            if query_analysis:
+                intent = query_analysis.get('intent', 'general')
+                location = query_analysis.get('location', 'not specified')
+                intent_context_str = (
+                    f"\n\n=== USER INTENT ANALYSIS ===\n"
+                    f"Detected Intent: {intent}\n"
+                    f"Detected Location: {location}"
+                )
+
+        # === Prepare Final Input ===
+        conversation_context = self._get_formatted_conversation_history(session_id)
+        formatted_input = f"User Query: {user_input}"
+        if context:
+            context_str = "\n".join([f"{k}: {v}" for k, v in context.items()])
+            formatted_input = f"Provided Context:\n{context_str}\n\n{formatted_input}"
+
+        full_context = f"{conversation_context}{intent_context_str}{web_context_str}".strip()
+        if full_context:
+            formatted_input += f"\n\n=== CONTEXT FOR YOUR ANSWER ===\n{full_context}"
+
+        return self._get_language_aware_system_prompt(current_language), formatted_input
+
+    def _build_chain(self, system_prompt: str):
+        """Builds the prompt | LLM chain for a system prompt."""
+        return ChatPromptTemplate.from_messages([("system", system_prompt), ("human", "{input}")]) | self.llm
+
+    def _finalize_response(self, user_input: str, response_content: str,
+                           session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Stores the interaction in the session's history and packages the response for TTS."""
+        self.conversations.append_turn(session_id, user_input, response_content)
+
+        # Return a dictionary with the text and detected language for TTS
+        return {
+            "text": response_content,
+            "language": self._get_tts_language(response_content)
+        }
+
+    def _get_web_context(self, user_input: str, max_results: int,
+                         cancel_token: Optional[CancellationToken] = None) -> Dict[str, Any]:
         """Retrieves context from the web, using a cache to avoid redundant lookups."""
-        query_key = hashlib.md5(user_input.lower().encode()).hexdigest()
-        
-        with self.web_cache_lock:
-            if query_key in self.web_cache:
-                cache_entry = self.web_cache[query_key]
-                if time.time() - cache_entry['timestamp'] < self.web_cache_ttl:
-                    print(f"✓ Using cached web context for query: '{user_input[:30]}...'")
-                    return cache_entry['data']
+        query_key = self._web_cache_key(user_input)
+        cached = self._get_cached_web_context(query_key, user_input)
+        if cached is not None:
+            return cached
 
         try:
-            print(f"▷ Fetching new web context for query: '{user_input[:30]}...'")
-            web_data = get_travel_data_for_voce(query=user_input)
-            
-            context_str = ""
-            if web_data.get("success"):
-                aggregated_data = web_data.get("aggregated_data", {})
-                summary_snippets = aggregated_data.get("summary_snippets", [])
-                
-                if summary_snippets:
-                    context_str = "\n\n=== REAL-TIME WEB CONTEXT ===\n" + "\n".join(
-                        [f"- {item.strip()}" for i, item in enumerate(list(set(summary_snippets))[:max_results], 1) if item.strip()]
-                    )
-
-            output_data = {
-                'context_str': context_str,
-                'analysis': web_data.get('query_analysis')
-            }
-
-            with self.web_cache_lock:
-                self.web_cache[query_key] = {'data': output_data, 'timestamp': time.time()}
-            
-            print(f"✓ Web context retrieved and cached for query: '{user_input[:30]}...'")
-            return output_data
+            logger.debug("Fetching new web context for query: %.30s", user_input)
+            with time_stage("web_fetch"):
+                web_data = get_travel_data_for_voce(query=user_input, cancel_token=cancel_token)
+            return self._store_web_context(query_key, user_input, web_data, max_results)
 
+        except OperationCancelled:
+            raise
         except Exception as e:
-            print(f"Warning: Error retrieving web context: {e}")
+            logger.warning("Error retrieving web context: %s", e)
             return {"context_str": "", "analysis": None}
 
+    async def _aget_web_context(self, user_input: str, max_results: int,
+                                cancel_token: Optional[CancellationToken] = None) -> Dict[str, Any]:
+        """Async variant of _get_web_context backed by the async SERP client."""
+        query_key = self._web_cache_key(user_input)
+        cached = self._get_cached_web_context(query_key, user_input)
+        if cached is not None:
+            return cached
+
+        try:
+            logger.debug("Fetching new web context for query: %.30s", user_input)
+            with time_stage("web_fetch"):
+                web_data = await aget_travel_data_for_voce(
+                    query=user_input, client=self._get_http_client(), cancel_token=cancel_token)
+            return self._store_web_context(query_key, user_input, web_data, max_results)
+
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            logger.warning("Error retrieving web context: %s", e)
+            return {"context_str": "", "analysis": None}
+
+    def _web_cache_key(self, user_input: str) -> str:
+        return hashlib.md5(user_input.lower().encode()).hexdigest()
+
+    def _get_cached_web_context(self, query_key: str, user_input: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached web context for a query if it has not expired."""
+        cached = self.state.get("web_cache", query_key)
+        record_cache_lookup("web", cached is not None)
+        if cached is not None:
+            logger.debug("Using cached web context for query: %.30s", user_input)
+        return cached
+
+    def _store_web_context(self, query_key: str, user_input: str,
+                           web_data: Dict[str, Any], max_results: int) -> Dict[str, Any]:
+        """Formats raw travel data into prompt context and caches it."""
+        context_str = ""
+        if web_data.get("success"):
+            aggregated_data = web_data.get("aggregated_data", {})
+            summary_snippets = aggregated_data.get("summary_snippets", [])
+
+            if summary_snippets:
+                context_str = "\n\n=== REAL-TIME WEB CONTEXT ===\n" + "\n".join(
+                    [f"- {item.strip()}" for i, item in enumerate(list(set(summary_snippets))[:max_results], 1) if item.strip()]
+                )
+
+        output_data = {
+            'context_str': context_str,
+            'analysis': web_data.get('query_analysis')
+        }
+
+        self.state.set("web_cache", query_key, output_data, ttl=self.web_cache_ttl)
+
+        logger.debug("Web context retrieved and cached for query: %.30s", user_input)
+        return output_data
+
     def _start_cache_cleanup_thread(self):
         """Starts a background thread to periodically clean expired items from the web cache."""
         def cleanup_cache():
             while True:
                 time.sleep(600)  # Clean up every 10 minutes
-                with self.web_cache_lock:
-                    current_time = time.time()
-                    expired_keys = [
-                        key for key, entry in self.web_cache.items()
-                        if current_time - entry['timestamp'] > self.web_cache_ttl
-                    ]
-                    for key in expired_keys:
-                        del self.web_cache[key]
-                    if expired_keys:
-                        print(f"Cleaned up {len(expired_keys)} expired cache entries.")
+                try:
+                    removed = self.state.purge_expired("web_cache")
+                    if removed:
+                        logger.info("Cleaned up %d expired cache entries.", removed)
+                    idle = self.conversations.sweep()
+                    if idle:
+                        logger.info("Dropped %d idle conversations.", idle)
+                except Exception as e:
+                    logger.warning("Web cache cleanup failed: %s", e)
 
         threading.Thread(target=cleanup_cache, daemon=True, name="CacheCleanupThread").start()
 
-    def _detect_input_language(self, text: str) -> str:
-        """Simple language detection to guide the LLM's response style."""
+    def detect_language(self, text: str) -> str:
+        """
+        Simple language detection to guide the LLM's response style.
+        Returns "hindi" or "english"; callers may also use it to key cached answers.
+        """
         # This is a heuristic and can be replaced with a more robust library if needed
         hindi_chars = sum(1 for char in text if '\u0900' <= char <= '\u097F')
         if len(text) > 0 and (hindi_chars / len(text)) > 0.3:
@@ -220,29 +372,52 @@ class LanguageProcessor:
             return "Hindi"
         return "English"
 
-    def _get_formatted_conversation_history(self, max_history: int = 4) -> str:
-        """Formats the last few turns of the conversation for context."""
-        if not self.conversation_history:
+    def _get_formatted_conversation_history(self, session_id: Optional[str] = None,
+                                            max_history: int = 4) -> str:
+        """Formats the last few turns of the session's conversation for context."""
+        recent_history = self.conversations.history(session_id, max_history)
+        if not recent_history:
             return ""
         
-        history_str = "\n".join([f"{item['role'].capitalize()}: {item['content']}" for item in self.conversation_history[-max_history:]])
+        history_str = "\n".join([f"{item['role'].capitalize()}: {item['content']}" for item in recent_history])
         return f"\n\n=== RECENT CONVERSATION ===\n{history_str}"
 
+    def _get_http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                timeout=30, limits=httpx.Limits(keepalive_expiry=60.0))
+        return self._http_client
+
+    async def awarm_up_llm(self) -> None:
+        """Open the LLM client's connection with a one-token completion."""
+        await self.llm.bind(max_tokens=1).ainvoke([HumanMessage(content="ping")])
+
+    async def awarm_up_web(self) -> None:
+        """Resolve, connect and handshake with the SERP API so the first lookup skips it."""
+        if self.use_web_scraper:
+            await self._get_http_client().head("https://serpapi.com/")
+
+    async def aclose(self) -> None:
+        """Closes the shared SERP client."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
     def shutdown(self):
         """Shuts down the thread pool."""
-        print("Shutting down Language Processor thread pool...")
+        logger.info("Shutting down Language Processor thread pool...")
         self.thread_pool.shutdown(wait=True)
-        print("Shutdown complete.")
+        logger.info("Shutdown complete.")
 
     def set_response_language(self, language: str):
         """Sets the response language preference and updates the system prompt."""
         self.response_language = language
         self.system_prompt = self._get_language_aware_system_prompt()
-        print(f"Response language set to: {language}")
+        logger.info("Response language set to: %s", language)
 
-    def clear_conversation_context(self) -> bool:
-        """Clears the in-memory conversation history."""
+    def clear_conversation_context(self, session_id: Optional[str] = None) -> bool:
+        """Clears a session's conversation history (the default session's if none is given)."""
+        self.conversations.clear(session_id)
         self.conversation_id = str(uuid.uuid4())
-        self.conversation_history = []
-        print(f"In-memory conversation context cleared. New conversation ID: {self.conversation_id}")
+        logger.info("Conversation context cleared. New conversation ID: %s", self.conversation_id)
         return True
\ No newline at end of file
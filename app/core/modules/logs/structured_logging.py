@@ -0,0 +1,191 @@
+import os
+import sys
+import json
+import time
+import queue
+import uuid
+import random
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+# Correlation id of the request being handled; propagated to tasks and asyncio.to_thread calls
+request_id_var: contextvars.ContextVar = contextvars.ContextVar("request_id", default="-")
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def get_request_id() -> str:
+    return request_id_var.get()
+
+
+def set_request_id(request_id: str) -> contextvars.Token:
+    return request_id_var.set(request_id)
+
+
+def reset_request_id(token: contextvars.Token) -> None:
+    request_id_var.reset(token)
+
+
+@contextmanager
+def request_context(request_id: str):
+    """Tag every log record emitted inside the block with request_id."""
+    token = request_id_var.set(request_id)
+    try:
+        yield request_id
+    finally:
+        request_id_var.reset(token)
+
+
+class CorrelationFilter(logging.Filter):
+    """Stamp records with the current request id on the calling thread, before they are queued."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of high-volume records. A call opts in with
+    `logger.info(..., extra={"sample_rate": 0.1})`; warnings and errors are never sampled.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, "sample_rate", None)
+        if rate is None or rate >= 1.0 or record.levelno >= logging.WARNING:
+            return True
+        return random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra` fields passed by the caller."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and key not in payload and key != "sample_rate":
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking the caller when the writer falls behind."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+_configure_lock = threading.Lock()
+
+
+def configure_logging(level: Optional[str] = None, json_output: Optional[bool] = None,
+                      queue_size: int = 10000) -> None:
+    """
+    Route all logging through a bounded queue drained by a background writer thread,
+    so request handlers never block on stdout. LOG_LEVEL (default INFO) and
+    LOG_FORMAT ("text" or "json") configure the output. Safe to call more than once.
+    """
+    global _listener, _queue_handler
+    with _configure_lock:
+        if _listener is not None:
+            return
+
+        level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+        if json_output is None:
+            json_output = os.getenv("LOG_FORMAT", "text").lower() == "json"
+
+        writer = logging.StreamHandler(sys.stdout)
+        if json_output:
+            writer.setFormatter(JsonFormatter())
+        else:
+            formatter = logging.Formatter(
+                "%(asctime)s.%(msecs)03d %(levelname)s [%(request_id)s] %(name)s: %(message)s",
+                datefmt="%Y-%m-%d %H:%M:%S")
+            formatter.converter = time.localtime
+            writer.setFormatter(formatter)
+
+        _queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+        _queue_handler.addFilter(SamplingFilter())
+        _queue_handler.addFilter(CorrelationFilter())
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_queue_handler)
+        root.setLevel(level)
+
+        _listener = QueueListener(_queue_handler.queue, writer, respect_handler_level=True)
+        _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background writer."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def dropped_log_records() -> int:
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware that gives every HTTP request and WebSocket connection a
+    correlation id, taken from the X-Request-ID header when the client sends one,
+    and echoes it back on HTTP responses.
+    """
+
+    header_name = b"x-request-id"
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == self.header_name:
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((self.header_name, request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
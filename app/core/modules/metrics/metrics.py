@@ -0,0 +1,261 @@
+import time
+import bisect
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Latency buckets in seconds, from cache hits up to slow TTS and LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_DURATION = "voce_stage_duration_seconds"
+CACHE_REQUESTS = "voce_cache_requests_total"
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """Gauge whose values are either set directly or read from a callback at scrape time."""
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelKey, float] = {}
+        self._functions: Dict[LabelKey, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function: Callable[[], float], **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = function
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = list(self._functions.items())
+        for key, function in functions:
+            try:
+                values[key] = float(function())
+            except Exception:
+                # A component that is not ready yet simply reports nothing
+                continue
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram. observe() is a bisect and three additions under a lock."""
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> (per-bucket counts incl. +Inf, sum, count)
+        self._series: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            snapshot = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.label_names, key)} {count}"
+
+
+class MetricsRegistry:
+    """
+    Process-wide collection of metrics rendered in the Prometheus text exposition
+    format. Each uvicorn worker keeps its own registry.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, label_names)
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, label_names)
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, label_names, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _get_or_create(self, cls, name: str, documentation: str, label_names: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, label_names, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as {metric.metric_type}")
+            return metric
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    return _registry
+
+
+_stage_histogram = _registry.histogram(
+    STAGE_DURATION, "Latency of each pipeline stage in seconds.", ["stage"])
+_cache_requests = _registry.counter(
+    CACHE_REQUESTS, "Cache lookups by cache and result (hit or miss).", ["cache", "result"])
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Record how long a pipeline stage took."""
+    _stage_histogram.observe(seconds, stage=stage)
+
+
+@contextmanager
+def time_stage(stage: str):
+    """Time the enclosed block as one observation of stage, also when it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage_histogram.observe(time.perf_counter() - start, stage=stage)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    _cache_requests.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def cache_hit_ratio(cache: str) -> float:
+    hits = _cache_requests.value(cache=cache, result="hit")
+    misses = _cache_requests.value(cache=cache, result="miss")
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+class MeteredThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor that counts the work it accepts and the work that leaves its
+    queue (by starting or being cancelled), so the backlog can be published as a gauge
+    without reading the pool's private work queue.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._count_lock = threading.Lock()
+        self._submitted = 0
+        self._dequeued = 0
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        with self._count_lock:
+            self._submitted += 1
+        try:
+            future = super().submit(self._run, fn, args, kwargs)
+        except BaseException:
+            self._dequeue()
+            raise
+        # A future cancelled while queued never runs, so it leaves the queue here
+        future.add_done_callback(lambda f: f.cancelled() and self._dequeue())
+        return future
+
+    def queued(self) -> int:
+        """Work submitted but not yet started."""
+        with self._count_lock:
+            return self._submitted - self._dequeued
+
+    def _run(self, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+        self._dequeue()
+        return fn(*args, **kwargs)
+
+    def _dequeue(self) -> None:
+        with self._count_lock:
+            self._dequeued += 1
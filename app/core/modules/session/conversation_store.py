@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.modules.state.state_backend import StateBackend, get_state_backend
+
+# Conversation of callers that do not identify a session (CLI, direct LanguageProcessor use)
+DEFAULT_SESSION = "default"
+
+
+class ConversationStore:
+    """
+    Per-session conversation state: a bounded ring of recent messages plus the
+    session's free-form context (language preferences, last turn).
+
+    Each session is one record in the state backend, so every worker sees the same
+    conversation. Every write refreshes the record's idle TTL; sessions left idle
+    longer expire and are purged by sweep(). Writes are read-modify-write through
+    the backend's atomic mutate(), so concurrent turns of a session are never lost,
+    even when they are handled by different workers. Within a process a session's
+    writes also take one of `shards` locks picked by its id, so they queue here
+    instead of on the backend (SQLite's write lock), and no lock is shared by all
+    sessions.
+    """
+
+    NAMESPACE = "conversation"
+
+    def __init__(self, max_entries: int = 50, idle_ttl: float = 1800.0, shards: int = 64,
+                 backend: Optional[StateBackend] = None):
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self.backend = backend or get_state_backend()
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    def history(self, session_id: Optional[str], limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """Return the session's messages, oldest first; the last `limit` only if given."""
+        turns = self._load(session_id)["turns"]
+        return turns[-limit:] if limit else turns
+
+    def context(self, session_id: Optional[str]) -> Dict[str, Any]:
+        return self._load(session_id)["context"]
+
+    def append_turn(self, session_id: Optional[str], user_input: str, response: str) -> None:
+        """Record a question and its answer, dropping the oldest messages beyond max_entries."""
+        messages = [{"role": "user", "content": user_input},
+                    {"role": "assistant", "content": response}]
+
+        def append(record: Dict[str, Any]) -> None:
+            record["turns"] = (record["turns"] + messages)[-self.max_entries:]
+            record["context"].update({
+                'last_query': user_input,
+                'last_response': response,
+                'last_processed_time': time.time()
+            })
+
+        self._mutate(session_id, append)
+
+    def update_context(self, session_id: Optional[str], fields: Dict[str, Any]) -> None:
+        self._mutate(session_id, lambda record: record["context"].update(fields))
+
+    def fingerprint(self, session_id: Optional[str]) -> str:
+        """
+        Digest of the state a prompt for this session would see, "" for a fresh session.
+        Sessions with the same fingerprint get the same answer to the same question.
+        """
+        record = self._load(session_id)
+        if not record["turns"] and not record["context"]:
+            return ""
+        return hashlib.sha1(json.dumps(record, sort_keys=True, default=str).encode()).hexdigest()
+
+    def clear(self, session_id: Optional[str]) -> bool:
+        return self.backend.delete(self.NAMESPACE, self._key(session_id))
+
+    def sweep(self) -> int:
+        """Drop the conversations of idle sessions. Returns the number removed."""
+        return self.backend.purge_expired(self.NAMESPACE)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": self.backend.count(self.NAMESPACE),
+            "max_entries": self.max_entries,
+            "idle_ttl": self.idle_ttl,
+            "lock_shards": len(self._locks)
+        }
+
+    def _load(self, session_id: Optional[str]) -> Dict[str, Any]:
+        record = self.backend.get(self.NAMESPACE, self._key(session_id))
+        return record or {"turns": [], "context": {}}
+
+    def _mutate(self, session_id: Optional[str], change: Callable[[Dict[str, Any]], None]) -> None:
+        def apply(record: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            record = record or {"turns": [], "context": {}}
+            change(record)
+            return record
+
+        with self._lock_for(session_id):
+            self.backend.mutate(self.NAMESPACE, self._key(session_id), apply, ttl=self.idle_ttl)
+
+    def _lock_for(self, session_id: Optional[str]) -> threading.Lock:
+        return self._locks[hash(self._key(session_id)) % len(self._locks)]
+
+    @staticmethod
+    def _key(session_id: Optional[str]) -> str:
+        return session_id or DEFAULT_SESSION
+
+
+_conversation_store = None
+_conversation_store_lock = threading.Lock()
+
+
+def get_conversation_store() -> ConversationStore:
+    """
+    Return the process-wide conversation store, sized by CONVERSATION_MAX_ENTRIES,
+    CONVERSATION_IDLE_TTL and CONVERSATION_LOCK_SHARDS.
+    """
+    global _conversation_store
+    with _conversation_store_lock:
+        if _conversation_store is None:
+            _conversation_store = ConversationStore(
+                max_entries=int(os.getenv("CONVERSATION_MAX_ENTRIES", "50")),
+                idle_ttl=float(os.getenv("CONVERSATION_IDLE_TTL", "1800")),
+                shards=int(os.getenv("CONVERSATION_LOCK_SHARDS", "64"))
+            )
+        return _conversation_store
@@ -0,0 +1,256 @@
+import sys
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.modules.state.state_backend import StateBackend
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate the memory footprint of a session payload in bytes."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class SessionStore:
+    """
+    Bounded, thread-safe store for per-session response data.
+
+    Entries are evicted least-recently-used once either the entry or the byte
+    capacity is exceeded, and expire after a per-entry TTL. Expired entries are
+    dropped lazily on access and periodically by a background sweeper thread.
+
+    With a shared StateBackend the entries live in the backend instead, so every
+    worker process sees the same sessions. Checking capacity there costs a scan of
+    the namespace, so it is enforced by the sweeper rather than on every write: the
+    least recently written sessions beyond max_entries, or beyond max_bytes of
+    serialized data, are evicted each sweep.
+    """
+
+    NAMESPACE = "sessions"
+
+    def __init__(self, max_entries: int = 10000, max_bytes: Optional[int] = 64 * 1024 * 1024,
+                 ttl_seconds: float = 3600.0, sweep_interval: float = 60.0,
+                 backend: Optional[StateBackend] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self.backend = backend
+
+        # session_id -> (value, expires_at, size_bytes)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+
+        # Statistics
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+        self._stop_event = threading.Event()
+        self._sweeper_thread = None
+
+        if backend is not None:
+            logger.info("Session store on %s: max_entries=%s and max_bytes=%s are enforced "
+                        "every %.0fs by the sweeper", type(backend).__name__, max_entries,
+                        max_bytes, sweep_interval)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the session data, or None if missing or expired."""
+        if self.backend is not None:
+            value = self.backend.get(self.NAMESPACE, session_id)
+            with self._lock:
+                if value is None:
+                    self._misses += 1
+                else:
+                    self._hits += 1
+            return value
+
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            value, expires_at, _ = entry
+            if expires_at <= time.time():
+                self._remove(session_id)
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(session_id)
+            self._hits += 1
+            return dict(value)
+
+    def set(self, session_id: str, value: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """Store session data, evicting least-recently-used entries if over capacity."""
+        ttl = self.ttl_seconds if ttl is None else ttl
+        if self.backend is not None:
+            self.backend.set(self.NAMESPACE, session_id, dict(value), ttl=ttl)
+            return
+
+        value = dict(value)
+        size = estimate_size(session_id) + estimate_size(value)
+
+        with self._lock:
+            if session_id in self._entries:
+                self._remove(session_id)
+            self._entries[session_id] = (value, time.time() + ttl, size)
+            self._total_bytes += size
+            self._enforce_capacity()
+
+    def update(self, session_id: str, **fields: Any) -> bool:
+        """Merge fields into an existing session entry. Returns False if it no longer exists."""
+        if self.backend is not None:
+            return self.backend.update(self.NAMESPACE, session_id, fields)
+
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or entry[1] <= time.time():
+                return False
+
+            value, expires_at, old_size = entry
+            value = {**value, **fields}
+            size = estimate_size(session_id) + estimate_size(value)
+            self._entries[session_id] = (value, expires_at, size)
+            self._entries.move_to_end(session_id)
+            self._total_bytes += size - old_size
+            self._enforce_capacity()
+            return True
+
+    def delete(self, session_id: str) -> bool:
+        """Remove a session. Returns True if it existed."""
+        if self.backend is not None:
+            return self.backend.delete(self.NAMESPACE, session_id)
+
+        with self._lock:
+            if session_id not in self._entries:
+                return False
+            self._remove(session_id)
+            return True
+
+    def __contains__(self, session_id: str) -> bool:
+        if self.backend is not None:
+            return self.backend.get(self.NAMESPACE, session_id) is not None
+
+        with self._lock:
+            entry = self._entries.get(session_id)
+            return entry is not None and entry[1] > time.time()
+
+    def __len__(self) -> int:
+        if self.backend is not None:
+            return self.backend.count(self.NAMESPACE)
+
+        with self._lock:
+            return len(self._entries)
+
+    def sweep(self) -> int:
+        """
+        Drop all expired entries (and, with a backend, the entries over capacity).
+        Returns the number removed.
+        """
+        if self.backend is not None:
+            expired = self.backend.purge_expired(self.NAMESPACE)
+            evicted = self.backend.trim(self.NAMESPACE, self.max_entries, self.max_bytes)
+            with self._lock:
+                self._expirations += expired
+                self._evictions += evicted
+            return expired + evicted
+
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, expires_at, _) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                self._remove(key)
+            self._expirations += len(expired)
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size accounting and hit/eviction counters."""
+        entries = len(self)
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "backend": self.backend.stats() if self.backend is not None else "local",
+                "entries": entries,
+                "max_entries": self.max_entries,
+                # Not tracked per write on a backend; see capacity_enforced
+                "total_bytes": self._total_bytes if self.backend is None else None,
+                "max_bytes": self.max_bytes,
+                "capacity_enforced": "on_write" if self.backend is None else "on_sweep",
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": (self._hits / lookups) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "sweeper_running": bool(self._sweeper_thread and self._sweeper_thread.is_alive())
+            }
+
+    def field_values(self, field: str) -> Set[Any]:
+        """Return the non-empty values of a field across all live sessions."""
+        if self.backend is not None:
+            return self.backend.field_values(self.NAMESPACE, field)
+
+        now = time.time()
+        with self._lock:
+            return {
+                value[field] for value, expires_at, _ in self._entries.values()
+                if expires_at > now and value.get(field)
+            }
+
+    def recent_keys(self, limit: int = 10) -> List[str]:
+        """Return the most recently used session ids, newest first."""
+        if self.backend is not None:
+            return self.backend.recent_keys(self.NAMESPACE, limit)
+
+        with self._lock:
+            keys = list(reversed(self._entries.keys()))
+        return keys[:limit]
+
+    def start_sweeper(self) -> None:
+        """Start the background thread that periodically removes expired entries."""
+        if self._sweeper_thread and self._sweeper_thread.is_alive():
+            return
+
+        self._stop_event.clear()
+
+        def sweep_loop():
+            while not self._stop_event.wait(self.sweep_interval):
+                removed = self.sweep()
+                if removed:
+                    logger.info("Session store: expired %d sessions.", removed)
+
+        self._sweeper_thread = threading.Thread(target=sweep_loop, daemon=True, name="SessionSweeperThread")
+        self._sweeper_thread.start()
+
+    def stop_sweeper(self) -> None:
+        """Stop the background sweeper thread."""
+        self._stop_event.set()
+        if self._sweeper_thread and self._sweeper_thread.is_alive():
+            self._sweeper_thread.join(timeout=5.0)
+        self._sweeper_thread = None
+
+    def _remove(self, session_id: str) -> None:
+        _, _, size = self._entries.pop(session_id)
+        self._total_bytes -= size
+
+    def _enforce_capacity(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self._total_bytes > self.max_bytes and len(self._entries) > 1)
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._evictions += 1
@@ -0,0 +1,262 @@
+import json
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from app.core.modules.metrics.metrics import observe_stage
+from app.core.modules.admission.admission_controller import AdmissionRejected, get_admission_controller
+from app.core.modules.cancellation.cancellation import CancellationToken, OperationCancelled
+
+logger = logging.getLogger(__name__)
+
+
+class VoiceSocketSession:
+    """
+    One full-duplex voice conversation held over a single WebSocket.
+
+    The client sends either JSON text messages or binary frames of raw 16-bit mono
+    16 kHz PCM:
+
+        {"type": "transcript", "text": "..."}   run a turn for a browser-side transcript
+        <binary PCM>                             segmented with VAD, then transcribed
+        {"type": "end_utterance"}                transcribe whatever PCM is buffered
+        {"type": "cancel"}                       stop the current turn
+        {"type": "ping"}
+
+    The server pushes `ready`, `transcript`, `delta`, `final`, `audio_start`, binary
+    MP3 chunks, `audio_end` (with the replay URLs) and `error` messages; a turn shed
+    by admission control gets an `error` with status 429 and retry_after. Speech is
+    synthesized sentence by sentence while the LLM is still writing, so `audio_start`
+    and the first MP3 chunks usually arrive between `delta` messages, before `final`.
+    A sentence that could not be synthesized is reported as `audio_segment_error` and
+    `audio_end` then carries audio_incomplete. Every turn
+    message carries a turn_id; starting a new turn cancels the previous one, so the
+    caller can barge in while the assistant is still speaking. A cancelled turn's
+    token also aborts its LLM and web calls and drops its queued TTS work.
+    """
+
+    def __init__(self, websocket: WebSocket, assistant, session_id: str,
+                 transcriber_factory: Callable[[], Any],
+                 on_response: Callable[[str, str], None],
+                 on_audio: Callable[[str, str], Dict[str, str]],
+                 synthesize: bool = True):
+        self.websocket = websocket
+        self.assistant = assistant
+        self.session_id = session_id
+        self.transcriber_factory = transcriber_factory
+        self.on_response = on_response
+        self.on_audio = on_audio
+        self.synthesize = synthesize
+        self.admission = get_admission_controller()
+
+        self._segmenter = None
+        self._turn_task: Optional[asyncio.Task] = None
+        self._turn_token: Optional[CancellationToken] = None
+        self._turn_counter = 0
+        self._send_lock = asyncio.Lock()
+
+    async def run(self) -> None:
+        """Accept the connection and serve turns until the client disconnects."""
+        await self.websocket.accept()
+        await self._send_json({"type": "ready", "session_id": self.session_id})
+
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    self._handle_audio(message["bytes"])
+                elif message.get("text") is not None:
+                    await self._handle_text(message["text"])
+        except WebSocketDisconnect:
+            pass
+        finally:
+            await self._cancel_turn()
+
+    async def _handle_text(self, raw: str) -> None:
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            await self._send_json({"type": "error", "detail": "Messages must be JSON"})
+            return
+
+        message_type = message.get("type")
+        if message_type == "transcript":
+            transcript = (message.get("text") or "").strip()
+            if transcript:
+                self._start_turn(transcript=transcript)
+        elif message_type == "end_utterance":
+            utterance = self._get_segmenter().flush()
+            if utterance:
+                self._start_turn(audio=utterance)
+        elif message_type == "cancel":
+            await self._cancel_turn()
+            await self._send_json({"type": "cancelled", "turn_id": self._turn_counter})
+        elif message_type == "ping":
+            await self._send_json({"type": "pong"})
+        else:
+            await self._send_json({"type": "error", "detail": f"Unknown message type: {message_type}"})
+
+    def _handle_audio(self, data: bytes) -> None:
+        for utterance in self._get_segmenter().feed(data):
+            self._start_turn(audio=utterance)
+
+    def _get_segmenter(self):
+        if self._segmenter is None:
+            self._segmenter = self.transcriber_factory().create_segmenter()
+        return self._segmenter
+
+    def _start_turn(self, transcript: Optional[str] = None, audio: Optional[bytes] = None) -> None:
+        # A new utterance interrupts whatever the assistant is still saying
+        if self._turn_token is not None:
+            self._turn_token.cancel("barge-in")
+        if self._turn_task and not self._turn_task.done():
+            self._turn_task.cancel()
+
+        self._turn_counter += 1
+        self._turn_token = CancellationToken()
+        self._turn_task = asyncio.create_task(
+            self._run_turn(self._turn_counter, transcript, audio, self._turn_token))
+
+    async def _cancel_turn(self) -> None:
+        task, token = self._turn_task, self._turn_token
+        self._turn_task = self._turn_token = None
+        if token is not None:
+            token.cancel("turn cancelled")
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def _run_turn(self, turn_id: int, transcript: Optional[str], audio: Optional[bytes],
+                        cancel_token: CancellationToken) -> None:
+        start_time = time.time()
+        ticket = None
+        try:
+            ticket = self.admission.admit()
+            if audio is not None:
+                transcriber = self.transcriber_factory()
+                with self.admission.stage("stt"):
+                    transcript = await asyncio.to_thread(transcriber.transcribe_utterance, audio)
+                # Transcription runs on a thread and cannot be interrupted; skip the rest
+                cancel_token.raise_if_cancelled()
+                if not transcript:
+                    await self._send_json({"type": "no_speech", "turn_id": turn_id})
+                    return
+                await self._send_json({"type": "transcript", "turn_id": turn_id, "text": transcript})
+
+            first_token_time = None
+            first_audio_time = None
+            audio_started = text_sent = False
+            final_event: Dict[str, Any] = {}
+            async for event in self.assistant.astream_transcription_with_audio(
+                    transcript, synthesize=self.synthesize, cancel_token=cancel_token,
+                    session_id=self.session_id):
+                if event["type"] == "delta":
+                    if first_token_time is None:
+                        first_token_time = time.time() - start_time
+                    await self._send_json({"type": "delta", "turn_id": turn_id, "text": event["text"]})
+                elif event["type"] == "segment":
+                    # Each sentence is played as soon as it is synthesized
+                    if not audio_started:
+                        audio_started = True
+                        await self._send_json({"type": "audio_start", "turn_id": turn_id, "media_type": "audio/mpeg"})
+                    if not event["audio_file"]:
+                        await self._send_json({"type": "audio_segment_error", "turn_id": turn_id,
+                                               "index": event["index"], "detail": event.get("error", "")})
+                        continue
+                    if first_audio_time is None:
+                        first_audio_time = time.time() - start_time
+                    await self._send_audio_file(event["audio_file"])
+                else:
+                    final_event = event
+                    # With audio the text arrives in a `text` event, before the audio is done
+                    if not text_sent:
+                        text_sent = True
+                        await self._send_final(turn_id, event, first_token_time)
+
+            audio_file_path = final_event.get("audio_file", "")
+            if not self.synthesize or not final_event.get("text"):
+                return
+
+            if not audio_started:
+                # The answer was synthesized in one piece (no segments were streamed)
+                await self._send_json({"type": "audio_start", "turn_id": turn_id, "media_type": "audio/mpeg"})
+                if audio_file_path:
+                    first_audio_time = time.time() - start_time
+                    await self._send_audio_file(audio_file_path)
+
+            observe_stage("end_to_end", time.time() - start_time)
+            audio_urls = (self.on_audio(self.session_id, audio_file_path) if audio_file_path
+                          else {"audio_url": "", "immutable_audio_url": ""})
+            await self._send_json({
+                "type": "audio_end",
+                "turn_id": turn_id,
+                **audio_urls,
+                "audio_incomplete": bool(final_event.get("audio_incomplete")) or not audio_file_path,
+                "execution_time": {
+                    "time_to_first_token": first_token_time,
+                    "time_to_first_audio": first_audio_time,
+                    "total_execution_time": time.time() - start_time
+                }
+            })
+        except asyncio.CancelledError:
+            raise
+        except OperationCancelled:
+            logger.debug("Voice session %s turn %d cancelled", self.session_id, turn_id)
+        except AdmissionRejected as e:
+            logger.warning("Voice session %s turn %d rejected: %s", self.session_id, turn_id, e)
+            try:
+                await self._send_json({
+                    "type": "error",
+                    "turn_id": turn_id,
+                    "status": 429,
+                    "retry_after": e.retry_after,
+                    "detail": str(e)
+                })
+            except Exception:
+                pass
+        except Exception as e:
+            logger.error("Voice session %s turn %d failed: %s", self.session_id, turn_id, e)
+            try:
+                await self._send_json({"type": "error", "turn_id": turn_id, "detail": str(e)})
+            except Exception:
+                pass
+        finally:
+            if ticket is not None:
+                ticket.release()
+
+    async def _send_final(self, turn_id: int, event: Dict[str, Any],
+                          first_token_time: Optional[float]) -> None:
+        response_text = event.get("text", "")
+        self.on_response(self.session_id, response_text)
+        await self._send_json({
+            "type": "final",
+            "turn_id": turn_id,
+            "success": "error" not in event,
+            "text": response_text,
+            "language": event.get("language", "English"),
+            "time_to_first_token": first_token_time
+        })
+
+    async def _send_audio_file(self, audio_file_path: str) -> None:
+        # MP3 frames concatenate, so each file is sent as is after the previous one
+        data = await asyncio.to_thread(_read_file, audio_file_path)
+        async with self._send_lock:
+            await self.websocket.send_bytes(data)
+
+    async def _send_json(self, payload: Dict[str, Any]) -> None:
+        # The receive loop and the turn task both write to the socket
+        async with self._send_lock:
+            await self.websocket.send_text(json.dumps(payload, ensure_ascii=False))
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
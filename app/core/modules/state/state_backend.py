@@ -0,0 +1,457 @@
+import os
+import copy
+import json
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+
+class StateBackend(ABC):
+    """
+    Namespaced key-value store with per-entry TTL for runtime state that must be
+    visible to every API worker: sessions, caches and audio artifact metadata.
+    Values are JSON-serializable and always returned as copies.
+    """
+
+    # True when other processes see the same data (i.e. safe with `uvicorn --workers N`)
+    shared = False
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Return the value for key, or None if missing or expired."""
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, replacing any previous one. ttl=None means no expiry."""
+
+    @abstractmethod
+    def update(self, namespace: str, key: str, fields: Dict[str, Any]) -> bool:
+        """Atomically merge fields into an existing dict value. Returns False if it does not exist."""
+
+    @abstractmethod
+    def mutate(self, namespace: str, key: str, fn: Callable[[Optional[Any]], Any],
+               ttl: Optional[float] = None) -> Any:
+        """
+        Atomically replace a value with fn(current value, or None if missing or expired)
+        and return the new value. ttl applies to the new value as in set(). fn may run
+        while other writers wait, so it must be quick and must not touch the backend.
+        """
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> bool:
+        """Remove a key. Returns True if it existed."""
+
+    @abstractmethod
+    def items(self, namespace: str) -> List[Tuple[str, Any]]:
+        """Return all live (key, value) pairs, least recently written first."""
+
+    @abstractmethod
+    def count(self, namespace: str) -> int:
+        """Return the number of live entries in a namespace."""
+
+    @abstractmethod
+    def field_values(self, namespace: str, field: str) -> Set[Any]:
+        """Return the distinct non-empty values of a top-level field of live dict values."""
+
+    @abstractmethod
+    def recent_keys(self, namespace: str, limit: int) -> List[str]:
+        """Return up to limit live keys, most recently written first."""
+
+    @abstractmethod
+    def trim(self, namespace: str, max_entries: Optional[int] = None,
+             max_bytes: Optional[int] = None) -> int:
+        """
+        Drop the least recently written entries until at most max_entries remain and
+        their JSON-encoded values total at most max_bytes. Returns the number removed.
+        """
+
+    @abstractmethod
+    def purge_expired(self, namespace: Optional[str] = None) -> int:
+        """Drop expired entries. Returns the number removed."""
+
+    @abstractmethod
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """
+        Take or renew a named lease for ttl seconds. Returns True if owner holds it,
+        which lets exactly one worker run a singleton job such as garbage collection.
+        """
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__, "shared": self.shared}
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryStateBackend(StateBackend):
+    """
+    Process-local backend. Fastest, but each worker process sees only its own state.
+
+    One lock guards the dictionaries and is held only to look up or swap an entry.
+    Writes to a key are serialized by one of `shards` key locks picked by its hash,
+    so mutate() runs its function, and values are copied, outside the shared lock and
+    writers of different keys (other sessions, caches, jobs) do not wait on each other.
+    Stored values are never changed in place, only replaced.
+    """
+
+    shared = False
+
+    def __init__(self, shards: int = 64):
+        # namespace -> {key: (value, expires_at)}
+        self._data: Dict[str, Dict[str, Tuple[Any, Optional[float]]]] = {}
+        self._leases: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(shards)]
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        value = self._current(namespace, key)
+        return copy.deepcopy(value) if value is not None else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl is not None else None
+        value = copy.deepcopy(value)
+        with self._key_lock(namespace, key):
+            self._replace(namespace, key, value, expires_at)
+
+    def update(self, namespace: str, key: str, fields: Dict[str, Any]) -> bool:
+        fields = copy.deepcopy(fields)
+        with self._key_lock(namespace, key):
+            with self._lock:
+                entry = self._data.get(namespace, {}).get(key)
+            if entry is None or self._expired(entry[1]):
+                return False
+            self._replace(namespace, key, {**entry[0], **fields}, entry[1])
+            return True
+
+    def mutate(self, namespace: str, key: str, fn: Callable[[Optional[Any]], Any],
+               ttl: Optional[float] = None) -> Any:
+        with self._key_lock(namespace, key):
+            current = self._current(namespace, key)
+            value = fn(copy.deepcopy(current) if current is not None else None)
+            expires_at = time.time() + ttl if ttl is not None else None
+            self._replace(namespace, key, copy.deepcopy(value), expires_at)
+            return value
+
+    def delete(self, namespace: str, key: str) -> bool:
+        with self._key_lock(namespace, key), self._lock:
+            return self._data.get(namespace, {}).pop(key, None) is not None
+
+    def items(self, namespace: str) -> List[Tuple[str, Any]]:
+        with self._lock:
+            live = [(key, value) for key, (value, expires_at) in self._data.get(namespace, {}).items()
+                    if not self._expired(expires_at)]
+        return [(key, copy.deepcopy(value)) for key, value in live]
+
+    def count(self, namespace: str) -> int:
+        with self._lock:
+            return sum(1 for _, expires_at in self._data.get(namespace, {}).values()
+                       if not self._expired(expires_at))
+
+    def field_values(self, namespace: str, field: str) -> Set[Any]:
+        with self._lock:
+            return {
+                value[field] for value, expires_at in self._data.get(namespace, {}).values()
+                if not self._expired(expires_at) and isinstance(value, dict) and value.get(field)
+            }
+
+    def recent_keys(self, namespace: str, limit: int) -> List[str]:
+        with self._lock:
+            keys = []
+            for key, (_, expires_at) in reversed(self._data.get(namespace, {}).items()):
+                if len(keys) >= limit:
+                    break
+                if not self._expired(expires_at):
+                    keys.append(key)
+            return keys
+
+    def trim(self, namespace: str, max_entries: Optional[int] = None,
+             max_bytes: Optional[int] = None) -> int:
+        with self._lock:
+            entries = self._data.get(namespace, {})
+            # Walk from the newest entry; the newest one is always kept
+            running_bytes = 0
+            evicted = []
+            for position, (key, (value, _)) in enumerate(reversed(entries.items()), start=1):
+                if max_bytes is not None:
+                    running_bytes += len(json.dumps(value, ensure_ascii=False).encode())
+                if ((max_entries is not None and position > max_entries)
+                        or (max_bytes is not None and position > 1 and running_bytes > max_bytes)):
+                    evicted.append(key)
+            for key in evicted:
+                del entries[key]
+            return len(evicted)
+
+    def purge_expired(self, namespace: Optional[str] = None) -> int:
+        removed = 0
+        with self._lock:
+            namespaces = [namespace] if namespace else list(self._data)
+            for name in namespaces:
+                entries = self._data.get(name, {})
+                expired = [key for key, (_, expires_at) in entries.items() if self._expired(expires_at)]
+                for key in expired:
+                    del entries[key]
+                removed += len(expired)
+        return removed
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            holder = self._leases.get(name)
+            if holder is None or holder[0] == owner or holder[1] <= now:
+                self._leases[name] = (owner, now + ttl)
+                return True
+            return False
+
+    def _current(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(namespace, {}).get(key)
+        if entry is None or self._expired(entry[1]):
+            return None
+        return entry[0]
+
+    def _replace(self, namespace: str, key: str, value: Any, expires_at: Optional[float]) -> None:
+        with self._lock:
+            entries = self._data.setdefault(namespace, {})
+            # Re-inserted at the end, which keeps entries in write order
+            entries.pop(key, None)
+            entries[key] = (value, expires_at)
+
+    def _key_lock(self, namespace: str, key: str) -> threading.Lock:
+        return self._key_locks[hash((namespace, key)) % len(self._key_locks)]
+
+    @staticmethod
+    def _expired(expires_at: Optional[float]) -> bool:
+        return expires_at is not None and expires_at <= time.time()
+
+
+class SQLiteStateBackend(StateBackend):
+    """
+    Backend stored in a local SQLite database in WAL mode, shared by every worker
+    process on the host. Each thread uses its own connection.
+    """
+
+    shared = True
+
+    def __init__(self, db_path: str = os.path.join("state", "voce_state.db"), busy_timeout: float = 5.0):
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS state (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            );
+            CREATE INDEX IF NOT EXISTS state_expires_at ON state (expires_at);
+            CREATE INDEX IF NOT EXISTS state_updated_at ON state (namespace, updated_at);
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+        """)
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        row = self._conn().execute(
+            "SELECT value FROM state WHERE namespace = ? AND key = ? "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO state (namespace, key, value, expires_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, json.dumps(value, ensure_ascii=False), expires_at, now)
+            )
+
+    def update(self, namespace: str, key: str, fields: Dict[str, Any]) -> bool:
+        now = time.time()
+        conn = self._conn()
+        # BEGIN IMMEDIATE takes the write lock up front so the read-merge-write is atomic
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value FROM state WHERE namespace = ? AND key = ? "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (namespace, key, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return False
+            value = {**json.loads(row[0]), **fields}
+            conn.execute(
+                "UPDATE state SET value = ?, updated_at = ? WHERE namespace = ? AND key = ?",
+                (json.dumps(value, ensure_ascii=False), now, namespace, key)
+            )
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def mutate(self, namespace: str, key: str, fn: Callable[[Optional[Any]], Any],
+               ttl: Optional[float] = None) -> Any:
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        conn = self._conn()
+        # As in update(): other workers' writers wait until fn's result is committed
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value FROM state WHERE namespace = ? AND key = ? "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (namespace, key, now)
+            ).fetchone()
+            value = fn(json.loads(row[0]) if row else None)
+            conn.execute(
+                "INSERT OR REPLACE INTO state (namespace, key, value, expires_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, json.dumps(value, ensure_ascii=False), expires_at, now)
+            )
+            conn.execute("COMMIT")
+            return value
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, namespace: str, key: str) -> bool:
+        with self._conn() as conn:
+            cursor = conn.execute(
+                "DELETE FROM state WHERE namespace = ? AND key = ?", (namespace, key))
+            return cursor.rowcount > 0
+
+    def items(self, namespace: str) -> List[Tuple[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT key, value FROM state WHERE namespace = ? "
+            "AND (expires_at IS NULL OR expires_at > ?) ORDER BY updated_at",
+            (namespace, time.time())
+        ).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def count(self, namespace: str) -> int:
+        row = self._conn().execute(
+            "SELECT COUNT(*) FROM state WHERE namespace = ? "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, time.time())
+        ).fetchone()
+        return row[0]
+
+    def field_values(self, namespace: str, field: str) -> Set[Any]:
+        # Only the field is read; the values are not decoded
+        rows = self._conn().execute(
+            "SELECT DISTINCT json_extract(value, ?) FROM state WHERE namespace = ? "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (f'$."{field}"', namespace, time.time())
+        ).fetchall()
+        return {row[0] for row in rows if row[0]}
+
+    def recent_keys(self, namespace: str, limit: int) -> List[str]:
+        rows = self._conn().execute(
+            "SELECT key FROM state WHERE namespace = ? "
+            "AND (expires_at IS NULL OR expires_at > ?) ORDER BY updated_at DESC LIMIT ?",
+            (namespace, time.time(), limit)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def trim(self, namespace: str, max_entries: Optional[int] = None,
+             max_bytes: Optional[int] = None) -> int:
+        conditions = []
+        if max_entries is not None:
+            conditions.append(f"position > {int(max_entries)}")
+        if max_bytes is not None:
+            # The newest entry is always kept, as in the in-process store
+            conditions.append(f"(position > 1 AND running_bytes > {int(max_bytes)})")
+        if not conditions:
+            return 0
+        with self._conn() as conn:
+            cursor = conn.execute(
+                "DELETE FROM state WHERE namespace = ? AND key IN ("
+                "  SELECT key FROM ("
+                "    SELECT key,"
+                "      ROW_NUMBER() OVER (ORDER BY updated_at DESC) AS position,"
+                "      SUM(LENGTH(CAST(value AS BLOB))) OVER (ORDER BY updated_at DESC"
+                "        ROWS UNBOUNDED PRECEDING) AS running_bytes"
+                "    FROM state WHERE namespace = ?"
+                f"  ) WHERE {' OR '.join(conditions)})",
+                (namespace, namespace)
+            )
+            return cursor.rowcount
+
+    def purge_expired(self, namespace: Optional[str] = None) -> int:
+        now = time.time()
+        with self._conn() as conn:
+            if namespace:
+                cursor = conn.execute(
+                    "DELETE FROM state WHERE namespace = ? AND expires_at <= ?", (namespace, now))
+            else:
+                cursor = conn.execute("DELETE FROM state WHERE expires_at <= ?", (now,))
+            return cursor.rowcount
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at <= ?",
+                (name, owner, now + ttl, now)
+            )
+            row = conn.execute("SELECT owner FROM leases WHERE name = ?", (name,)).fetchone()
+        return row is not None and row[0] == owner
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "db_path": self.db_path}
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: explicit transactions only, plain statements autocommit
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+_state_backend = None
+_state_backend_lock = threading.Lock()
+
+
+def get_state_backend() -> StateBackend:
+    """
+    Return the process-wide state backend, chosen by STATE_BACKEND ("memory" or
+    "sqlite"). Use "sqlite" when running more than one uvicorn worker.
+    """
+    global _state_backend
+    with _state_backend_lock:
+        if _state_backend is None:
+            backend = os.getenv("STATE_BACKEND", "memory").lower()
+            if backend == "sqlite":
+                _state_backend = SQLiteStateBackend(
+                    db_path=os.getenv("STATE_DB_PATH", os.path.join("state", "voce_state.db")))
+            elif backend == "memory":
+                _state_backend = InMemoryStateBackend()
+            else:
+                raise ValueError(f"Unknown STATE_BACKEND: {backend}")
+        return _state_backend
@@ -1,14 +1,17 @@
 import os
+import asyncio
 import requests
+import httpx
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 import json
 import time
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
 from threading import Lock
 from functools import partial
 from app.helper.get_config import load_yaml
+from app.core.modules.cancellation.cancellation import CancellationToken, OperationCancelled
 
 # Load .env file from the backend root directory
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '.env'))
@@ -19,6 +22,7 @@ class TravelDataSearcher:
     """
     
     def __init__(self, serpapi_key: Optional[str] = None, max_workers: int = 5):
+        self._thread_pool = None
         self.serpapi_key = serpapi_key or os.getenv("SERPAPI_KEY")
         if not self.serpapi_key:
             try:
@@ -27,7 +31,6 @@ class TravelDataSearcher:
                 raise ValueError("SERPAPI_KEY is required. Get it from https://serpapi.com/")
         
         self.max_workers = max_workers
-        self.thread_pool = ThreadPoolExecutor(max_workers=max_workers)
         self.results_lock = Lock()
         
         self.request_lock = Lock()
@@ -41,7 +44,28 @@ class TravelDataSearcher:
             "local experience", "authentic travel", "off the beaten path"
         ]
 
-    def search_city_info(self, city: str, query: str = "", num_results: int = 15) -> Dict[str, Any]:
+    @property
+    def thread_pool(self) -> ThreadPoolExecutor:
+        """Thread pool for the blocking search path, created on first use."""
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._thread_pool
+
+    def _build_search_params(self, city: str, query: str, num_results: int) -> Dict[str, Any]:
+        """Build the SERP API parameters for a city search."""
+        search_query = f"{query} in {city}" if query else f"travel guide for {city}"
+        return {
+            "engine": "google",
+            "q": search_query,
+            "location": city,
+            "hl": "en",
+            "gl": "us",
+            "num": num_results,
+            "api_key": self.serpapi_key
+        }
+
+    def search_city_info(self, city: str, query: str = "", num_results: int = 15,
+                         cancel_token: Optional[CancellationToken] = None) -> Dict[str, Any]:
         """
         Search for travel-specific information for a given city using Google Search via SERP API.
         
@@ -49,28 +73,22 @@ class TravelDataSearcher:
             city: The name of the city to search for.
             query: Specific travel query (e.g., "local food," "museums").
             num_results: Number of results to return.
+            cancel_token: Optional token; a cancelled search is not sent.
             
         Returns:
             A dictionary containing comprehensive travel information for the city.
         """
+        cancel_token = cancel_token or CancellationToken()
         try:
-            search_query = f"{query} in {city}" if query else f"travel guide for {city}"
-            
             with self.request_lock:
                 current_time = time.time()
                 time_since_last = current_time - self.last_request_time
                 if time_since_last < self.min_request_interval:
                     time.sleep(self.min_request_interval - time_since_last)
                 
-                params = {
-                    "engine": "google",
-                    "q": search_query,
-                    "location": city,
-                    "hl": "en",
-                    "gl": "us",
-                    "num": num_results,
-                    "api_key": self.serpapi_key
-                }
+                # The caller may have gone away while this search waited for its turn
+                cancel_token.raise_if_cancelled()
+                params = self._build_search_params(city, query, num_results)
                 
                 # Use the correct import - either the legacy GoogleSearch or new serpapi
                 try:
@@ -99,6 +117,8 @@ class TravelDataSearcher:
                 "travel_info": travel_data,
             }
             
+        except OperationCancelled:
+            raise
         except Exception as e:
             return {
                 "success": False,
@@ -134,6 +154,83 @@ class TravelDataSearcher:
         except requests.RequestException as e:
             raise Exception(f"Direct API call failed: {str(e)}")
 
+    async def asearch_city_info(self, city: str, query: str = "", num_results: int = 15,
+                                client: Optional[httpx.AsyncClient] = None,
+                                cancel_token: Optional[CancellationToken] = None) -> Dict[str, Any]:
+        """
+        Async variant of search_city_info that talks to the SERP API over httpx.
+        
+        Args:
+            city: The name of the city to search for.
+            query: Specific travel query (e.g., "local food," "museums").
+            num_results: Number of results to return.
+            client: Optional shared httpx.AsyncClient to reuse connections.
+            cancel_token: Optional token; cancelling it aborts the request in flight.
+            
+        Returns:
+            A dictionary containing comprehensive travel information for the city.
+        """
+        cancel_token = cancel_token or CancellationToken()
+        try:
+            # Reserve a request slot without holding the lock across the await
+            with self.request_lock:
+                current_time = time.time()
+                wait_time = max(0.0, self.last_request_time + self.min_request_interval - current_time)
+                self.last_request_time = current_time + wait_time
+            if wait_time:
+                await cancel_token.run(asyncio.sleep(wait_time))
+            
+            params = self._build_search_params(city, query, num_results)
+            results = await cancel_token.run(self._amake_direct_api_call(params, client))
+            
+            travel_data = self._process_travel_results(results, city, query)
+            
+            return {
+                "success": True,
+                "city": city,
+                "query": query,
+                "total_results": len(travel_data.get("results", [])),
+                "travel_info": travel_data,
+            }
+            
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "city": city,
+                "query": query,
+                "travel_info": {}
+            }
+
+    async def _amake_direct_api_call(self, params: Dict[str, Any],
+                                     client: Optional[httpx.AsyncClient] = None) -> Dict[str, Any]:
+        """
+        Make a non-blocking API call to SerpApi.
+        
+        Args:
+            params: Search parameters
+            client: Optional shared httpx.AsyncClient
+            
+        Returns:
+            API response as dictionary
+        """
+        api_params = params.copy()
+        api_params.pop("engine", "google")
+        base_url = "https://serpapi.com/search.json"
+        
+        try:
+            if client is None:
+                async with httpx.AsyncClient(timeout=30) as own_client:
+                    response = await own_client.get(base_url, params=api_params)
+            else:
+                response = await client.get(base_url, params=api_params, timeout=30)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            raise Exception(f"Direct API call failed: {str(e)}")
+
     def _process_travel_results(self, results: Dict[str, Any], city: str, query: str) -> Dict[str, Any]:
         """
         Process and categorize travel search results.
@@ -194,17 +291,32 @@ class TravelDataSearcher:
         
         return processed_data
 
-    def get_specific_city_data(self, city: str, data_type: str = "attractions") -> Dict[str, Any]:
+    def get_specific_city_data(self, city: str, data_type: str = "attractions",
+                               cancel_token: Optional[CancellationToken] = None) -> Dict[str, Any]:
         """
         Get a specific category of travel data for a city.
         
         Args:
             city: The city of interest.
             data_type: Type of data (e.g., "attractions", "food", "safety").
+            cancel_token: Optional token; a cancelled search is not sent.
             
         Returns:
             A dictionary containing the specific travel information.
         """
+        query = self._specific_query(city, data_type)
+        return self.search_city_info(city, query, num_results=20, cancel_token=cancel_token)
+
+    async def aget_specific_city_data(self, city: str, data_type: str = "attractions",
+                                      client: Optional[httpx.AsyncClient] = None,
+                                      cancel_token: Optional[CancellationToken] = None) -> Dict[str, Any]:
+        """Async variant of get_specific_city_data."""
+        query = self._specific_query(city, data_type)
+        return await self.asearch_city_info(city, query, num_results=20, client=client,
+                                            cancel_token=cancel_token)
+
+    def _specific_query(self, city: str, data_type: str) -> str:
+        """Map a travel data category to a search query for the city."""
         query_map = {
             "attractions": f"top attractions and things to do in {city}",
             "food": f"best local food and restaurants in {city}",
@@ -213,8 +325,7 @@ class TravelDataSearcher:
             "transport": f"public transportation guide for {city}",
         }
         
-        query = query_map.get(data_type, f"{data_type} in {city}")
-        return self.search_city_info(city, query, num_results=20)
+        return query_map.get(data_type, f"{data_type} in {city}")
 
     def multi_threaded_search(self, searches: List[Dict[str, str]]) -> Dict[str, Any]:
         """
@@ -245,9 +356,14 @@ class TravelDataSearcher:
         
         return {"success": True, "results": results}
 
-    def cleanup_thread_pool(self):
-        """Clean up thread pool resources."""
-        self.thread_pool.shutdown(wait=True)
+    def cleanup_thread_pool(self, wait: bool = True):
+        """
+        Clean up thread pool resources. With wait=False, searches that have not
+        started are cancelled and running ones are left to finish on their own.
+        """
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=wait, cancel_futures=not wait)
+            self._thread_pool = None
 
     def __del__(self):
         """Destructor to ensure thread pool cleanup."""
@@ -312,7 +428,51 @@ class TravelQueryProcessor:
         return query.strip()
 
 # --- Main Integration Function for Voce ---
-def get_travel_data_for_voce(query: str, serpapi_key: str = None, max_workers: int = 5) -> Dict[str, Any]:
+def _aggregate_search_results(analysis: Dict[str, Any], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge individual city searches into the aggregated payload used by the language processor.
+    
+    Args:
+        analysis: Output of TravelQueryProcessor.extract_intent_and_location.
+        results: Search results as returned by search_city_info.
+        
+    Returns:
+        Comprehensive travel data optimized for answering the traveler's query.
+    """
+    aggregated_info = {
+        "all_results": [],
+        "key_information": {},
+        "summary_snippets": []
+    }
+    
+    for result in results:
+        if result.get("success"):
+            info = result["travel_info"]
+            aggregated_info["all_results"].extend(info.get("results", []))
+            aggregated_info["summary_snippets"].extend(info.get("summary_snippets", []))
+            for key, values in info.get("key_information", {}).items():
+                if key not in aggregated_info["key_information"]:
+                    aggregated_info["key_information"][key] = []
+                aggregated_info["key_information"][key].extend(values)
+
+    # Clean up duplicates
+    seen_urls = set()
+    unique_results = []
+    for res in aggregated_info["all_results"]:
+        if res.get("link") not in seen_urls:
+            unique_results.append(res)
+            seen_urls.add(res.get("link"))
+    aggregated_info["all_results"] = unique_results
+    aggregated_info["summary_snippets"] = list(set(aggregated_info["summary_snippets"]))
+
+    return {
+        "success": True,
+        "query_analysis": analysis,
+        "aggregated_data": aggregated_info,
+    }
+
+def get_travel_data_for_voce(query: str, serpapi_key: str = None, max_workers: int = 5,
+                             cancel_token: Optional[CancellationToken] = None) -> Dict[str, Any]:
     """
     Main integration function for the Voce language processor to get travel data.
     
@@ -320,10 +480,15 @@ def get_travel_data_for_voce(query: str, serpapi_key: str = None, max_workers: i
         query: The traveler's natural language query.
         serpapi_key: SERPAPI key (optional).
         max_workers: Number of concurrent threads.
+        cancel_token: Optional token; cancelling it drops searches that have not started
+            and raises OperationCancelled at once instead of returning results. A search
+            already in flight cannot be interrupted; it finishes in the background and
+            its result is discarded.
         
     Returns:
         Comprehensive travel data optimized for answering the traveler's query.
     """
+    cancel_token = cancel_token or CancellationToken()
     try:
         searcher = TravelDataSearcher(serpapi_key, max_workers)
         processor = TravelQueryProcessor()
@@ -339,48 +504,83 @@ def get_travel_data_for_voce(query: str, serpapi_key: str = None, max_workers: i
         search_tasks = []
         # General search for the main query
         search_tasks.append(
-            searcher.thread_pool.submit(searcher.search_city_info, city, analysis["cleaned_query"])
+            searcher.thread_pool.submit(searcher.search_city_info, city, analysis["cleaned_query"],
+                                        cancel_token=cancel_token)
         )
         # Specific search based on intent
         search_tasks.append(
-            searcher.thread_pool.submit(searcher.get_specific_city_data, city, analysis["intent"])
+            searcher.thread_pool.submit(searcher.get_specific_city_data, city, analysis["intent"],
+                                        cancel_token=cancel_token)
         )
+        # Completed on cancellation so the wait below returns even while a search is in flight
+        woken: Future = Future()
+
+        def on_cancel():
+            for task in search_tasks:
+                task.cancel()
+            woken.set_result(None)
+
+        remove_callback = cancel_token.add_callback(on_cancel)
 
         # 3. Collect and aggregate results
-        aggregated_info = {
-            "all_results": [],
-            "key_information": {},
-            "summary_snippets": []
-        }
+        try:
+            pending = set(search_tasks)
+            while pending and not woken.done():
+                _, pending = wait(pending | {woken}, return_when=FIRST_COMPLETED)
+                pending.discard(woken)
+            cancel_token.raise_if_cancelled()
+            results = [task.result() for task in search_tasks]
+        except OperationCancelled:
+            # Do not wait for a search already in flight; its result is discarded
+            searcher.cleanup_thread_pool(wait=False)
+            raise
+        finally:
+            remove_callback()
+            searcher.cleanup_thread_pool()
+
+        return _aggregate_search_results(analysis, results)
+        
+    except OperationCancelled:
+        raise
+    except Exception as e:
+        return {"success": False, "error": str(e), "query": query}
+
+async def aget_travel_data_for_voce(query: str, serpapi_key: str = None,
+                                    client: Optional[httpx.AsyncClient] = None,
+                                    cancel_token: Optional[CancellationToken] = None) -> Dict[str, Any]:
+    """
+    Async variant of get_travel_data_for_voce. Both searches run concurrently on the
+    caller's event loop instead of a per-call thread pool.
+    
+    Args:
+        query: The traveler's natural language query.
+        serpapi_key: SERPAPI key (optional).
+        client: Optional shared httpx.AsyncClient to reuse connections.
+        cancel_token: Optional token; cancelling it aborts both searches in flight.
+        
+    Returns:
+        Comprehensive travel data optimized for answering the traveler's query.
+    """
+    try:
+        searcher = TravelDataSearcher(serpapi_key)
+        processor = TravelQueryProcessor()
         
-        for future in as_completed(search_tasks):
-            result = future.result()
-            if result.get("success"):
-                info = result["travel_info"]
-                aggregated_info["all_results"].extend(info.get("results", []))
-                aggregated_info["summary_snippets"].extend(info.get("summary_snippets", []))
-                for key, values in info.get("key_information", {}).items():
-                    if key not in aggregated_info["key_information"]:
-                        aggregated_info["key_information"][key] = []
-                    aggregated_info["key_information"][key].extend(values)
-
-        # 4. Clean up duplicates
-        seen_urls = set()
-        unique_results = []
-        for res in aggregated_info["all_results"]:
-            if res.get("link") not in seen_urls:
-                unique_results.append(res)
-                seen_urls.add(res.get("link"))
-        aggregated_info["all_results"] = unique_results
-        aggregated_info["summary_snippets"] = list(set(aggregated_info["summary_snippets"]))
+        analysis = processor.extract_intent_and_location(query)
+        city = analysis.get("location")
         
-        searcher.cleanup_thread_pool()
+        if not city:
+            return {"success": False, "error": "Could not determine a location from the query.", "query": query}
 
-        return {
-            "success": True,
-            "query_analysis": analysis,
-            "aggregated_data": aggregated_info,
-        }
+        results = await asyncio.gather(
+            searcher.asearch_city_info(city, analysis["cleaned_query"], client=client,
+                                       cancel_token=cancel_token),
+            searcher.aget_specific_city_data(city, analysis["intent"], client=client,
+                                             cancel_token=cancel_token)
+        )
+
+        return _aggregate_search_results(analysis, list(results))
         
+    except OperationCancelled:
+        raise
     except Exception as e:
-        return {"success": False, "error": str(e), "query": query}
\ No newline at end of file
+        return {"success": False, "error": str(e), "query": query}
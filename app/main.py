@@ -1,15 +1,39 @@
-import sys
 import os
+import json
+import asyncio
+import importlib
 import time
-from typing import Dict
+import logging
+import uuid
+import threading
+from contextlib import asynccontextmanager
+from typing import Dict, Any, AsyncIterator
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from app.models.transcript import TranscriptReq
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from app.models.transcript import JobReq, TranscriptReq
+from app.core.modules.session.session_store import SessionStore
+from app.core.modules.session.conversation_store import get_conversation_store
+from app.core.modules.session.voice_session import VoiceSocketSession
+from app.core.modules.state.state_backend import get_state_backend
+from app.core.modules.metrics.metrics import cache_hit_ratio, get_metrics_registry, observe_stage
+from app.core.modules.health.readiness import get_readiness_tracker
+from app.core.modules.jobs.job_manager import (
+    CANCELLED, COMPLETED, FAILED, PROCESSING, TEXT_READY, JobManager)
+from app.core.modules.admission.admission_controller import (
+    AdmissionRejected, AdmissionTicket, get_admission_controller)
+from app.core.modules.audio.artifact_manager import get_artifact_manager
+from app.core.modules.cancellation.cancellation import CancellationToken, OperationCancelled
+from app.core.modules.audio.audio_response import (
+    IMMUTABLE_CACHE_CONTROL, build_audio_response, content_addressed_name)
+from app.core.modules.logs.structured_logging import (
+    RequestIdMiddleware, configure_logging, dropped_log_records, shutdown_logging)
 from app.helper.get_config import load_yaml
 load_dotenv()
+configure_logging()
+logger = logging.getLogger(__name__)
 
 os.environ['GROQ_API_KEY'] = load_yaml('GROQ_API_KEY')
 os.environ['SERP_API_KEY'] = load_yaml('SERP_API_KEY')
@@ -19,7 +43,22 @@ static_dir = os.path.join(os.getcwd(), "static")
 if not os.path.exists(static_dir):
     os.makedirs(static_dir, exist_ok=True)
 app.mount("/static", StaticFiles(directory=static_dir), name="static")
-session_responses: Dict[str, str] = {}
+# STATE_BACKEND=sqlite shares sessions and audio metadata across uvicorn workers
+state_backend = get_state_backend()
+session_store = SessionStore(
+    max_entries=int(os.getenv("SESSION_MAX_ENTRIES", "10000")),
+    max_bytes=int(os.getenv("SESSION_MAX_BYTES", str(64 * 1024 * 1024))),
+    ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", "3600")),
+    sweep_interval=float(os.getenv("SESSION_SWEEP_INTERVAL", "60")),
+    backend=state_backend if state_backend.shared else None
+)
+artifact_manager = get_artifact_manager()
+admission = get_admission_controller()
+readiness = get_readiness_tracker()
+job_manager = JobManager(state_backend, ttl_seconds=float(os.getenv("JOB_TTL_SECONDS", "900")))
+# Audio still referenced by a live session is never garbage collected
+artifact_manager.set_protected_paths_provider(
+    lambda: session_store.field_values("audio_file"))
 
 app.add_middleware(
     CORSMiddleware,
@@ -28,115 +67,154 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestIdMiddleware)
 
 assistant = None
+integrated_assistant = None
+startup_task = None
+transcriber = None
+transcriber_lock = threading.Lock()
+
+# Required components, declared up front so /ready lists them while they start
+STARTUP_COMPONENTS = ("config", "modules", "language_processor", "tts_engine", "voice_assistant")
 
 
 @app.on_event("startup")
 async def startup_event():
-    if not os.getenv("GROQ_API_KEY"):
-        os.environ['GROQ_API_KEY'] = load_yaml('GROQ_API_KEY')
-        print("Error: GROQ_API_KEY not found!")
-        print(
-            "Please set your Groq API key in the .env file or as an environment variable.")
-        sys.exit(1)
-
-    global assistant
+    for name in STARTUP_COMPONENTS:
+        readiness.register(name)
+    session_store.start_sweeper()
+    artifact_manager.start()
+
+    # Initialize in the background: liveness answers at once and /ready reports progress
+    global startup_task
+    startup_task = asyncio.create_task(initialize_assistant())
+
+
+async def initialize_assistant() -> None:
+    """
+    Build the assistant off the event loop, then warm up the TTS pool and the LLM and
+    SERP connections. Failures are reported through /ready instead of killing the worker.
+    """
+    global assistant, integrated_assistant
     try:
-        from app.core.assistant.voice_assistant import IntegratedVoiceAssistant
-        integrated_assistant = IntegratedVoiceAssistant()
+        with readiness.track("config"):
+            if not os.getenv("GROQ_API_KEY"):
+                raise ValueError("GROQ_API_KEY not found. Set it in the .env file or as an environment variable.")
+
+        with readiness.track("modules"):
+            module = await asyncio.to_thread(
+                importlib.import_module, "app.core.assistant.voice_assistant")
+
+        integrated_assistant = await asyncio.to_thread(module.IntegratedVoiceAssistant)
         assistant = integrated_assistant.get_voice_assistant()
-        print(f'\n\n[ASSISTANT]\n: {assistant}')
-        print("Voice Assistant initialized and ready.")
-    except ImportError as e:
-        print(f"Import Error during startup: {e}")
-        sys.exit(1)
+        register_runtime_gauges()
     except Exception as e:
-        print(f"Error initializing assistant: {e}")
-        sys.exit(1)
+        logger.error("Error initializing assistant: %s", e)
+        return
+
+    logger.info("Voice Assistant initialized, warming up...")
+    await integrated_assistant.awarm_up()
+    logger.info("Voice Assistant ready.")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if startup_task and not startup_task.done():
+        startup_task.cancel()
+    job_manager.cancel_all()
+    if assistant:
+        await assistant.language_processor.aclose()
+    session_store.stop_sweeper()
+    artifact_manager.stop()
+    state_backend.close()
+    shutdown_logging()
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    """Shed load immediately with 429 instead of queueing work that would time out."""
+    logger.warning("Rejected %s %s: %s", request.method, request.url.path, exc)
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "stage": exc.stage, "reason": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+@app.exception_handler(OperationCancelled)
+async def operation_cancelled_handler(request: Request, exc: OperationCancelled):
+    """The caller is gone; 499 (client closed request) keeps these apart from failures in logs."""
+    logger.info("Cancelled %s %s: %s", request.method, request.url.path, exc)
+    return JSONResponse(status_code=499, content={"detail": str(exc)})
 
 
 @app.get("/")
 async def root():
+    """Liveness: the process is up. Deliberately touches no component."""
     return {"message": "Enhanced Voice Assistant API is running"}
 
 
+@app.get("/ready")
+async def ready():
+    """
+    Readiness: 200 once every component is initialized and the warm-ups have run,
+    503 before that. Reports each component's state and init time in milliseconds.
+    """
+    snapshot = readiness.snapshot()
+    return JSONResponse(status_code=200 if snapshot["ready"] else 503, content=snapshot)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Per-stage latency histograms, cache hit ratios and queue depths in Prometheus text format."""
+    return PlainTextResponse(
+        get_metrics_registry().render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.post("/start-assistant/")
-async def start_assistant(data: TranscriptReq):
+async def start_assistant(data: TranscriptReq, request: Request):
     # Start timing
     start_time = time.time()
-    print(f'[{time.strftime("%Y-%m-%d %H:%M:%S")}] API call received - start-assistant')
+    logger.info("start-assistant received for session %s", data.session_id)
 
-    print(f'hitting the start-assistant api.. ')
-    if not assistant:
-        raise HTTPException(
-            status_code=500, detail="Assistant not initialized")
+    require_assistant()
 
+    ticket = admission.admit()
     try:
-        print(
-            f'Fetched transcript is : {data.transcript}\nSending it to voice assistant.')
+        logger.debug("Transcript: %s", data.transcript)
 
         # Time the assistant processing
         assistant_start_time = time.time()
-        result = assistant.handle_transcription_with_audio(data.transcript)
+        # A caller who hangs up stops the LLM, the web lookups and their queued TTS
+        async with cancel_on_disconnect(request) as cancel_token:
+            result = await assistant.ahandle_transcription_with_audio(
+                data.transcript, cancel_token=cancel_token, session_id=data.session_id)
         assistant_end_time = time.time()
         assistant_processing_time = assistant_end_time - assistant_start_time
         # result is now a dict with {"text": response_text, "audio_file": file_path}
         response_text = result.get("text", "")
         audio_file_path = result.get("audio_file", "")
 
-        print(f"\nResponse: {response_text}\n")
-        print(f"\nAudio file path from main: {audio_file_path}\n")
-
-        # Ensure audio file path is cross-platform compatible and exists
-        if audio_file_path:
-            # Normalize the path for cross-platform compatibility
-            audio_file_path = normalize_audio_path(audio_file_path)
-
-            # Find the actual location of the audio file
-            actual_audio_path = find_audio_file(audio_file_path)
-
-            if actual_audio_path:
-                audio_file_path = actual_audio_path
-                print(f"✅ Audio file verified at: {audio_file_path}")
-            else:
-                print(f"⚠️ WARNING: Audio file not found at {audio_file_path}")
-                audio_file_path = ""
-
-        # Store session data with enhanced information
-        session_responses[data.session_id] = {
-            "text": response_text,
-            "audio_file": audio_file_path,
-            "audio_filename": os.path.basename(audio_file_path) if audio_file_path else "",
-            "timestamp": time.time()
-        }        # Generate URLs for audio access
-        audio_url = ""
-        static_audio_url = ""
-
-        if audio_file_path:
-            # Direct endpoint URL (preferred)
-            audio_url = f"/get-audio/{data.session_id}"
+        logger.debug("Response: %s", response_text)
+        logger.debug("Audio file path: %s", audio_file_path)
 
-            # Static URL as fallback - ensure Unix-compatible path separators
-            audio_filename = os.path.basename(audio_file_path)
-            static_audio_url = f"/static/audio/{audio_filename}"
-
-            print(f"🎵 Audio URLs generated:")
-            print(f"   └─ Direct endpoint: {audio_url}")
-            print(f"   └─ Static fallback: {static_audio_url}")
+        audio_file_path = store_session_response(
+            data.session_id, response_text, audio_file_path)
+        audio_url, static_audio_url = build_audio_urls(
+            data.session_id, audio_file_path)
 
         # End timing
         end_time = time.time()
         total_execution_time = end_time - start_time
+        observe_stage("end_to_end", total_execution_time)
 
-        # Log execution times
-        print(f"📊 EXECUTION TIME METRICS:")
-        print(
-            f"   └─ Assistant processing time: {assistant_processing_time:.3f} seconds")
-        print(
-            f"   └─ Total API execution time: {total_execution_time:.3f} seconds")
-        print(
-            f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] API call completed - start-assistant")
+        logger.info("start-assistant completed", extra={
+            "assistant_processing_time": round(assistant_processing_time, 3),
+            "total_execution_time": round(total_execution_time, 3)
+        })
 
         return {
             "success": True,
@@ -144,7 +222,10 @@ async def start_assistant(data: TranscriptReq):
             "audio_file": audio_file_path,
             "audio_url": audio_url,  # Direct endpoint URL (preferred)
             "static_audio_url": static_audio_url,  # Static URL fallback
+            "immutable_audio_url": immutable_audio_url(data.session_id),
             "audio_filename": os.path.basename(audio_file_path) if audio_file_path else "",
+            # Some sentences could not be synthesized and are missing from the audio
+            "audio_incomplete": result.get("audio_incomplete", False),
             "products": [],  # Add products if available from your assistant
             "message": "Generated response based on transcript",
             "execution_time": {
@@ -153,34 +234,154 @@ async def start_assistant(data: TranscriptReq):
             }
         }
 
+    except (AdmissionRejected, OperationCancelled):
+        raise
     except Exception as e:
         end_time = time.time()
         total_execution_time = end_time - start_time
-        print(f"❌ ERROR after {total_execution_time:.3f} seconds: {e}")
+        logger.error("start-assistant failed after %.3f seconds: %s", total_execution_time, e)
         raise HTTPException(
             status_code=500, detail=f"Failed to start assistant: {e}")
+    finally:
+        ticket.release()
+
+
+@app.post("/stream-assistant/")
+async def stream_assistant(request: Request, data: TranscriptReq):
+    """
+    Server-Sent Events variant of /start-assistant/. Emits a `delta` event for every
+    chunk of text generated by the LLM and, while the text is still being written, a
+    `segment` event with the URL of each sentence's audio as soon as it is synthesized.
+    A `text` event with the full text and the detected TTS language marks the end of
+    generation; the closing `final` event repeats them with the URLs of the whole answer.
+    """
+    logger.info("stream-assistant received for session %s", data.session_id)
+    return await _stream_assistant_response(request, data.transcript, data.session_id)
+
 
+@app.get("/stream-assistant/")
+async def stream_assistant_get(request: Request,
+                               transcript: str = Query(..., description="User transcript"),
+                               session_id: str = Query(..., description="Session ID")):
+    """EventSource-friendly variant of POST /stream-assistant/."""
+    logger.info("stream-assistant received for session %s", session_id)
+    return await _stream_assistant_response(request, transcript, session_id)
+
+
+async def _stream_assistant_response(request: Request, transcript: str, session_id: str) -> StreamingResponse:
+    require_assistant()
+
+    ticket = admission.admit()
+
+    async def event_stream():
+        start_time = time.time()
+        first_token_time = None
+        try:
+            text_event: Dict[str, Any] = {}
+            final_event: Dict[str, Any] = {}
+            # A listener who hangs up stops the LLM, the web lookups and the TTS
+            async with cancel_on_disconnect(request) as cancel_token:
+                async for event in assistant.astream_transcription_with_audio(
+                        transcript, synthesize=True, cancel_token=cancel_token, session_id=session_id):
+                    if event["type"] == "delta":
+                        if first_token_time is None:
+                            first_token_time = time.time() - start_time
+                        yield format_sse("delta", {"text": event["text"]})
+                    elif event["type"] == "segment":
+                        # Sentences are playable while the rest of the answer is generated
+                        payload = {"index": event["index"], "text": event["text"],
+                                   "audio_url": segment_audio_url(event["audio_file"])}
+                        if "error" in event:
+                            payload["error"] = event["error"]
+                        yield format_sse("segment", payload)
+                    elif event["type"] == "text":
+                        text_event = event
+                        store_session_response(session_id, event.get("text", ""), "")
+                        yield format_sse("text", {
+                            "success": "error" not in event,
+                            "text": event.get("text", ""),
+                            "language": event.get("language", "English")
+                        })
+                    else:
+                        final_event = event
+
+            if not text_event:
+                store_session_response(session_id, final_event.get("text", ""), "")
+
+            audio_url = immutable_url = ""
+            audio_file_path = final_event.get("audio_file")
+            if audio_file_path and store_session_audio(session_id, audio_file_path):
+                audio_url = f"/get-audio/{session_id}"
+                immutable_url = immutable_audio_url(session_id)
+
+            yield format_sse("final", {
+                "success": "error" not in final_event,
+                "text": final_event.get("text", ""),
+                "language": final_event.get("language", "English"),
+                "audio_url": audio_url,
+                "immutable_audio_url": immutable_url,
+                "audio_incomplete": final_event.get("audio_incomplete", False),
+                "execution_time": {
+                    "time_to_first_token": first_token_time,
+                    "total_execution_time": time.time() - start_time
+                }
+            })
+        except AdmissionRejected:
+            raise
+        except OperationCancelled as e:
+            logger.info("stream-assistant for session %s cancelled: %s", session_id, e)
+        except Exception as e:
+            logger.error("stream-assistant failed after %.3f seconds: %s", time.time() - start_time, e)
+            yield format_sse("error", {"success": False, "detail": f"Failed to stream assistant: {e}"})
+
+    return StreamingResponse(
+        await admitted_stream(event_stream(), ticket),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+def format_sse(event: str, payload: Dict[str, Any]) -> str:
+    """Format a single Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+async def admitted_stream(stream: AsyncIterator, ticket: AdmissionTicket) -> AsyncIterator:
+    """
+    Pull the first item of a response stream before the headers are sent, so a
+    stage that is over its concurrency limit still answers with 429 + Retry-After.
+    The admission ticket is released when the stream ends.
+    """
+    try:
+        first = await stream.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except BaseException:
+        ticket.release()
+        raise
+
+    async def relay():
+        with ticket:
+            if first is None:
+                return
+            yield first
+            async for item in stream:
+                yield item
+
+    return relay()
 
-# @app.get("/get-latest-response/")
-# async def get_latest_response(session_id: str = Query(..., description="Session ID")):
-#     if session_id not in session_responses:
-#         raise HTTPException(status_code=404, detail="No response available for this session.")
-#     return {
-#         "data": session_responses[session_id].get("text", ""),
-#         "audio_file": session_responses[session_id].get("audio_file", "")
-#     }
 
 #  testing getting voice from frontend
 @app.post("/get-transcript")
 async def get_transcript(data: TranscriptReq):
     start_time = time.time()
-    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] API call received - get-transcript")
-
-    print(f"Received transcript: {data.transcript}")
+    logger.debug("get-transcript received: %s", data.transcript)
 
     end_time = time.time()
     execution_time = end_time - start_time
-    print(f"📊 get-transcript execution time: {execution_time:.3f} seconds")
 
     return {
         "message": "Transcript received",
@@ -190,121 +391,297 @@ async def get_transcript(data: TranscriptReq):
 
 
 @app.get("/get-audio/{session_id}")
-async def get_audio_file(session_id: str):
+async def get_audio_file(request: Request, session_id: str):
     """
     GET endpoint to retrieve the generated audio file for a specific session.
-    Returns the WAV file that can be played directly in the browser.
+    The ETag is the content hash, so replays revalidate with a 304 and seeks
+    fetch only the requested byte range.
     """
-    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] API call received - get-audio for session: {session_id}")
-
-    if session_id not in session_responses:
-        print(f"❌ Session ID {session_id} not found in session_responses")
-        print(f"Available sessions: {list(session_responses.keys())}")
+    # Single registry lookup; size and mtime were recorded when TTS wrote the file
+    artifact = artifact_manager.resolve(session_id)
+    if artifact is None:
+        logger.warning("No audio artifact registered for session %s", session_id)
         raise HTTPException(
             status_code=404, detail="No audio file available for this session ID")
 
-    session_data = session_responses[session_id]
-    audio_file_path = session_data.get("audio_file", "")
+    # Replays and seeks hit this endpoint often, so only a sample is logged
+    logger.info("Serving audio %s (%d bytes) for session %s", artifact.path, artifact.size, session_id,
+                extra={"sample_rate": 0.1})
 
-    print(f"📁 Session data for {session_id}:")
-    print(f"   └─ Text: {session_data.get('text', '')[:50]}...")
-    print(f"   └─ Audio file: {audio_file_path}")
-    print(f"   └─ Audio filename: {session_data.get('audio_filename', 'N/A')}")
+    # The session URL moves to the next answer, so clients must revalidate it
+    return await build_audio_response(request, artifact, artifact_manager.registry)
 
-    if not audio_file_path:
-        print(f"❌ No audio file path stored for session {session_id}")
+
+@app.get("/audio/{filename}")
+async def get_audio_by_hash(request: Request, filename: str):
+    """
+    GET endpoint serving audio under its content-addressed name (<sha256>.mp3).
+    The contents behind such a name never change, so it is cacheable forever.
+    """
+    content_hash = os.path.splitext(filename)[0].lower()
+    artifact = artifact_manager.find_by_hash(content_hash)
+    if artifact is None or content_addressed_name(artifact) != filename.lower():
+        raise HTTPException(status_code=404, detail="Audio file not found")
+
+    return await build_audio_response(
+        request, artifact, artifact_manager.registry, cache_control=IMMUTABLE_CACHE_CONTROL)
+
+
+@app.get("/stream-audio/{session_id}")
+async def stream_audio(request: Request, session_id: str):
+    """
+    GET endpoint that streams the audio for a session's latest response while it is
+    being synthesized. Chunks are forwarded as edge-tts produces them and teed to
+    static/audio, after which /get-audio/{session_id} replays the finished file.
+    """
+    logger.info("stream-audio received for session %s", session_id)
+
+    require_assistant()
+
+    session_data = session_store.get(session_id)
+    if session_data is None:
         raise HTTPException(
-            status_code=404, detail="No audio file generated for this session")
-
-    # Handle both absolute and relative paths
-    if not os.path.isabs(audio_file_path):
-        # Convert relative path to absolute
-        abs_audio_path = os.path.abspath(audio_file_path)
-        print(f"🔄 Converting relative path to absolute:")
-        print(f"   └─ Relative: {audio_file_path}")
-        print(f"   └─ Absolute: {abs_audio_path}")
-        audio_file_path = abs_audio_path
-
-    # Check if the file actually exists
-    if not os.path.exists(audio_file_path):
-        print(f"❌ Audio file not found at: {audio_file_path}")
-        # Try alternative paths
-        alternative_paths = []
-
-        # Try in static/audio directory
-        filename = os.path.basename(audio_file_path)
-        static_audio_dir = os.path.join("static", "audio")
-        static_path = os.path.join(static_audio_dir, filename)
-        alternative_paths.append(static_path)
-
-        # Try absolute static path
-        abs_static_path = os.path.abspath(static_path)
-        alternative_paths.append(abs_static_path)
-
-        # Try with current working directory
-        cwd_static_path = os.path.join(os.getcwd(), static_audio_dir, filename)
-        alternative_paths.append(cwd_static_path)
-
-        print(f"🔍 Searching alternative paths:")
-        for alt_path in alternative_paths:
-            print(f"   └─ Checking: {alt_path}")
-            if os.path.exists(alt_path):
-                print(f"   ✅ Found at: {alt_path}")
-                audio_file_path = alt_path
-                break
-        else:
-            print(f"❌ Audio file not found in any alternative location")
-            raise HTTPException(
-                status_code=404, detail="Audio file not found on server")
-
-    print(f"✅ Serving audio file: {audio_file_path}")
-    print(f"📊 File info:")
-    print(f"   └─ Size: {os.path.getsize(audio_file_path)} bytes")
-    print(f"   └─ Modified: {time.ctime(os.path.getmtime(audio_file_path))}")
-
-    # Return the file with enhanced headers for audio playback
-    return FileResponse(
-        path=audio_file_path,
-        media_type="audio/wav",
-        filename=os.path.basename(audio_file_path),
+            status_code=404, detail="No response available for this session ID")
+
+    # Already synthesized: replay the file from disk
+    if session_data.get("audio_file"):
+        return await get_audio_file(request, session_id)
+
+    response_text = session_data.get("text", "")
+    if not response_text:
+        raise HTTPException(
+            status_code=404, detail="No response text to synthesize for this session")
+
+    ticket = admission.admit()
+    audio_file_path = assistant.tts_instance.new_audio_file_path()
+
+    async def audio_stream():
+        # A listener who hangs up drops the rest of the synthesis
+        try:
+            async with cancel_on_disconnect(request) as cancel_token:
+                async for chunk in assistant.astream_speech(response_text, audio_file_path, cancel_token):
+                    yield chunk
+        except OperationCancelled as e:
+            logger.info("stream-audio for session %s cancelled: %s", session_id, e)
+            return
+
+        # Synthesis finished; make the teed file available for replay
+        store_session_audio(session_id, audio_file_path)
+
+    return StreamingResponse(
+        await admitted_stream(audio_stream(), ticket),
+        media_type="audio/mpeg",
         headers={
             "Content-Disposition": f"inline; filename={os.path.basename(audio_file_path)}",
-            "Cache-Control": "no-cache, no-store, must-revalidate, max-age=0",
-            "Pragma": "no-cache",
-            "Expires": "0",
-            # Add ETag with timestamp for cache busting
-            "ETag": f'"{time.time()}"',
-            "Last-Modified": time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime()),
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET",
-            "Access-Control-Allow-Headers": "*",
-            "Access-Control-Expose-Headers": "ETag, Last-Modified"
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
         }
     )
 
 
+@app.websocket("/ws/voice")
+async def voice_socket(websocket: WebSocket, session_id: str = Query(None),
+                       synthesize: bool = Query(True)):
+    """
+    Full-duplex voice session. One connection carries every turn: the client sends
+    transcripts or raw PCM frames and the server pushes text deltas and audio chunks,
+    so a turn costs no HTTP round trips. See VoiceSocketSession for the protocol.
+    """
+    session_id = session_id or uuid.uuid4().hex
+    logger.info("WebSocket connected for voice session %s", session_id)
+
+    if not assistant:
+        await websocket.close(code=1013, reason="Assistant is not ready")
+        return
+
+    def on_response(sid: str, response_text: str) -> None:
+        store_session_response(sid, response_text, "")
+
+    def on_audio(sid: str, audio_file_path: str) -> Dict[str, str]:
+        if not store_session_audio(sid, audio_file_path):
+            return {"audio_url": "", "immutable_audio_url": ""}
+        return {
+            "audio_url": f"/get-audio/{sid}",
+            "immutable_audio_url": immutable_audio_url(sid)
+        }
+
+    session = VoiceSocketSession(
+        websocket, assistant, session_id,
+        transcriber_factory=get_transcriber,
+        on_response=on_response,
+        on_audio=on_audio,
+        synthesize=synthesize
+    )
+    await session.run()
+    logger.info("WebSocket closed for voice session %s", session_id)
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(data: JobReq):
+    """
+    Submit a transcript and return 202 with a job id at once. The job moves through
+    queued -> processing -> text_ready -> completed (or failed, or cancelled through
+    DELETE /jobs/{job_id}); fetch it by
+    long-polling GET /jobs/{job_id}, or have it pushed over /jobs/{job_id}/events (SSE)
+    or /ws/jobs/{job_id}. While the audio renders, `audio_segments` lists the URL of each
+    finished sentence in order, so playback can start before the whole answer is spoken.
+    """
+    require_assistant()
+    ticket = admission.admit()
+    try:
+        job = job_manager.create(data.session_id, data.transcript, data.include_audio)
+        job_id = job["job_id"]
+        # The task's done-callback releases the ticket, even if it is cancelled before it runs
+        job_manager.start(job_id, run_job(job_id, data.transcript, data.session_id, data.include_audio),
+                          on_done=ticket.release)
+    except BaseException:
+        ticket.release()
+        raise
+    logger.info("Job %s accepted for session %s", job_id, data.session_id)
+
+    return JSONResponse(
+        status_code=202,
+        content={**job_links(job_id), "job_id": job_id, "status": job["status"], "version": job["version"]},
+        headers={"Location": f"/jobs/{job_id}"}
+    )
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str,
+                  wait: float = Query(0, ge=0, le=60, description="Seconds to wait for a change"),
+                  since: int = Query(0, ge=0, description="Last version seen by the client")):
+    """Return a job. With wait>0 this long-polls until the job is newer than `since` or done."""
+    job = await job_manager.wait(job_id, since, wait) if wait else job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {**job, **job_links(job_id)}
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a job that is still running on this worker and return its final state."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != CANCELLED and not job_manager.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']} and cannot be cancelled here")
+    return {**job_manager.get(job_id), **job_links(job_id)}
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-Sent Events stream of a job: one `job` event per change, ending when it is done."""
+    if job_manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        async for job in job_manager.follow(job_id):
+            yield format_sse("job", job)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@app.websocket("/ws/jobs/{job_id}")
+async def job_socket(websocket: WebSocket, job_id: str):
+    """Push a job over a WebSocket each time it changes, then close once it is done."""
+    await websocket.accept()
+    if job_manager.get(job_id) is None:
+        await websocket.close(code=1008, reason="Job not found")
+        return
+    try:
+        async for job in job_manager.follow(job_id):
+            await websocket.send_json(job)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
+async def run_job(job_id: str, transcript: str, session_id: str, include_audio: bool) -> None:
+    """
+    Run the pipeline for a job, publishing the text as soon as it is generated and each
+    sentence's audio as it is synthesized (which starts while the text is still being written).
+    """
+    start_time = time.time()
+    try:
+        job_manager.update(job_id, status=PROCESSING)
+
+        final_event: Dict[str, Any] = {}
+        segment_urls = []
+        async for event in assistant.astream_transcription_with_audio(
+                transcript, synthesize=include_audio, session_id=session_id):
+            if event["type"] == "segment":
+                url = segment_audio_url(event["audio_file"])
+                if url:
+                    segment_urls.append(url)
+                    job_manager.update(job_id, audio_segments=list(segment_urls))
+            elif event["type"] in ("text", "final") and not final_event:
+                # With audio the text arrives in a `text` event, before the audio is done
+                if "error" in event:
+                    raise RuntimeError(event["error"])
+                store_session_response(session_id, event.get("text", ""), "")
+                job_manager.update(job_id, status=TEXT_READY, text=event.get("text", ""),
+                                   language=event.get("language", "English"))
+            if event["type"] in ("text", "final"):
+                final_event = event
+
+        audio_fields = {"audio_incomplete": final_event.get("audio_incomplete", False)}
+        audio_file_path = final_event.get("audio_file")
+        if audio_file_path and store_session_audio(session_id, audio_file_path):
+            audio_fields.update({
+                "audio_url": f"/get-audio/{session_id}",
+                "immutable_audio_url": immutable_audio_url(session_id)
+            })
+
+        observe_stage("end_to_end", time.time() - start_time)
+        job_manager.update(job_id, status=COMPLETED, execution_time=time.time() - start_time, **audio_fields)
+    except AdmissionRejected as e:
+        job_manager.update(job_id, status=FAILED, error=str(e), retry_after=e.retry_after)
+    except Exception as e:
+        logger.error("Job %s failed after %.3f seconds: %s", job_id, time.time() - start_time, e)
+        job_manager.update(job_id, status=FAILED, error=str(e))
+
+
+def segment_audio_url(audio_file_path: str) -> str:
+    """Content-addressed URL of a synthesized segment, or "" if it failed."""
+    if not audio_file_path:
+        return ""
+    # TTS registered the file with its content hash when it wrote it
+    artifact = artifact_manager.registry.get(os.path.abspath(audio_file_path))
+    if artifact is None or not artifact.content_hash:
+        return ""
+    return f"/audio/{content_addressed_name(artifact)}"
+
+
+def job_links(job_id: str) -> Dict[str, str]:
+    return {
+        "status_url": f"/jobs/{job_id}",
+        "events_url": f"/jobs/{job_id}/events",
+        "websocket_url": f"/ws/jobs/{job_id}"
+    }
+
+
 @app.get("/get-latest-response/{session_id}")
 async def get_latest_response(session_id: str):
     """
     GET endpoint to retrieve the latest text response and audio URL for a session.
     """
-    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] API call received - get-latest-response for session: {session_id}")
-
-    if session_id not in session_responses:
-        print(f"❌ Session ID {session_id} not found")
-        print(f"Available sessions: {list(session_responses.keys())}")
+    response_data = session_store.get(session_id)
+    if response_data is None:
+        logger.info("Session %s not found", session_id, extra={"sample_rate": 0.1})
         raise HTTPException(
             status_code=404, detail="No response available for this session ID")
 
-    response_data = session_responses[session_id]
     audio_file_path = response_data.get("audio_file", "")
 
-    print(f"📁 Retrieved session data:")
-    print(
-        f"   └─ Text length: {len(response_data.get('text', ''))} characters")
-    print(f"   └─ Audio file: {audio_file_path}")
-    print(
-        f"   └─ Audio filename: {response_data.get('audio_filename', 'N/A')}")
+    logger.debug("Session %s: %d characters, audio file %s",
+                 session_id, len(response_data.get('text', '')), audio_file_path)
     # Generate the web-accessible URLs for the audio file
     audio_url = ""
     static_audio_url = ""
@@ -316,14 +693,7 @@ async def get_latest_response(session_id: str):
         audio_url = direct_audio_endpoint
 
         # Static URL as fallback - ensure Unix-compatible path separators
-        audio_filename = os.path.basename(audio_file_path)
-        static_audio_url = f"/static/audio/{audio_filename}"
-
-        print(f"🎵 Generated audio URLs:")
-        print(f"   └─ Direct endpoint: {direct_audio_endpoint}")
-        print(f"   └─ Static fallback: {static_audio_url}")
-    else:
-        print(f"⚠️ No audio file available for this session")
+        static_audio_url = f"/static/{artifact_manager.url_path(audio_file_path)}"
 
     return {
         "success": True,
@@ -331,6 +701,7 @@ async def get_latest_response(session_id: str):
         "audio_file": audio_file_path,
         "audio_url": audio_url,
         "static_audio_url": static_audio_url,
+        "immutable_audio_url": immutable_audio_url(session_id) if audio_file_path else "",
         "direct_audio_endpoint": direct_audio_endpoint,
         "audio_filename": response_data.get("audio_filename", ""),
         "timestamp": response_data.get("timestamp", 0),
@@ -343,20 +714,21 @@ async def debug_session(session_id: str):
     """
     Debug endpoint to check session data and file system state.
     """
-    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] API call received - debug-session for session: {session_id}")
+    logger.info("debug-session received for session %s", session_id)
 
+    session_data = session_store.get(session_id)
     debug_info = {
         "session_id": session_id,
-        "session_exists": session_id in session_responses,
-        "all_sessions": list(session_responses.keys()),
+        "session_exists": session_data is not None,
+        "session_store": session_store.stats(),
         "session_data": None,
+        "conversation_turns": len(get_conversation_store().history(session_id)) // 2,
         "file_checks": {},
         "static_directory": {},
         "working_directory": os.getcwd()
     }
 
-    if session_id in session_responses:
-        session_data = session_responses[session_id]
+    if session_data is not None:
         debug_info["session_data"] = {
             "text_length": len(session_data.get("text", "")),
             "audio_file": session_data.get("audio_file", ""),
@@ -394,85 +766,149 @@ async def debug_session(session_id: str):
                 "exists": os.path.exists(static_path)
             }
 
-    # Check static/audio directory
-    static_audio_dir = os.path.join("static", "audio")
-    if os.path.exists(static_audio_dir):
-        try:
-            files = os.listdir(static_audio_dir)
-            debug_info["static_directory"] = {
-                "path": static_audio_dir,
-                "exists": True,
-                "file_count": len(files),
-                "recent_files": sorted(files, key=lambda x: os.path.getmtime(os.path.join(static_audio_dir, x)), reverse=True)[:5]
-            }
-        except Exception as e:
-            debug_info["static_directory"] = {
-                "path": static_audio_dir,
-                "exists": True,
-                "error": str(e)
-            }
-    else:
-        debug_info["static_directory"] = {
-            "path": static_audio_dir,
-            "exists": False
-        }
+    # Audio directory state comes from the artifact index, not a directory listing
+    debug_info["static_directory"] = {
+        **artifact_manager.stats(),
+        "recent_files": artifact_manager.recent_files(5)
+    }
 
     return debug_info
 
 
-def normalize_audio_path(audio_path):
+def register_runtime_gauges() -> None:
+    """Expose cache hit ratios and pool/queue depths, read from the components at scrape time."""
+    registry = get_metrics_registry()
+
+    hit_ratio = registry.gauge(
+        "voce_cache_hit_ratio", "Fraction of cache lookups that were hits.", ["cache"])
+    hit_ratio.set_function(lambda: cache_hit_ratio("web"), cache="web")
+    hit_ratio.set_function(lambda: session_store.stats()["hit_ratio"], cache="session")
+    hit_ratio.set_function(lambda: cache_hit_ratio("coalescing"), cache="coalescing")
+
+    depth = registry.gauge(
+        "voce_queue_depth", "Items waiting in a queue or thread pool.", ["queue"])
+    depth.set_function(assistant.tts_adapter.get_queue_size, queue="tts_tasks")
+    depth.set_function(assistant.executor.queued, queue="assistant_executor")
+    depth.set_function(assistant.language_processor.thread_pool.queued, queue="language_executor")
+
+    in_flight = registry.gauge(
+        "voce_in_flight", "Work currently being processed.", ["kind"])
+    in_flight.set_function(assistant.get_active_request_count, kind="requests")
+    in_flight.set_function(assistant.tts_adapter.get_active_task_count, kind="tts_tasks")
+    in_flight.set_function(lambda: admission.stats()["in_flight"], kind="admitted_requests")
+    in_flight.set_function(assistant.coalescer.in_flight, kind="coalesced_computations")
+    for stage in admission.stage_limits:
+        in_flight.set_function(
+            lambda stage=stage: admission.stats()["stage_in_flight"][stage], kind=f"{stage}_stage")
+
+    registry.gauge("voce_dropped_log_records", "Log records dropped because the writer fell behind.").set_function(
+        dropped_log_records)
+
+    registry.gauge("voce_audio_artifact_bytes", "Disk used by generated audio.").set_function(
+        lambda: artifact_manager.registry.total_bytes)
+
+    result_store = registry.gauge(
+        "voce_tts_result_store_bytes", "Estimated memory held by finished TTS task results.", ["store"])
+    result_store.set_function(lambda: assistant.tts_adapter.completed_tasks.stats()["bytes"], store="adapter")
+    result_store.set_function(
+        lambda: assistant.tts_adapter.tts_instance.task_results.stats()["bytes"], store="engine")
+
+
+@asynccontextmanager
+async def cancel_on_disconnect(request: Request) -> AsyncIterator[CancellationToken]:
+    """Yield a token that is cancelled as soon as the HTTP client disconnects."""
+    cancel_token = CancellationToken()
+
+    async def watch() -> None:
+        # The body has been read, so the next message is the disconnect
+        while True:
+            message = await request.receive()
+            if message["type"] == "http.disconnect":
+                cancel_token.cancel("client disconnected")
+                return
+
+    watcher = asyncio.ensure_future(watch())
+    try:
+        yield cancel_token
+    finally:
+        watcher.cancel()
+
+
+def require_assistant() -> None:
+    """Answer 503 while the assistant is still starting (or failed to start; see /ready)."""
+    if not assistant:
+        raise HTTPException(
+            status_code=503, detail="Assistant is not ready", headers={"Retry-After": "5"})
+
+
+def store_session_response(session_id: str, response_text: str, audio_file_path: str) -> str:
     """
-    Normalize audio file path for cross-platform compatibility.
-    Ensures the path uses the correct separators and exists.
+    Verify the generated audio file and record the latest response for a session.
+    Returns the resolved audio path, or an empty string if the file is missing.
     """
-    if not audio_path:
-        return ""
+    # Bind the generated file to this session so /get-audio resolves it directly
+    if audio_file_path:
+        artifact = artifact_manager.bind_session(session_id, audio_file_path)
+
+        if artifact:
+            audio_file_path = artifact.path
+        else:
+            logger.warning("Audio file not found at %s", audio_file_path)
+            audio_file_path = ""
 
-    # Convert to absolute path using os.path.join for cross-platform compatibility
-    if not os.path.isabs(audio_path):
-        audio_path = os.path.abspath(audio_path)
+    # Store session data with enhanced information
+    session_store.set(session_id, {
+        "text": response_text,
+        "audio_file": audio_file_path,
+        "audio_filename": os.path.basename(audio_file_path) if audio_file_path else "",
+        "timestamp": time.time()
+    })
+    return audio_file_path
 
-    # Normalize path separators
-    audio_path = os.path.normpath(audio_path)
 
-    return audio_path
+def store_session_audio(session_id: str, audio_file_path: str):
+    """Bind audio synthesized after the response text was stored and record it on the session."""
+    artifact = artifact_manager.bind_session(session_id, audio_file_path)
+    if artifact:
+        session_store.update(
+            session_id,
+            audio_file=artifact.path,
+            audio_filename=os.path.basename(artifact.path)
+        )
+    return artifact
 
 
-def find_audio_file(audio_file_path):
+def get_transcriber():
     """
-    Find audio file in various possible locations for cross-platform compatibility.
-    Returns the actual path where the file exists, or empty string if not found.
+    Return the shared speech-to-text client used for PCM sent over /ws/voice.
+    Created on first use so text-only deployments never open the audio stack.
     """
-    if not audio_file_path:
-        return ""
+    global transcriber
+    with transcriber_lock:
+        if transcriber is None:
+            from app.core.modules.adapters.stt import EnhancedRealTimeTranscriber
+            transcriber = EnhancedRealTimeTranscriber(api_key=os.getenv("GROQ_API_KEY"))
+        return transcriber
 
-    # List of possible paths to check
-    possible_paths = []
 
-    # Original path
-    possible_paths.append(audio_file_path)
+def build_audio_urls(session_id: str, audio_file_path: str):
+    """Return the (direct endpoint, static fallback) URLs for a session's audio."""
+    audio_url = ""
+    static_audio_url = ""
 
-    # Absolute version of original path
-    if not os.path.isabs(audio_file_path):
-        possible_paths.append(os.path.abspath(audio_file_path))
+    if audio_file_path:
+        # Direct endpoint URL (preferred)
+        audio_url = f"/get-audio/{session_id}"
 
-    # In static/audio directory (relative to current working directory)
-    filename = os.path.basename(audio_file_path)
-    static_audio_dir = os.path.join("static", "audio")
-    possible_paths.append(os.path.join(static_audio_dir, filename))
-    possible_paths.append(os.path.abspath(
-        os.path.join(static_audio_dir, filename)))
+        # Static URL as fallback - ensure Unix-compatible path separators
+        static_audio_url = f"/static/{artifact_manager.url_path(audio_file_path)}"
 
-    # In static/audio directory relative to script location
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    possible_paths.append(os.path.join(
-        script_dir, "..", static_audio_dir, filename))
-    possible_paths.append(os.path.join(script_dir, static_audio_dir, filename))
+    return audio_url, static_audio_url
 
-    # Check each possible path
-    for path in possible_paths:
-        normalized_path = os.path.normpath(path)
-        if os.path.exists(normalized_path):
-            return normalized_path
 
-    return ""
+def immutable_audio_url(session_id: str) -> str:
+    """Return the content-addressed URL of a session's audio, or "" if none is available."""
+    artifact = artifact_manager.resolve(session_id)
+    if artifact is None or not artifact.content_hash:
+        return ""
+    return f"/audio/{content_addressed_name(artifact)}"
@@ -3,3 +3,7 @@ from pydantic import BaseModel
 class TranscriptReq(BaseModel):
     transcript : str
     session_id: str
+
+
+class JobReq(TranscriptReq):
+    include_audio: bool = True
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+
+from app.core.modules.adapters.completion_store import COMPLETED, CompletionStore
+
+
+def test_complete_and_fail():
+    store = CompletionStore()
+    store.complete("a", "a.mp3")
+    store.fail("b", "boom")
+
+    assert store.get("a").status == COMPLETED
+    assert store.get("a").value == "a.mp3"
+    assert store.get("b").failed
+    assert store.get("b").error == "boom"
+    assert store.get("missing") is None
+
+
+def test_wait_is_woken_by_another_thread():
+    store = CompletionStore()
+    threading.Timer(0.05, store.complete, args=("a", "a.mp3")).start()
+
+    assert store.wait("a", timeout=2).value == "a.mp3"
+    assert store.wait("missing", timeout=0.01) is None
+
+
+def test_wait_async_is_woken_by_another_thread():
+    store = CompletionStore()
+
+    async def main():
+        threading.Timer(0.05, store.complete, args=("a", "a.mp3")).start()
+        completion = await store.wait_async("a", timeout=2)
+        missing = await store.wait_async("missing", timeout=0.01)
+        return completion, missing
+
+    completion, missing = asyncio.run(main())
+    assert completion.value == "a.mp3"
+    assert missing is None
+
+
+def test_oldest_entries_are_evicted_over_capacity():
+    store = CompletionStore(capacity=2)
+    for key in ("a", "b", "c"):
+        store.complete(key, key)
+
+    assert store.get("a") is None
+    assert store.get("c").value == "c"
+    assert len(store) == 2
+
+
+def test_entries_expire_after_ttl():
+    store = CompletionStore(ttl_seconds=0.01)
+    store.complete("a", "a.mp3")
+    time.sleep(0.02)
+
+    assert store.get("a") is None
@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+
+from app.core.modules.session.conversation_store import ConversationStore
+from app.core.modules.state.state_backend import InMemoryStateBackend, SQLiteStateBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryStateBackend()
+    return SQLiteStateBackend(db_path=str(tmp_path / "state.db"))
+
+
+def test_mutate_creates_and_replaces(backend):
+    assert backend.mutate("ns", "k", lambda value: (value or 0) + 1) == 1
+    assert backend.mutate("ns", "k", lambda value: (value or 0) + 1) == 2
+    assert backend.get("ns", "k") == 2
+
+
+def test_mutate_is_atomic_across_threads(backend):
+    def add():
+        for _ in range(50):
+            backend.mutate("ns", "counter", lambda value: (value or 0) + 1)
+
+    threads = [threading.Thread(target=add) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert backend.get("ns", "counter") == 200
+
+
+def test_mutate_rolls_back_when_fn_fails(backend):
+    backend.set("ns", "k", {"a": 1})
+
+    def fail(value):
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        backend.mutate("ns", "k", fail)
+    assert backend.get("ns", "k") == {"a": 1}
+
+
+def test_concurrent_turns_are_all_recorded(backend):
+    store = ConversationStore(max_entries=1000, backend=backend)
+
+    def talk(n):
+        for i in range(10):
+            store.append_turn("s1", f"q{n}-{i}", f"a{n}-{i}")
+
+    threads = [threading.Thread(target=talk, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(store.history("s1")) == 80
+
+
+def test_repeated_question_is_recorded_each_time(backend):
+    store = ConversationStore(backend=backend)
+    store.append_turn("s1", "hello", "hi")
+    store.append_turn("s1", "hello", "hi")
+
+    assert len(store.history("s1")) == 4
+    assert store.context("s1")["last_query"] == "hello"
+
+
+def test_history_is_bounded_and_sessions_are_separate(backend):
+    store = ConversationStore(max_entries=4, backend=backend)
+    for i in range(3):
+        store.append_turn("s1", f"q{i}", f"a{i}")
+    store.update_context("s2", {"language": "French"})
+
+    assert [m["content"] for m in store.history("s1")] == ["q1", "a1", "q2", "a2"]
+    assert store.history("s2") == []
+    assert store.context("s2") == {"language": "French"}
+    assert store.fingerprint("s3") == ""
+
+
+def test_memory_backend_does_not_serialize_writers_of_different_keys():
+    backend = InMemoryStateBackend()
+    inside = threading.Event()
+    release = threading.Event()
+
+    def slow(value):
+        inside.set()
+        release.wait(2)
+        return "slow"
+
+    # A session whose key lock differs from s1's
+    other = next(f"s{i}" for i in range(2, 1000)
+                 if backend._key_lock("conversation", f"s{i}") is not backend._key_lock("conversation", "s1"))
+
+    writer = threading.Thread(target=backend.mutate, args=("conversation", "s1", slow))
+    writer.start()
+    assert inside.wait(2)
+    # Another session's write and reads of the same key go through while s1's runs
+    backend.mutate("conversation", other, lambda value: "fast")
+    assert backend.get("conversation", other) == "fast"
+    assert backend.get("conversation", "s1") is None
+    release.set()
+    writer.join()
+    assert backend.get("conversation", "s1") == "slow"
@@ -0,0 +1,79 @@
+import asyncio
+
+from app.core.modules.jobs.job_manager import CANCELLED, COMPLETED, FAILED, PROCESSING, JobManager
+from app.core.modules.state.state_backend import InMemoryStateBackend
+
+
+def make_manager():
+    return JobManager(InMemoryStateBackend())
+
+
+def test_on_done_runs_even_if_cancelled_before_starting():
+    async def scenario():
+        manager = make_manager()
+        job_id = manager.create("s1", "hello", False)["job_id"]
+        released = []
+        started = []
+
+        async def work():
+            started.append(True)
+
+        manager.start(job_id, work(), on_done=lambda: released.append(True))
+        manager.cancel_all()
+        await asyncio.sleep(0)
+        return manager, job_id, released, started
+
+    manager, job_id, released, started = asyncio.run(scenario())
+    assert released == [True]
+    assert started == []
+    assert manager.get(job_id)["status"] == CANCELLED
+    assert not manager._tasks
+
+
+def test_cancel_wakes_waiters_and_marks_the_job_cancelled():
+    async def scenario():
+        manager = make_manager()
+        job_id = manager.create("s1", "hello", False)["job_id"]
+
+        async def work():
+            manager.update(job_id, status=PROCESSING)
+            await asyncio.sleep(60)
+
+        manager.start(job_id, work())
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(manager.wait(job_id, manager.get(job_id)["version"], timeout=5))
+        await asyncio.sleep(0)
+        assert manager.cancel(job_id)
+        job = await asyncio.wait_for(follower, timeout=1)
+        await asyncio.sleep(0)
+        return manager, job_id, job
+
+    manager, job_id, job = asyncio.run(scenario())
+    assert job["status"] == CANCELLED
+    assert not manager.cancel(job_id)
+    assert not manager._signals
+
+
+def test_job_that_ends_without_a_final_update_is_settled():
+    async def scenario():
+        manager = make_manager()
+        job_id = manager.create("s1", "hello", False)["job_id"]
+        done = manager.create("s1", "hello", False)["job_id"]
+
+        async def silent():
+            pass
+
+        async def finishes():
+            manager.update(done, status=COMPLETED)
+
+        manager.start(job_id, silent())
+        manager.start(done, finishes())
+        waiter = asyncio.ensure_future(manager.wait(job_id, 1, timeout=5))
+        await asyncio.wait_for(waiter, timeout=1)
+        await asyncio.sleep(0)
+        return manager, job_id, done
+
+    manager, job_id, done = asyncio.run(scenario())
+    assert manager.get(job_id)["status"] == FAILED
+    assert manager.get(done)["status"] == COMPLETED
+    assert not manager._signals
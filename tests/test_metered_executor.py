@@ -0,0 +1,43 @@
+import threading
+
+from app.core.modules.metrics.metrics import MeteredThreadPoolExecutor
+
+
+def test_queued_counts_work_waiting_for_a_worker():
+    executor = MeteredThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    running = executor.submit(block)
+    assert started.wait(5)
+    waiting = [executor.submit(lambda n=n: n) for n in range(3)]
+    assert executor.queued() == 3
+
+    # A queued future that is cancelled leaves the queue without running
+    assert waiting[0].cancel()
+    assert executor.queued() == 2
+
+    release.set()
+    assert running.result(5) == "done"
+    assert [future.result(5) for future in waiting[1:]] == [1, 2]
+    assert executor.queued() == 0
+    executor.shutdown()
+
+
+def test_cancelled_futures_leave_the_queue_on_shutdown():
+    executor = MeteredThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    started = threading.Event()
+    executor.submit(lambda: (started.set(), release.wait(5)))
+    assert started.wait(5)
+    executor.submit(lambda: None)
+    assert executor.queued() == 1
+
+    executor.shutdown(wait=False, cancel_futures=True)
+    assert executor.queued() == 0
+    release.set()
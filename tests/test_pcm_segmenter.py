@@ -0,0 +1,42 @@
+import struct
+
+import pytest
+
+pytest.importorskip("groq")
+pytest.importorskip("pyaudio")
+
+from app.core.modules.adapters.stt import PCMUtteranceSegmenter, VoiceActivityDetector
+
+RATE = 16000
+FRAME_BYTES = 2048
+
+
+def pcm(seconds: float, amplitude: int) -> bytes:
+    samples = int(RATE * seconds)
+    return struct.pack(f"{samples}h", *([amplitude] * samples))
+
+
+def make_segmenter() -> PCMUtteranceSegmenter:
+    detector = VoiceActivityDetector(threshold=0.02, min_duration=1.0, silence_duration=1.5,
+                                     sample_rate=RATE)
+    return PCMUtteranceSegmenter(detector, frame_bytes=FRAME_BYTES)
+
+
+def test_utterance_is_cut_on_audio_time_not_wall_clock():
+    segmenter = make_segmenter()
+    # Pushed all at once, far faster than real time
+    utterances = segmenter.feed(pcm(2.0, 8000) + pcm(2.0, 0))
+
+    assert len(utterances) == 1
+    # The speech plus the trailing silence that ended it
+    assert 2.0 <= len(utterances[0]) / (RATE * 2) < 4.0
+
+
+def test_short_burst_is_discarded():
+    segmenter = make_segmenter()
+    assert segmenter.feed(pcm(0.3, 8000) + pcm(2.0, 0)) == []
+
+    # The next utterance does not start with the abandoned burst
+    utterances = segmenter.feed(pcm(2.0, 8000) + pcm(2.0, 0))
+    assert len(utterances) == 1
+    assert len(utterances[0]) / (RATE * 2) < 4.0
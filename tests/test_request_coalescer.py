@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.core.modules.coalescing.request_coalescer import RequestCoalescer, normalize_transcript
+
+
+def test_normalize_transcript_ignores_case_spacing_and_punctuation():
+    assert normalize_transcript("  What's the  weather in Paris? ") == normalize_transcript("what's the weather in paris")
+
+
+def test_concurrent_callers_share_one_computation():
+    coalescer = RequestCoalescer("test")
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        for i in range(3):
+            await asyncio.sleep(0.01)
+            yield i
+
+    async def consume():
+        return [event async for event in coalescer.stream("key", compute)]
+
+    async def main():
+        return await asyncio.gather(consume(), consume(), consume())
+
+    assert asyncio.run(main()) == [[0, 1, 2]] * 3
+    assert len(calls) == 1
+    assert coalescer.in_flight() == 0
+
+
+def test_errors_reach_every_caller():
+    coalescer = RequestCoalescer("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(coalescer.run("key", fail), coalescer.run("key", fail),
+                                    return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_computation_continues_while_one_caller_remains():
+    coalescer = RequestCoalescer("test")
+    cancelled = []
+
+    async def compute():
+        try:
+            await asyncio.sleep(0.05)
+            return "done"
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        first = asyncio.ensure_future(coalescer.run("key", compute))
+        second = asyncio.ensure_future(coalescer.run("key", compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "done"
+    assert cancelled == []
+
+
+def test_disabled_coalescer_runs_every_call():
+    coalescer = RequestCoalescer("test", enabled=False)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return len(calls)
+
+    async def main():
+        return await asyncio.gather(coalescer.run("key", compute), coalescer.run("key", compute))
+
+    assert sorted(asyncio.run(main())) == [1, 2]
@@ -0,0 +1,65 @@
+import pytest
+
+from app.core.modules.adapters.speech_segmenter import SentenceSplitter, pack_segments, split_sentences
+
+
+def test_splits_on_terminators_followed_by_whitespace():
+    assert split_sentences("The museum opens at nine. Tickets cost 3.5 euros! Is it near example.com? Yes.",
+                           min_chars=1) == [
+        "The museum opens at nine.", "Tickets cost 3.5 euros!", "Is it near example.com?", "Yes."
+    ]
+
+
+def test_splits_on_danda():
+    assert split_sentences("यह एक वाक्य है। यह दूसरा वाक्य है।", min_chars=1) == [
+        "यह एक वाक्य है।", "यह दूसरा वाक्य है।"
+    ]
+
+
+@pytest.mark.parametrize("text", [
+    "Dr. Smith will see you at the clinic.",
+    "Mr. and Mrs. Jones live on Baker St. near the park.",
+    "Ms. Lee prefers tea vs. coffee in the morning.",
+    "Bring fruit, e.g. apples, pears, etc. and some water.",
+    "Take the tram, i.e. line 4, to the old town.",
+])
+def test_abbreviations_do_not_end_a_sentence(text):
+    assert split_sentences(text, min_chars=1) == [text]
+
+
+def test_abbreviation_split_across_chunks():
+    splitter = SentenceSplitter(min_chars=1)
+    sentences = []
+    for chunk in ["Ask Dr", ".", " Smith about it", ". Then rest. "]:
+        sentences += splitter.feed(chunk)
+    assert sentences + splitter.flush() == ["Ask Dr. Smith about it.", "Then rest."]
+
+
+def test_short_fragments_join_the_next_sentence():
+    assert split_sentences("Sure. The tower is open until midnight.") == [
+        "Sure. The tower is open until midnight."
+    ]
+
+
+def test_long_sentences_break_at_clauses():
+    text = "First we walk along the river, then we cross the bridge, and finally we reach the square."
+    parts = split_sentences(text, max_chars=40)
+    assert all(len(part) <= 40 for part in parts)
+    assert " ".join(parts) == text
+    assert parts[0].endswith(",")
+
+
+def test_unterminated_text_is_returned_by_flush():
+    splitter = SentenceSplitter(min_chars=1)
+    assert splitter.feed("It is warm today. And sunny") == ["It is warm today."]
+    assert splitter.flush() == ["And sunny"]
+    assert splitter.flush() == []
+
+
+def test_pack_segments_keeps_first_sentence_alone():
+    sentences = ["One.", "Two two.", "Three three.", "Four four four."]
+    assert pack_segments(sentences, max_chars=25) == ["One.", "Two two. Three three.", "Four four four."]
+    assert pack_segments(sentences, max_chars=25, first_alone=False) == [
+        "One. Two two.", "Three three.", "Four four four."
+    ]
+    assert pack_segments([]) == []
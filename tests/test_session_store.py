@@ -0,0 +1,50 @@
+import pytest
+
+from app.core.modules.session.session_store import SessionStore
+from app.core.modules.state.state_backend import InMemoryStateBackend, SQLiteStateBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryStateBackend()
+    return SQLiteStateBackend(db_path=str(tmp_path / "state.db"))
+
+
+def test_sweep_evicts_oldest_sessions_over_max_entries(backend):
+    store = SessionStore(max_entries=3, max_bytes=None, backend=backend)
+    for i in range(5):
+        store.set(f"s{i}", {"text": f"answer {i}"})
+
+    assert store.sweep() == 2
+    assert store.recent_keys(10) == ["s4", "s3", "s2"]
+    assert store.stats()["evictions"] == 2
+    assert store.stats()["capacity_enforced"] == "on_sweep"
+
+
+def test_sweep_evicts_oldest_sessions_over_max_bytes(backend):
+    store = SessionStore(max_entries=100, max_bytes=250, backend=backend)
+    for i in range(5):
+        store.set(f"s{i}", {"text": "x" * 100})
+
+    store.sweep()
+    assert store.recent_keys(10) == ["s4", "s3"]
+
+
+def test_field_values_and_recent_keys_use_the_backend(backend):
+    store = SessionStore(backend=backend)
+    store.set("a", {"audio_file": "one.mp3"})
+    store.set("b", {"audio_file": ""})
+    store.set("c", {"audio_file": "two.mp3"})
+
+    assert store.field_values("audio_file") == {"one.mp3", "two.mp3"}
+    assert store.recent_keys(2) == ["c", "b"]
+
+
+def test_local_store_enforces_capacity_on_write():
+    store = SessionStore(max_entries=2, max_bytes=None)
+    for i in range(3):
+        store.set(f"s{i}", {"text": "x"})
+
+    assert len(store) == 2
+    assert store.stats()["capacity_enforced"] == "on_write"
@@ -0,0 +1,191 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.modules.adapters.completion_store import Completion, COMPLETED
+from app.core.modules.adapters.speech_segmenter import IncompleteSpeech, SegmentedSynthesizer, SpeechSegment
+from app.core.modules.admission.admission_controller import AdmissionRejected
+
+
+class FakeTTSAdapter:
+    """Synthesizes instantly when awaited; has no room for new tasks while `capacity` are queued."""
+
+    default_budget = 30.0
+
+    def __init__(self, capacity=50):
+        self.capacity = capacity
+        self.queued = {}
+        self.done = {}
+        self.submitted = []
+        self.rejections = 0
+        self.cancelled = []
+        self.space_waits = 0
+        self._space = None
+
+    def speak_text_async(self, text, language="English", priority=0, session_id=None,
+                         deadline=None, cancel_token=None):
+        task_id = self.try_enqueue(text, language, priority, session_id, deadline, cancel_token)
+        if task_id is None:
+            self.rejections += 1
+            raise AdmissionRejected("tts", "queue_full", 1)
+        return task_id
+
+    def try_enqueue(self, text, language="English", priority=0, session_id=None,
+                    deadline=None, cancel_token=None):
+        if len(self.queued) >= self.capacity:
+            return None
+        task_id = f"tts_{len(self.submitted)}"
+        self.submitted.append(text)
+        self.queued[task_id] = text
+        return task_id
+
+    async def wait_for_queue_space(self, timeout):
+        self.space_waits += 1
+        if len(self.queued) < self.capacity:
+            return True
+        self._space = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._space.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def cancel_task(self, task_id):
+        self.cancelled.append(task_id)
+        return self.queued.pop(task_id, None) is not None
+
+    def get_completion(self, task_id):
+        if task_id in self.done:
+            return Completion(task_id, COMPLETED, value=self.done[task_id])
+        return None
+
+    async def await_task(self, task_id, timeout):
+        self.finish(task_id)
+        return self.done[task_id]
+
+    def finish(self, task_id):
+        if task_id in self.queued:
+            self.done[task_id] = f"{task_id}.mp3"
+            del self.queued[task_id]
+            if self._space is not None:
+                self._space.set()
+
+
+SENTENCES = [f"This is sentence number {i} of the answer." for i in range(30)]
+
+
+def stream_answer(speech, chunk=5):
+    text = " ".join(SENTENCES)
+    for start in range(0, len(text), chunk):
+        speech.feed(text[start:start + chunk])
+    speech.finish()
+
+
+async def collect(speech):
+    return [segment async for segment in speech.remaining()]
+
+
+def spoken_text(segments):
+    return " ".join(segment.text for segment in segments)
+
+
+def test_small_deltas_are_packed_into_few_segments():
+    adapter = FakeTTSAdapter()
+    synthesizer = SegmentedSynthesizer(adapter)
+    speech = synthesizer.open_stream()
+
+    stream_answer(speech)
+    segments = asyncio.run(collect(speech))
+
+    assert segments[0].text == SENTENCES[0]
+    assert len(segments) <= 5
+    assert all(len(segment.text) <= synthesizer.max_segment_chars for segment in segments)
+    assert spoken_text(segments) == " ".join(SENTENCES)
+
+
+def test_full_queue_delays_segments_instead_of_dropping_them():
+    adapter = FakeTTSAdapter(capacity=1)
+    speech = SegmentedSynthesizer(adapter).open_stream()
+
+    stream_answer(speech)
+    # Only the first segment fits; the rest wait for room instead of failing
+    assert len(adapter.submitted) == 1
+    assert all(segment.error is None for segment in speech.segments)
+
+    segments = asyncio.run(collect(speech))
+
+    assert all(segment.error is None and segment.audio_file for segment in segments)
+    assert spoken_text(segments) == " ".join(SENTENCES)
+    assert adapter.submitted == [segment.text for segment in segments]
+    # Waiting for room is internal backpressure, not a rejected request
+    assert adapter.rejections == 0
+
+
+def test_full_queue_waits_for_a_free_slot_instead_of_polling():
+    adapter = FakeTTSAdapter(capacity=0)
+    speech = SegmentedSynthesizer(adapter).open_stream(deadline=time.time() + 0.05)
+
+    stream_answer(speech)
+    segments = asyncio.run(collect(speech))
+
+    assert all(segment.error for segment in segments)
+    # One wait for the first segment until the deadline, then none for the others
+    assert adapter.space_waits == 1
+    assert adapter.rejections == 0
+
+
+def test_queue_full_until_deadline_marks_audio_incomplete(monkeypatch):
+    adapter = FakeTTSAdapter(capacity=0)
+    synthesizer = SegmentedSynthesizer(adapter)
+    monkeypatch.setattr(synthesizer, "artifacts", None)
+    speech = synthesizer.open_stream(deadline=0.0)
+
+    stream_answer(speech)
+    segments = asyncio.run(collect(speech))
+
+    assert segments and all(segment.error for segment in segments)
+    with pytest.raises(IncompleteSpeech) as excinfo:
+        speech.concatenate()
+    assert excinfo.value.failed == len(segments)
+    assert excinfo.value.audio_file is None
+
+
+def test_concatenate_reports_missing_segments_with_partial_audio(tmp_path, monkeypatch):
+    class Artifacts:
+        def new_path(self):
+            return str(tmp_path / "joined.mp3")
+
+        def register(self, path, content_hash=None):
+            pass
+
+    synthesizer = SegmentedSynthesizer(FakeTTSAdapter())
+    monkeypatch.setattr(synthesizer, "artifacts", Artifacts())
+    parts = []
+    for index in range(2):
+        path = tmp_path / f"part{index}.mp3"
+        path.write_bytes(b"frame%d" % index)
+        parts.append(str(path))
+
+    segments = [
+        SpeechSegment(0, "a", "t0", audio_file=parts[0]),
+        SpeechSegment(1, "b", "t1", error="queue full"),
+        SpeechSegment(2, "c", "t2", audio_file=parts[1]),
+    ]
+
+    with pytest.raises(IncompleteSpeech) as excinfo:
+        synthesizer.concatenate(segments)
+    assert (excinfo.value.failed, excinfo.value.total) == (1, 3)
+    with open(excinfo.value.audio_file, "rb") as joined:
+        assert joined.read() == b"frame0frame1"
+
+
+def test_submit_cancels_queued_segments_when_one_is_rejected():
+    adapter = FakeTTSAdapter(capacity=2)
+    synthesizer = SegmentedSynthesizer(adapter, max_segment_chars=60)
+
+    with pytest.raises(AdmissionRejected):
+        synthesizer.submit(" ".join(SENTENCES))
+
+    assert adapter.cancelled == ["tts_0", "tts_1"]
+    assert adapter.queued == {}
@@ -0,0 +1,111 @@
+import asyncio
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+
+from app.core.modules.adapters.tts_scheduler import TTSScheduler
+
+
+@dataclass
+class Task:
+    task_id: str
+    text: str = "hello"
+    priority: int = 0
+    deadline: float = 0.0
+    session_id: Optional[str] = None
+
+
+def make_task(task_id, deadline_in=60.0, **kwargs):
+    return Task(task_id, deadline=time.time() + deadline_in, **kwargs)
+
+
+def drain(scheduler):
+    ids = []
+    while scheduler.qsize():
+        ids.append(scheduler.get(timeout=0).task_id)
+    return ids
+
+
+def test_earliest_deadline_first():
+    scheduler = TTSScheduler()
+    scheduler.put_nowait(make_task("late", deadline_in=30))
+    scheduler.put_nowait(make_task("soon", deadline_in=5, session_id="b"))
+    assert drain(scheduler) == ["soon", "late"]
+
+
+def test_higher_priority_goes_first():
+    scheduler = TTSScheduler()
+    scheduler.put_nowait(make_task("normal", deadline_in=5))
+    scheduler.put_nowait(make_task("urgent", deadline_in=30, priority=2, session_id="b"))
+    assert drain(scheduler) == ["urgent", "normal"]
+
+
+def test_session_flooding_the_queue_does_not_starve_others():
+    # Each task costs 10s of synthesis, more than the deadlines leave
+    scheduler = TTSScheduler(chars_per_second=10.0)
+    for i in range(5):
+        scheduler.put_nowait(make_task(f"a{i}", deadline_in=5, text="x" * 100, session_id="a"))
+    scheduler.put_nowait(make_task("b0", deadline_in=5, text="x" * 100, session_id="b"))
+    order = drain(scheduler)
+    assert order.index("b0") <= 1
+    # A session's own tasks stay in submission order
+    assert [task for task in order if task.startswith("a")] == [f"a{i}" for i in range(5)]
+
+
+def test_expired_tasks_are_handed_to_on_expired():
+    expired = []
+    scheduler = TTSScheduler(on_expired=expired.append)
+    scheduler.put_nowait(make_task("stale", deadline_in=-1))
+    scheduler.put_nowait(make_task("fresh", session_id="b"))
+    assert scheduler.get(timeout=0).task_id == "fresh"
+    assert [task.task_id for task in expired] == ["stale"]
+
+
+def test_full_queue_raises():
+    scheduler = TTSScheduler(maxsize=1)
+    scheduler.put_nowait(make_task("first"))
+    with pytest.raises(queue.Full):
+        scheduler.put_nowait(make_task("second"))
+    assert scheduler.get(timeout=0).task_id == "first"
+    scheduler.put_nowait(make_task("second"))
+
+
+def test_remove_frees_a_slot():
+    scheduler = TTSScheduler(maxsize=1)
+    scheduler.put_nowait(make_task("first"))
+    assert scheduler.remove("first").task_id == "first"
+    assert scheduler.remove("first") is None
+    scheduler.put_nowait(make_task("second"))
+
+
+def test_get_times_out_and_returns_none_once_closed():
+    scheduler = TTSScheduler()
+    with pytest.raises(queue.Empty):
+        scheduler.get(timeout=0.01)
+    scheduler.close()
+    assert scheduler.get() is None
+
+
+def test_wait_for_space_wakes_when_a_task_leaves_the_queue():
+    scheduler = TTSScheduler(maxsize=1)
+    scheduler.put_nowait(make_task("first"))
+
+    async def main():
+        threading.Timer(0.05, scheduler.get, kwargs={"timeout": 0}).start()
+        return await scheduler.wait_for_space(timeout=2)
+
+    started = time.time()
+    assert asyncio.run(main()) is True
+    assert time.time() - started < 1
+
+
+def test_wait_for_space_times_out_on_a_full_queue():
+    scheduler = TTSScheduler(maxsize=1)
+    scheduler.put_nowait(make_task("first"))
+
+    assert asyncio.run(scheduler.wait_for_space(timeout=0.01)) is False
+    assert asyncio.run(TTSScheduler().wait_for_space(timeout=0)) is True